@@ -0,0 +1,104 @@
+# app/auth/passwords.py
+"""
+Password hashing on a dedicated, size-bounded process pool.
+
+bcrypt is deliberately slow; running it on the request workers lets a login
+storm starve every other endpoint. Async endpoints await hashes computed in
+separate processes instead, and get a 503 once too many are queued.
+
+This module only depends on passlib so that pool processes start quickly.
+"""
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import os
+from threading import Lock
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+# Load environment variables
+load_dotenv()
+
+# bcrypt cost factor for new hashes; existing hashes keep the cost they were made with
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Processes hashing passwords (one per CPU by default); 0 hashes on the event loop's default thread pool instead
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+# Hashes running or queued before new requests are rejected with 503
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+_executor = None
+_pending = 0
+_lock = Lock()
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+def check_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+def _get_executor():
+    global _executor
+    if PASSWORD_HASH_WORKERS <= 0:
+        return None
+    with _lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+def _discard_executor(executor) -> None:
+    """Drop a pool broken by a crashed worker so the next call starts a fresh one"""
+    global _executor
+    with _lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+async def _run_bounded(fn, *args):
+    global _pending
+    with _lock:
+        if _pending >= PASSWORD_HASH_MAX_PENDING:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests in progress, please retry",
+                headers={"Retry-After": "1"},
+            )
+        _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        executor = _get_executor()
+        try:
+            return await loop.run_in_executor(executor, fn, *args)
+        except BrokenProcessPool:
+            # A worker died (OOM kill, segfault); a broken pool fails every call, so replace it and retry once
+            _discard_executor(executor)
+            return await loop.run_in_executor(_get_executor(), fn, *args)
+    finally:
+        with _lock:
+            _pending -= 1
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the password pool"""
+    return await _run_bounded(hash_password, password)
+
+async def check_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash on the password pool"""
+    return await _run_bounded(check_password, plain_password, hashed_password)
+
+def pending_hashes() -> int:
+    return _pending
+
+def shutdown_password_pool() -> None:
+    """Stop the pool processes; called when the application shuts down"""
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
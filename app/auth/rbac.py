@@ -11,7 +11,7 @@ def check_user_role(required_roles: list[UserRole], user: User):
         )
     return True
 
-def get_admin_user(current_user: User = Depends(get_current_active_user)):
+async def get_admin_user(current_user: User = Depends(get_current_active_user)):
     """Dependency to check if user is an admin"""
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
@@ -23,7 +23,7 @@ def get_admin_user(current_user: User = Depends(get_current_active_user)):
 def get_user_with_roles(roles: list[UserRole]):
     """Factory for creating a dependency that checks for specific roles"""
     
-    def _get_user_with_roles(current_user: User = Depends(get_current_active_user)):
+    async def _get_user_with_roles(current_user: User = Depends(get_current_active_user)):
         check_user_role(roles, current_user)
         return current_user
         
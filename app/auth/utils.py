@@ -1,16 +1,21 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta, UTC
-from typing import Optional
+from typing import Optional, Union
+import enum
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import os
 from dotenv import load_dotenv
 
 from app.schemas.user.user_schemas import TokenData
-from app.models.user import User
-from app.database.database import get_db
+from app.models.user import User, UserRole
+from app.database.async_database import get_async_db
+from app.utils.cache import LRUCache
+from app.auth.passwords import pwd_context, check_password_async
 
 # Load environment variables
 load_dotenv()
@@ -20,7 +25,38 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+class AuthMode(str, enum.Enum):
+    DATABASE = "database"  # Load the user row on every request
+    STATELESS = "stateless"  # Trust token claims checked against the principal cache
+
+AUTH_MODE = AuthMode(os.getenv("AUTH_MODE", AuthMode.DATABASE.value))
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user as far as authorization needs to know"""
+    id: int
+    username: str
+    role: UserRole
+    is_active: bool
+    token_version: int
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            role=user.role,
+            is_active=user.is_active,
+            token_version=user.token_version or 0
+        )
+
+# Principals by user id. Admin changes invalidate the entry in this worker;
+# the TTL bounds how long other workers keep accepting a superseded token.
+_principal_cache = LRUCache(
+    maxsize=int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+)
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
 def verify_password(plain_password, hashed_password):
@@ -35,6 +71,13 @@ def authenticate_user(db: Session, username: str, password: str):
         return False
     return user
 
+async def authenticate_user_async(db: AsyncSession, username: str, password: str):
+    """Like authenticate_user, but verifies the password on the password pool"""
+    user = await db.scalar(select(User).where(User.username == username))
+    if not user or not await check_password_async(password, user.hashed_password):
+        return False
+    return user
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -45,26 +88,76 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+def token_claims(user: User) -> dict:
+    """Claims identifying a user, their role and the version of their role and active status"""
+    return {
+        "sub": user.username,
+        "uid": user.id,
+        "role": user.role.value,
+        "ver": user.token_version or 0
+    }
+
+def invalidate_principal(user_id: int) -> None:
+    """Forget the cached principal of a user after their role or active status changes"""
+    _principal_cache.pop(user_id)
+
+def _decode_token(token: str, credentials_exception: HTTPException) -> dict:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    user = db.query(User).filter(User.username == token_data.username).first()
+    if payload.get("sub") is None:
+        raise credentials_exception
+    return payload
+
+async def _load_user(db: AsyncSession, payload: dict, credentials_exception: HTTPException) -> User:
+    token_data = TokenData(username=payload.get("sub"))
+    user = await db.scalar(select(User).where(User.username == token_data.username))
     if user is None:
         raise credentials_exception
     return user
 
-def get_current_active_user(current_user: User = Depends(get_current_user)):
+async def _get_principal(db: AsyncSession, payload: dict, credentials_exception: HTTPException) -> Principal:
+    user_id = payload.get("uid")
+    if user_id is None:
+        # Token issued before claims were added
+        return Principal.from_user(await _load_user(db, payload, credentials_exception))
+
+    principal = _principal_cache.get(user_id)
+    if principal is None:
+        user = await db.get(User, user_id)
+        if user is None:
+            raise credentials_exception
+        principal = Principal.from_user(user)
+        _principal_cache.set(user_id, principal)
+
+    # Role or active status changed since the token was issued
+    if principal.token_version != payload.get("ver") or principal.role.value != payload.get("role"):
+        raise credentials_exception
+    return principal
+
+async def get_current_user(db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)) -> Union[User, Principal]:
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    payload = _decode_token(token, credentials_exception)
+    if AUTH_MODE == AuthMode.STATELESS:
+        return await _get_principal(db, payload, credentials_exception)
+    return await _load_user(db, payload, credentials_exception)
+
+async def get_current_db_user(db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)) -> User:
+    """Like get_current_user, but always returns the full User row"""
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    payload = _decode_token(token, credentials_exception)
+    return await _load_user(db, payload, credentials_exception)
+
+async def get_current_active_user(current_user: Union[User, Principal] = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user 
\ No newline at end of file
+    return current_user
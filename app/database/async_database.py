@@ -0,0 +1,178 @@
+# app/database/async_database.py
+import enum
+import os
+from dotenv import load_dotenv
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
+
+from app.database.database import SQLALCHEMY_DATABASE_URL, engine
+from app.database.pool import (
+    InstrumentedAsyncAdaptedQueuePool, attach_telemetry, connect_args, pool_options
+)
+from app.utils.instrumentation import instrument_engine
+from app.utils.time_utils import json_serializer, json_deserializer
+
+# Load environment variables
+load_dotenv()
+
+class DatabaseMode(str, enum.Enum):
+    SYNC = "sync"  # Synchronous engine, each statement runs on the threadpool
+    ASYNC = "async"  # Async engine (aiosqlite / asyncpg), no threads involved
+
+DATABASE_MODE = DatabaseMode(os.getenv("DATABASE_MODE", DatabaseMode.SYNC.value))
+
+# Async drivers used when DATABASE_URL names a synchronous one
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+def to_async_url(url: str) -> str:
+    """Swap the driver of a database URL for its async counterpart"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if parsed.get_driver_name() in ("aiosqlite", "asyncpg") or backend not in ASYNC_DRIVERS:
+        return url
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_url(SQLALCHEMY_DATABASE_URL))
+
+_async_engine = None
+_async_sessionmaker = None
+
+def get_async_engine():
+    """Create the async engine on first use, so sync mode needs no async driver"""
+    global _async_engine, _async_sessionmaker
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            ASYNC_DATABASE_URL,
+            connect_args=connect_args(ASYNC_DATABASE_URL),
+            json_serializer=json_serializer,
+            json_deserializer=json_deserializer,
+            **pool_options(ASYNC_DATABASE_URL, InstrumentedAsyncAdaptedQueuePool)
+        )
+        attach_telemetry("async", _async_engine.sync_engine)
+        instrument_engine(_async_engine.sync_engine)
+        _async_sessionmaker = async_sessionmaker(
+            _async_engine,
+            autoflush=False,
+            expire_on_commit=False
+        )
+    return _async_engine
+
+def AsyncSessionLocal() -> AsyncSession:
+    get_async_engine()
+    return _async_sessionmaker()
+
+# Sessions behind ThreadedSession keep loaded state after commit like AsyncSession does
+ThreadedSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+    bind=engine
+)
+
+class ThreadedSession:
+    """
+    AsyncSession-compatible facade over a synchronous Session.
+
+    Every call that may touch the database runs on the threadpool, so the
+    routers are written once against the AsyncSession API and serve both
+    database modes.
+    """
+
+    def __init__(self, sync_session):
+        self.sync_session = sync_session
+
+    async def execute(self, statement, params=None, **kwargs):
+        def _execute():
+            result = self.sync_session.execute(statement, params, **kwargs)
+            # Buffer rows like the async drivers do, so iterating does no I/O
+            return result.freeze()() if getattr(result, "returns_rows", True) else result
+        return await run_in_threadpool(_execute)
+
+    async def scalar(self, statement, params=None, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, statement, params, **kwargs)
+
+    async def scalars(self, statement, params=None, **kwargs):
+        return (await self.execute(statement, params, **kwargs)).scalars()
+
+    async def get(self, entity, ident, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kwargs)
+
+    def get_bind(self):
+        return self.sync_session.get_bind()
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    async def delete(self, instance):
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self, objects=None):
+        await run_in_threadpool(self.sync_session.flush, objects)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def refresh(self, instance, attribute_names=None):
+        await run_in_threadpool(self.sync_session.refresh, instance, attribute_names)
+
+    async def run_sync(self, fn, *args, **kwargs):
+        """Call `fn(sync_session, *args, **kwargs)` on the threadpool"""
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def close(self):
+        if not self.sync_session.in_transaction():
+            # Nothing checked out a connection, so closing does no I/O
+            self.sync_session.close()
+            return
+        await run_in_threadpool(self.sync_session.close)
+
+# Dependency
+async def get_async_db():
+    if DATABASE_MODE == DatabaseMode.ASYNC:
+        async with AsyncSessionLocal() as db:
+            yield db
+    else:
+        db = ThreadedSession(ThreadedSessionLocal())
+        try:
+            yield db
+        finally:
+            await db.close()
+
+async def stream_partitions(statement, batch_size: int = 1000):
+    """
+    Rows of a select, `batch_size` at a time, from a server-side cursor.
+
+    For responses streamed after their endpoint returned: the request's
+    session is closed by then, so this opens a session of its own for the
+    current database mode and closes it when the iteration ends.
+    """
+    statement = statement.execution_options(yield_per=batch_size)
+    if DATABASE_MODE == DatabaseMode.ASYNC:
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(statement)
+            async for partition in result.partitions():
+                yield partition
+        return
+
+    db = ThreadedSessionLocal()
+    try:
+        partitions = (await run_in_threadpool(db.execute, statement)).partitions()
+        while partition := await run_in_threadpool(next, partitions, None):
+            yield partition
+    finally:
+        await run_in_threadpool(db.close)
+
+async def dispose_async_engine():
+    if _async_engine is not None:
+        await _async_engine.dispose()
@@ -6,6 +6,8 @@ from dotenv import load_dotenv
 
 # Import custom serializers
 from app.utils.time_utils import json_serializer, json_deserializer
+from app.database.pool import InstrumentedQueuePool, attach_telemetry, connect_args, pool_options
+from app.utils.instrumentation import instrument_engine
 
 # Load environment variables
 load_dotenv()
@@ -13,20 +15,16 @@ load_dotenv()
 # Get database URL from environment variable
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./sql_app.db")
 
-# Create database engine based on URL
-if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        SQLALCHEMY_DATABASE_URL, 
-        connect_args={"check_same_thread": False},
-        json_serializer=json_serializer,
-        json_deserializer=json_deserializer
-    )
-else:
-    engine = create_engine(
-        SQLALCHEMY_DATABASE_URL,
-        json_serializer=json_serializer,
-        json_deserializer=json_deserializer
-    )
+# Create database engine based on URL; pool sizing and timeouts come from DB_* variables
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args=connect_args(SQLALCHEMY_DATABASE_URL),
+    json_serializer=json_serializer,
+    json_deserializer=json_deserializer,
+    **pool_options(SQLALCHEMY_DATABASE_URL, InstrumentedQueuePool)
+)
+attach_telemetry("sync", engine)
+instrument_engine(engine)
 
 # Create SessionLocal without timezone parameter
 SessionLocal = sessionmaker(
@@ -0,0 +1,191 @@
+# app/database/pool.py
+"""
+Connection pool configuration and telemetry.
+
+Pool sizing comes from environment variables with per-backend defaults. Each
+engine gets a PoolTelemetry attached that counts checkouts, connections in
+use, overflow connections and timeouts, and times how long checkouts wait
+for a connection; /admin/db-pool reports the counters.
+"""
+import os
+import time
+from threading import Lock
+
+from dotenv import load_dotenv
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Load environment variables
+load_dotenv()
+
+# Upper bounds (seconds) of the checkout wait histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes")
+
+def is_memory_sqlite(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+
+def pool_options(url: str, poolclass) -> dict:
+    """Pool arguments for create_engine / create_async_engine, from the environment"""
+    if is_memory_sqlite(url):
+        # In-memory SQLite lives in a single connection; nothing to size
+        return {}
+    is_sqlite = make_url(url).get_backend_name() == "sqlite"
+    return {
+        "poolclass": poolclass,
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        # Servers drop idle connections; SQLite files never go away
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "-1" if is_sqlite else "1800")),
+        "pool_pre_ping": _env_flag("DB_POOL_PRE_PING", not is_sqlite),
+    }
+
+def connect_args(url: str) -> dict:
+    """Driver connect arguments, including the connect / lock wait timeout"""
+    parsed = make_url(url)
+    timeout = os.getenv("DB_CONNECT_TIMEOUT")
+    if parsed.get_backend_name() == "sqlite":
+        args = {"check_same_thread": False}
+        if timeout is not None:
+            args["timeout"] = float(timeout)  # How long to wait for a locked database
+        return args
+    if timeout is None:
+        return {}
+    if parsed.get_driver_name() == "asyncpg":
+        return {"timeout": float(timeout)}
+    return {"connect_timeout": int(float(timeout))}
+
+class PoolTelemetry:
+    """Counters for one engine's connection pool"""
+
+    def __init__(self, name: str, engine):
+        self.name = name
+        self.engine = engine
+        self._lock = Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.overflow_events = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS) + 1)
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            index = next((i for i, bound in enumerate(WAIT_BUCKETS) if seconds <= bound), len(WAIT_BUCKETS))
+            self.wait_buckets[index] += 1
+            if timed_out:
+                self.timeouts += 1
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        pool = self.engine.pool
+        with self._lock:
+            self.connects += 1
+            # QueuePool counts connections beyond pool_size as overflow
+            if isinstance(pool, QueuePool) and pool.overflow() > 0:
+                self.overflow_events += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checkins += 1
+            self.in_use = max(self.in_use - 1, 0)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self) -> dict:
+        pool = self.engine.pool
+        with self._lock:
+            waits = sum(self.wait_buckets)
+            stats = {
+                "pool_class": type(pool).__name__,
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "overflow_events": self.overflow_events,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_mean_ms": self.wait_total / waits * 1000 if waits else 0.0,
+                "wait_max_ms": self.wait_max * 1000,
+                "wait_histogram_ms": {
+                    **{f"le_{bound * 1000:g}": count for bound, count in zip(WAIT_BUCKETS, self.wait_buckets)},
+                    "inf": self.wait_buckets[-1]
+                },
+            }
+        if isinstance(pool, QueuePool):
+            stats.update(
+                pool_size=pool.size(),
+                checked_in=pool.checkedin(),
+                checked_out=pool.checkedout(),
+                overflow=pool.overflow(),
+                timeout=pool.timeout()
+            )
+        return stats
+
+_telemetry = {}
+
+def attach_telemetry(name: str, engine) -> PoolTelemetry:
+    """Listen to the pool events of a (sync) engine and register its counters under `name`"""
+    telemetry = PoolTelemetry(name, engine)
+    event.listen(engine, "connect", telemetry._on_connect)
+    event.listen(engine, "checkout", telemetry._on_checkout)
+    event.listen(engine, "checkin", telemetry._on_checkin)
+    event.listen(engine, "invalidate", telemetry._on_invalidate)
+    engine.pool._telemetry = telemetry
+    _telemetry[name] = telemetry
+    return telemetry
+
+def pool_stats() -> dict:
+    """Snapshot of every instrumented pool of this worker"""
+    return {name: telemetry.snapshot() for name, telemetry in _telemetry.items()}
+
+class _TimedCheckoutMixin:
+    """Times how long each checkout waits for a pooled (or newly opened) connection"""
+    _telemetry = None
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            if self._telemetry is not None:
+                self._telemetry.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        if self._telemetry is not None:
+            self._telemetry.record_wait(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a new pool; keep reporting to the same counters
+        pool = super().recreate()
+        pool._telemetry = self._telemetry
+        return pool
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+class InstrumentedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
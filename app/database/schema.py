@@ -0,0 +1,62 @@
+# app/database/schema.py
+"""
+Startup schema handling.
+
+Migrations are applied out-of-band with `alembic upgrade head`, once per
+deployment. Workers only compare the database's Alembic revision with the
+head revision shipped in `migrations/` (a single-row query) and refuse to
+start on a mismatch. DB_RESET_ON_STARTUP=true drops and recreates every
+table instead; it is meant for development and the test suite only.
+"""
+import os
+from pathlib import Path
+
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from dotenv import load_dotenv
+
+from app.models import Base  # Registers every model on Base.metadata
+
+# Load environment variables
+load_dotenv()
+
+# Drop and recreate all tables when the application starts (development only)
+DB_RESET_ON_STARTUP = os.getenv("DB_RESET_ON_STARTUP", "False").lower() == "true"
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+class SchemaOutOfDateError(RuntimeError):
+    pass
+
+def _script_directory() -> ScriptDirectory:
+    config = Config(str(ALEMBIC_INI))
+    # Resolve migrations/ independently of the working directory
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "migrations"))
+    return ScriptDirectory.from_config(config)
+
+def head_revision() -> str:
+    """The newest migration in `migrations/versions`"""
+    return _script_directory().get_current_head()
+
+def current_revision(engine) -> str:
+    """The migration the database was last upgraded (or stamped) to"""
+    with engine.connect() as connection:
+        return MigrationContext.configure(connection).get_current_revision()
+
+def check_schema(engine) -> None:
+    """Raise SchemaOutOfDateError unless the database is at the head revision"""
+    current, head = current_revision(engine), head_revision()
+    if current != head:
+        raise SchemaOutOfDateError(
+            f"Database schema is at revision {current or 'none'}, expected {head}. "
+            "Run `alembic upgrade head` before starting the application."
+        )
+
+def reset_schema(engine) -> None:
+    """Drop and recreate every table, then mark the database as being at head"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        context = MigrationContext.configure(connection)
+        context.stamp(_script_directory(), "head")
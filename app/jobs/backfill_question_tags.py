@@ -0,0 +1,60 @@
+# app/jobs/backfill_question_tags.py
+"""
+Fill the `question_tags` table from the comma separated `Question.tags` strings.
+
+Questions written before tags were normalised only have the string. The job
+walks the questions in id order, one batch per transaction, and replaces the
+batch's `question_tags` rows with their parsed tags (one delete and one
+insert per batch), so it can be re-run (or resumed with --after-id) safely.
+
+Usage:
+    python -m app.jobs.backfill_question_tags [--batch-size 1000] [--after-id 0]
+"""
+import argparse
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.database.database import SessionLocal
+from app.models.question import Question, question_tags
+from app.services.tags import add_question_tags
+
+def backfill_question_tags(db: Session, batch_size: int = 1000, after_id: int = 0) -> int:
+    """
+    Normalise the tags of every question with an id above `after_id`, one batch per transaction.
+
+    Returns:
+        int: Number of questions processed
+    """
+    processed = 0
+    while True:
+        rows = db.execute(
+            select(Question.id, Question.tags)
+            .where(Question.id > after_id)
+            .order_by(Question.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return processed
+
+        db.execute(delete(question_tags).where(question_tags.c.question_id.in_([row.id for row in rows])))
+        add_question_tags(db, {question_id: tags for question_id, tags in rows if tags})
+        db.commit()
+        processed += len(rows)
+        after_id = rows[-1].id
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000, help="Questions normalised per transaction")
+    parser.add_argument("--after-id", type=int, default=0, help="Resume after this question id")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        processed = backfill_question_tags(db, args.batch_size, args.after_id)
+    finally:
+        db.close()
+    print(f"Normalised the tags of {processed} questions")
+
+if __name__ == "__main__":
+    main()
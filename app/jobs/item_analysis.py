@@ -0,0 +1,199 @@
+# app/jobs/item_analysis.py
+"""
+Classical item analysis of the graded responses of each test.
+
+For every test with completed sessions the job streams its responses
+(session, question, correct) in chunks, scored by the stored grading result
+or, for responses never graded, by `options.is_correct` of the selected
+option. Each chunk is handled as sparse (session, question) coordinates with
+NumPy: per-session totals and per-question sums are folded into a handful of
+running sums, so memory stays bounded by the chunk size however many rows the
+test has. From those sums it writes, per test question, the p-value and the
+point-biserial correlation with the score on the other questions
+(`question_item_stats`), and per test the KR-20 reliability
+(`test_item_stats`). A session counts 0 for questions it did not answer.
+
+Usage:
+    python -m app.jobs.item_analysis [--test-id 12 ...] [--chunk-size 100000]
+"""
+import argparse
+from itertools import chain
+from typing import Iterable, Iterator, List, Optional
+
+import numpy as np
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.database.database import SessionLocal
+from app.models.question import Option
+from app.models.session import TestSession, UserResponse
+from app.models.test import QuestionItemStats, TestItemStats, test_questions
+
+class ItemStatistics:
+    """Running sums of a test's session x question score matrix, fed one chunk of sessions at a time"""
+
+    def __init__(self, question_ids: Iterable[int]):
+        self.question_ids = np.array(sorted(question_ids), dtype=np.int64)
+        question_count = len(self.question_ids)
+        self.answered = np.zeros(question_count, dtype=np.int64)
+        self.correct = np.zeros(question_count)  # Sum of item scores x
+        self.correct_total = np.zeros(question_count)  # Sum of x * session total t
+        self.total_sum = 0.0
+        self.total_sq_sum = 0.0
+
+    def add_chunk(self, rows: np.ndarray) -> None:
+        """Add (session_id, question_id, correct) rows holding every response of their sessions"""
+        question_count = len(self.question_ids)
+        if not question_count or not len(rows):
+            return
+        columns = np.searchsorted(self.question_ids, rows[:, 1])
+        # Responses to questions no longer in the test are left out
+        in_test = self.question_ids[np.minimum(columns, question_count - 1)] == rows[:, 1]
+        rows, columns = rows[in_test], columns[in_test]
+        _, sessions = np.unique(rows[:, 0], return_inverse=True)
+        correct = rows[:, 2].astype(np.float64)
+
+        totals = np.bincount(sessions, weights=correct)
+        self.answered += np.bincount(columns, minlength=question_count)
+        self.correct += np.bincount(columns, weights=correct, minlength=question_count)
+        self.correct_total += np.bincount(columns, weights=correct * totals[sessions], minlength=question_count)
+        self.total_sum += totals.sum()
+        self.total_sq_sum += np.square(totals).sum()
+
+    def results(self, session_count: int) -> dict:
+        """p-values, point-biserials and KR-20 over `session_count` sessions (those with no responses score 0)"""
+        n, k = session_count, len(self.question_ids)
+        if not n:
+            # Nothing to divide by: a test with no completed sessions has no statistics yet
+            return {
+                "session_count": 0,
+                "question_count": k,
+                "mean_score": None,
+                "kr20": None,
+                "questions": [
+                    {"question_id": int(question_id), "answered_count": 0, "p_value": None, "point_biserial": None}
+                    for question_id in self.question_ids
+                ]
+            }
+        with np.errstate(divide="ignore", invalid="ignore"):
+            p_values = self.correct / n
+            total_mean = self.total_sum / n
+            total_variance = self.total_sq_sum / n - total_mean ** 2
+            # Item x against the rest score r = t - x; x * x == x for 0/1 scores
+            rest_mean = total_mean - p_values
+            rest_variance = (self.total_sq_sum - 2 * self.correct_total + self.correct) / n - rest_mean ** 2
+            covariance = (self.correct_total - self.correct) / n - p_values * rest_mean
+            point_biserials = covariance / np.sqrt(p_values * (1 - p_values) * rest_variance)
+            kr20 = k / (k - 1) * (1 - np.sum(p_values * (1 - p_values)) / total_variance) if k > 1 else np.nan
+
+        def value(number) -> Optional[float]:
+            return float(number) if np.isfinite(number) else None
+
+        return {
+            "session_count": n,
+            "question_count": k,
+            "mean_score": value(total_mean),
+            "kr20": value(kr20),
+            "questions": [
+                {
+                    "question_id": int(question_id),
+                    "answered_count": int(answered),
+                    "p_value": value(p_value),
+                    "point_biserial": value(point_biserial)
+                }
+                for question_id, answered, p_value, point_biserial
+                in zip(self.question_ids, self.answered, p_values, point_biserials)
+            ]
+        }
+
+def response_chunks(db: Session, test_id: int, chunk_size: int = 100000) -> Iterator[np.ndarray]:
+    """
+    (session_id, question_id, correct) rows of a test's completed sessions, about `chunk_size` at a time.
+
+    Rows come in session order and a session is never split across chunks.
+    """
+    # Plain Core rows: the ORM's per-row processing would cost more than the statistics
+    result = db.connection().execute(
+        select(
+            UserResponse.test_session_id,
+            UserResponse.question_id,
+            func.coalesce(UserResponse.is_correct, Option.is_correct, False)
+        )
+        .join(TestSession, TestSession.id == UserResponse.test_session_id)
+        .join(Option, Option.id == UserResponse.selected_option_id)
+        .where(TestSession.test_id == test_id, TestSession.completed_at.isnot(None))
+        .order_by(UserResponse.test_session_id)
+        .execution_options(yield_per=chunk_size)
+    )
+    carried = np.empty((0, 3), dtype=np.int64)
+    for partition in result.partitions():
+        rows = np.fromiter(chain.from_iterable(partition), dtype=np.int64, count=3 * len(partition)).reshape(-1, 3)
+        chunk = np.concatenate([carried, rows])
+        # The last session may continue in the next partition
+        last_session_start = np.searchsorted(chunk[:, 0], chunk[-1, 0])
+        carried = chunk[last_session_start:]
+        if last_session_start:
+            yield chunk[:last_session_start]
+    if len(carried):
+        yield carried
+
+def analyse_test(db: Session, test_id: int, chunk_size: int = 100000) -> dict:
+    """Item analysis of one test's completed sessions (see ItemStatistics.results)"""
+    question_ids = db.execute(
+        select(test_questions.c.question_id).where(test_questions.c.test_id == test_id)
+    ).scalars().all()
+    session_count = db.scalar(
+        select(func.count(TestSession.id))
+        .where(TestSession.test_id == test_id, TestSession.completed_at.isnot(None))
+    )
+    statistics = ItemStatistics(question_ids)
+    for chunk in response_chunks(db, test_id, chunk_size):
+        statistics.add_chunk(chunk)
+    return statistics.results(session_count)
+
+def store_item_statistics(db: Session, test_id: int, results: dict) -> None:
+    """Replace the stored item analysis of a test (no commit)"""
+    db.execute(delete(QuestionItemStats).where(QuestionItemStats.test_id == test_id))
+    db.execute(delete(TestItemStats).where(TestItemStats.test_id == test_id))
+    db.execute(insert(TestItemStats), [{
+        "test_id": test_id,
+        **{column: results[column] for column in ("session_count", "question_count", "mean_score", "kr20")}
+    }])
+    if results["questions"]:
+        db.execute(insert(QuestionItemStats), [
+            {"test_id": test_id, **question} for question in results["questions"]
+        ])
+
+def run_item_analysis(db: Session, test_ids: Optional[Iterable[int]] = None, chunk_size: int = 100000) -> List[int]:
+    """
+    Analyse the given tests (every test with completed sessions when None), one test per transaction.
+
+    Returns:
+        List[int]: Ids of the analysed tests
+    """
+    if test_ids is None:
+        test_ids = db.execute(
+            select(TestSession.test_id).where(TestSession.completed_at.isnot(None)).distinct().order_by(TestSession.test_id)
+        ).scalars().all()
+    analysed = []
+    for test_id in test_ids:
+        store_item_statistics(db, test_id, analyse_test(db, test_id, chunk_size))
+        db.commit()
+        analysed.append(test_id)
+    return analysed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--test-id", type=int, action="append", dest="test_ids", help="Only this test (repeatable)")
+    parser.add_argument("--chunk-size", type=int, default=100000, help="Response rows fetched per chunk")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        analysed = run_item_analysis(db, args.test_ids, args.chunk_size)
+    finally:
+        db.close()
+    print(f"Analysed {len(analysed)} tests")
+
+if __name__ == "__main__":
+    main()
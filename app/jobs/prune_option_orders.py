@@ -0,0 +1,57 @@
+# app/jobs/prune_option_orders.py
+"""
+Shrink the `option_orders` table after switching to seeded option ordering.
+
+Sessions created in stored mode (or before option order modes existed) keep
+their materialised rows while they are in progress: their order cannot be
+re-derived from the seed. Once such a session is completed its option order
+is never read again, so its rows can be deleted.
+
+Usage:
+    python -m app.jobs.prune_option_orders [--batch-size 1000]
+"""
+import argparse
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.database.database import SessionLocal
+from app.models.session import TestSession, OptionOrder
+
+def prune_completed_option_orders(db: Session, batch_size: int = 1000) -> int:
+    """
+    Delete the option orders of completed sessions, one batch of sessions per transaction.
+
+    Returns:
+        int: Number of deleted option order rows
+    """
+    deleted = 0
+    while True:
+        session_ids = db.execute(
+            select(OptionOrder.test_session_id)
+            .join(TestSession, TestSession.id == OptionOrder.test_session_id)
+            .where(TestSession.completed_at.isnot(None))
+            .distinct()
+            .limit(batch_size)
+        ).scalars().all()
+        if not session_ids:
+            return deleted
+
+        result = db.execute(delete(OptionOrder).where(OptionOrder.test_session_id.in_(session_ids)))
+        db.commit()
+        deleted += result.rowcount
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000, help="Sessions pruned per transaction")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        deleted = prune_completed_option_orders(db, args.batch_size)
+    finally:
+        db.close()
+    print(f"Deleted {deleted} option order rows of completed sessions")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# app/jobs/recompute_test_analytics.py
+"""
+Rebuild or check the running test analytics aggregates.
+
+Submits keep the aggregates up to date as they grade; this job recomputes them
+from the completed sessions and their graded responses. Run it once to
+backfill the tests graded before analytics existed, and with --check to
+compare the running aggregates against a recomputation without changing
+them (the exit status is 1 when they differ).
+
+The recomputation counts the questions a test has now, so tests whose
+questions changed after they were taken report differences; rebuilding them
+makes the analytics follow the current questions.
+
+Usage:
+    python -m app.jobs.recompute_test_analytics [--test-id 12 ...] [--check] [--batch-size 1000]
+"""
+import argparse
+import sys
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import select, union
+from sqlalchemy.orm import Session
+
+from app.database.database import SessionLocal
+from app.models.session import TestSession
+from app.models.test import TestStats
+from app.services.analytics import (
+    compare_aggregates, compute_test_aggregates, load_test_aggregates, replace_test_aggregates
+)
+
+def analysed_test_ids(db: Session) -> List[int]:
+    """Tests with completed sessions or stored aggregates"""
+    return db.execute(union(
+        select(TestSession.test_id).where(TestSession.completed_at.isnot(None)),
+        select(TestStats.test_id)
+    ).order_by("test_id")).scalars().all()
+
+def recompute_test_analytics(db: Session, test_ids: Optional[Iterable[int]] = None, batch_size: int = 1000) -> int:
+    """
+    Replace the aggregates of the given tests (all analysed tests when None), one test per transaction.
+
+    Returns:
+        int: Number of tests recomputed
+    """
+    recomputed = 0
+    for test_id in analysed_test_ids(db) if test_ids is None else test_ids:
+        # Submits of the test wait on this row lock until the rebuilt aggregates are committed
+        db.execute(select(TestStats.test_id).where(TestStats.test_id == test_id).with_for_update())
+        replace_test_aggregates(db, compute_test_aggregates(db, test_id, batch_size))
+        db.commit()
+        recomputed += 1
+    return recomputed
+
+def check_test_analytics(db: Session, test_ids: Optional[Iterable[int]] = None, batch_size: int = 1000) -> Dict[int, List[str]]:
+    """Differences between the stored and the recomputed aggregates of each test that has any"""
+    differences = {}
+    for test_id in analysed_test_ids(db) if test_ids is None else test_ids:
+        test_differences = compare_aggregates(
+            load_test_aggregates(db, test_id), compute_test_aggregates(db, test_id, batch_size)
+        )
+        db.rollback()
+        if test_differences:
+            differences[test_id] = test_differences
+    return differences
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--test-id", type=int, action="append", dest="test_ids", help="Only this test (repeatable)")
+    parser.add_argument("--check", action="store_true", help="Report differences instead of rebuilding")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows fetched per round trip")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.check:
+            differences = check_test_analytics(db, args.test_ids, args.batch_size)
+        else:
+            recomputed = recompute_test_analytics(db, args.test_ids, args.batch_size)
+    finally:
+        db.close()
+
+    if not args.check:
+        print(f"Recomputed the analytics of {recomputed} tests")
+        return
+    for test_id, test_differences in differences.items():
+        print(f"Test {test_id}:")
+        for difference in test_differences:
+            print(f"  {difference}")
+    print(f"{len(differences)} tests with differing analytics")
+    sys.exit(1 if differences else 0)
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,14 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from app.routers import auth, admin, institution, faculty, student, test, test_questions, test_sessions, questions
-from app.models import Base  # Updated import for Base
-from app.database.database import engine
+from app.database.database import SessionLocal, engine
+from app.database.async_database import dispose_async_engine
+from app.database.schema import DB_RESET_ON_STARTUP, check_schema, reset_schema
+from app.auth.passwords import shutdown_password_pool
+from app.services.autosave import AUTOSAVE_MODE, AutosaveMode, autosave_buffer, flush_autosave_buffer, run_autosave_flusher
+from app.utils.instrumentation import InstrumentationMiddleware, InstrumentedRoute, metrics_registry
 import sqlalchemy.exc
 import os
 from dotenv import load_dotenv
@@ -9,22 +16,56 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Migrations run out-of-band (`alembic upgrade head`); workers only verify the revision
+    try:
+        if DB_RESET_ON_STARTUP:
+            reset_schema(engine)
+            print("Database tables recreated (DB_RESET_ON_STARTUP)")
+        else:
+            check_schema(engine)
+    except sqlalchemy.exc.OperationalError:
+        print("Could not connect to the database. Please check your connection settings.")
+        print("The application will continue to run, but database operations may fail.")
+    
+    flusher = None
+    if AUTOSAVE_MODE == AutosaveMode.WRITE_BEHIND:
+        # Answers a crashed worker acknowledged but never wrote
+        db = SessionLocal()
+        try:
+            replayed = autosave_buffer.recover(db)
+        finally:
+            db.close()
+        if replayed:
+            print(f"Replayed {replayed} autosaved responses from the journal")
+        flusher = asyncio.create_task(run_autosave_flusher())
+    yield
+    if flusher:
+        flusher.cancel()
+        with suppress(asyncio.CancelledError):
+            await flusher
+    # Write whatever is still buffered before the process exits
+    try:
+        flush_autosave_buffer()
+    except sqlalchemy.exc.SQLAlchemyError as error:
+        print(f"Could not flush buffered autosaves ({error}); the journal keeps them for the next start")
+    autosave_buffer.close()
+    # Stop the password hashing processes
+    shutdown_password_pool()
+    await dispose_async_engine()
+
 app = FastAPI(
     title="FastAPI CRUD with Advanced RBAC",
     description="A FastAPI CRUD application with PostgreSQL, authentication, and advanced role-based access control",
     version="0.4.0",
-    debug=os.getenv("DEBUG", "False").lower() == "true"
+    debug=os.getenv("DEBUG", "False").lower() == "true",
+    lifespan=lifespan
 )
 
-# Try to create tables, but handle potential database connection errors
-try:
-    # Drop all tables and recreate them
-    Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
-    print("Database tables created successfully")
-except sqlalchemy.exc.OperationalError:
-    print("Could not connect to the database. Please check your connection settings.")
-    print("The application will continue to run, but database operations may fail.")
+# Per-route statement counts and timings, served at /metrics (see app.utils.instrumentation)
+app.add_middleware(InstrumentationMiddleware)
+app.router.route_class = InstrumentedRoute
 
 # Include routers
 app.include_router(auth.router)
@@ -42,4 +83,9 @@ app.include_router(test_questions.router)
 
 @app.get("/")
 def read_root():
-    return {"message": "Welcome to FastAPI CRUD API with Advanced Role-Based Access Control"}
\ No newline at end of file
+    return {"message": "Welcome to FastAPI CRUD API with Advanced Role-Based Access Control"}
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics():
+    """Per-route request metrics of this worker in the Prometheus text format"""
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -2,9 +2,11 @@
 from app.database.database import Base  # Import Base directly
 from app.models.user import User, UserRole
 from app.models.common import Item
-from app.models.test import Test, test_questions
-from app.models.question import Question, QuestionType, Option
-from app.models.session import TestSession, UserResponse, OptionOrder
+from app.models.test import (
+    Test, test_questions, TestStats, TestScoreBucket, QuestionStats, OptionStats, TestItemStats, QuestionItemStats
+)
+from app.models.question import Question, QuestionType, Option, Tag, question_tags
+from app.models.session import TestSession, OptionOrderMode, UserResponse, OptionOrder
 
 # Export all models
 __all__ = [
@@ -18,11 +20,12 @@ __all__ = [
     "Item",
     
     # Test models
-    "Test", "test_questions",
+    "Test", "test_questions", "TestStats", "TestScoreBucket", "QuestionStats", "OptionStats",
+    "TestItemStats", "QuestionItemStats",
     
     # Question models
-    "Question", "QuestionType", "Option",
+    "Question", "QuestionType", "Option", "Tag", "question_tags",
     
     # Session models
-    "TestSession", "UserResponse", "OptionOrder"
+    "TestSession", "OptionOrderMode", "UserResponse", "OptionOrder"
 ]
\ No newline at end of file
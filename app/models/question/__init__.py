@@ -1,4 +1,6 @@
 from app.models.question.question import Question, QuestionType
 from app.models.question.option import Option
+from app.models.question.tag import Tag, question_tags
+from app.models.question import search_index  # Attaches the full-text index DDL to the questions table
 
-__all__ = ["Question", "Option", "QuestionType"]
+__all__ = ["Question", "Option", "QuestionType", "Tag", "question_tags"]
@@ -7,7 +7,7 @@ class Option(Base):
     __tablename__ = "options"
     
     id = Column(Integer, primary_key=True, index=True)
-    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False)
+    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False, index=True)
     option_text = Column(String, nullable=False)
     is_correct = Column(Boolean, default=False)
     
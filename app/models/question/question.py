@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Text, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, Text, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -11,6 +11,12 @@ class QuestionType(str, enum.Enum):
 
 class Question(Base):
     __tablename__ = "questions"
+    __table_args__ = (
+        # A faculty member's own questions; public ones are found by walking the primary key
+        Index("ix_questions_created_by_is_public", "created_by", "is_public"),
+        # Question bank filters
+        Index("ix_questions_subject_difficulty_level", "subject", "difficulty_level"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     question_text = Column(Text, nullable=False)
@@ -19,7 +25,7 @@ class Question(Base):
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
     subject = Column(String)
     difficulty_level = Column(String)
-    tags = Column(String)
+    tags = Column(String)  # Comma separated as entered; normalised into question_tags
     explanation = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -28,4 +34,5 @@ class Question(Base):
     creator = relationship("User", back_populates="created_questions")
     tests = relationship("Test", secondary="test_questions", back_populates="questions")
     options = relationship("Option", back_populates="question", cascade="all, delete-orphan")
+    normalized_tags = relationship("Tag", secondary="question_tags", back_populates="questions")
     user_responses = relationship("UserResponse", back_populates="question")
@@ -0,0 +1,66 @@
+# app/models/question/search_index.py
+"""
+Full-text index over questions.question_text and questions.tags.
+
+SQLite uses an external-content FTS5 table kept in sync by triggers;
+PostgreSQL uses a generated, weighted tsvector column with a GIN index.
+Either way the database maintains the index on every insert, update and
+delete, so no application code path can forget to. The DDL is attached to
+the questions table so create_all / drop_all handle it too; migrations
+carry their own copy.
+"""
+from sqlalchemy import DDL, event
+
+from app.models.question.question import Question
+
+SQLITE_FTS_TABLE = "questions_fts"
+POSTGRES_SEARCH_COLUMN = "search_vector"
+POSTGRES_SEARCH_INDEX = "ix_questions_search_vector"
+
+SQLITE_CREATE = [
+    # Prefix indexes make 2 and 3 character prefix queries cheap
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} USING fts5("
+    "question_text, tags, content='questions', content_rowid='id', "
+    "tokenize='porter unicode61', prefix='2 3')",
+    f"CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ai AFTER INSERT ON questions BEGIN "
+    f"INSERT INTO {SQLITE_FTS_TABLE}(rowid, question_text, tags) VALUES (new.id, new.question_text, new.tags); "
+    "END",
+    f"CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ad AFTER DELETE ON questions BEGIN "
+    f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, question_text, tags) "
+    "VALUES ('delete', old.id, old.question_text, old.tags); "
+    "END",
+    f"CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_au AFTER UPDATE OF question_text, tags ON questions BEGIN "
+    f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, question_text, tags) "
+    "VALUES ('delete', old.id, old.question_text, old.tags); "
+    f"INSERT INTO {SQLITE_FTS_TABLE}(rowid, question_text, tags) VALUES (new.id, new.question_text, new.tags); "
+    "END",
+]
+SQLITE_DROP = [f"DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}"]
+
+POSTGRES_CREATE = [
+    # Question text outranks tags
+    f"ALTER TABLE questions ADD COLUMN IF NOT EXISTS {POSTGRES_SEARCH_COLUMN} tsvector "
+    "GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(question_text, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(tags, '')), 'B')"
+    ") STORED",
+    f"CREATE INDEX IF NOT EXISTS {POSTGRES_SEARCH_INDEX} ON questions USING GIN ({POSTGRES_SEARCH_COLUMN})",
+]
+
+for statement in SQLITE_CREATE:
+    event.listen(Question.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+for statement in SQLITE_DROP:
+    # Triggers go with the table, the FTS table has to be dropped explicitly
+    event.listen(Question.__table__, "after_drop", DDL(statement).execute_if(dialect="sqlite"))
+for statement in POSTGRES_CREATE:
+    event.listen(Question.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+
+def include_in_autogenerate(name, type_, parent_names) -> bool:
+    """Alembic include_name hook: the search index isn't described by the models"""
+    if type_ == "table":
+        return not name.startswith(SQLITE_FTS_TABLE)
+    if type_ == "column":
+        return name != POSTGRES_SEARCH_COLUMN
+    if type_ == "index":
+        return name != POSTGRES_SEARCH_INDEX
+    return True
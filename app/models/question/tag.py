@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index, Table
+from sqlalchemy.orm import relationship
+
+from app.database.database import Base
+
+# Join table for many-to-many relationship between questions and tags
+question_tags = Table(
+    "question_tags",
+    Base.metadata,
+    Column("question_id", Integer, ForeignKey("questions.id", ondelete="CASCADE"), primary_key=True),
+    Column("tag_id", Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True),
+    # The primary key serves lookups by question; this one serves filtering by tag
+    Index("ix_question_tags_tag_id_question_id", "tag_id", "question_id"),
+)
+
+class Tag(Base):
+    __tablename__ = "tags"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False, unique=True, index=True)  # Lowercased, see app.services.tags.parse_tags
+    
+    # Relationships
+    questions = relationship("Question", secondary=question_tags, back_populates="normalized_tags")
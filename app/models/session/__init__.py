@@ -1,5 +1,5 @@
-from app.models.session.test_session import TestSession
+from app.models.session.test_session import TestSession, OptionOrderMode
 from app.models.session.user_response import UserResponse
 from app.models.session.option_order import OptionOrder
 
-__all__ = ["TestSession", "UserResponse", "OptionOrder"]
+__all__ = ["TestSession", "OptionOrderMode", "UserResponse", "OptionOrder"]
@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import Column, Integer, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from app.database.database import Base
 
 class OptionOrder(Base):
     __tablename__ = "option_orders"
+    __table_args__ = (
+        # Each option appears once in a session's order; also serves the per-session lookups
+        UniqueConstraint("test_session_id", "option_id", name="uq_option_orders_test_session_id_option_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     test_session_id = Column(Integer, ForeignKey("test_sessions.id"), nullable=False)
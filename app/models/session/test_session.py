@@ -1,9 +1,14 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, Float
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Float, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+import enum
 
 from app.database.database import Base
 
+class OptionOrderMode(str, enum.Enum):
+    STORED = "stored"  # One option_orders row per option
+    SEEDED = "seeded"  # Derived from shuffle_seed on every read
+
 class TestSession(Base):
     __tablename__ = "test_sessions"
     
@@ -14,6 +19,25 @@ class TestSession(Base):
     completed_at = Column(DateTime(timezone=True))
     score = Column(Float)
     shuffle_seed = Column(Integer)  # For reproducible random shuffling
+    option_order_mode = Column(String, default=OptionOrderMode.STORED)  # NULL for sessions created before modes existed
+    
+    # Results, stored when the session is graded (see app.services.results)
+    correct_answers = Column(Integer)
+    question_count = Column(Integer)
+    percentage = Column(Float)
+    outcome_bitmap = Column(LargeBinary)  # Bit per question in question order, set when correct
+    
+    __table_args__ = (
+        # A student's sessions of a test, active ones and results
+        Index("ix_test_sessions_user_id_test_id_completed_at", "user_id", "test_id", "completed_at"),
+        # At most one active session per student and test, so concurrent starts cannot both insert
+        Index(
+            "uq_test_sessions_active_user_id_test_id", "user_id", "test_id",
+            unique=True,
+            sqlite_where=completed_at.is_(None),
+            postgresql_where=completed_at.is_(None)
+        ),
+    )
     
     # Relationships
     user = relationship("User", back_populates="test_sessions")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, Boolean, ForeignKey, DateTime, JSON, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -6,11 +6,18 @@ from app.database.database import Base
 
 class UserResponse(Base):
     __tablename__ = "user_responses"
+    __table_args__ = (
+        # One saved response per question and session; also serves the per-session lookups
+        UniqueConstraint("test_session_id", "question_id", name="uq_user_responses_test_session_id_question_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     test_session_id = Column(Integer, ForeignKey("test_sessions.id"), nullable=False)
     question_id = Column(Integer, ForeignKey("questions.id"), nullable=False)
     selected_option_id = Column(Integer, ForeignKey("options.id"), nullable=False)
+    selected_option_ids = Column(JSON)  # Full selection of multiple choice questions
+    client_sequence = Column(Integer)  # Autosave ordering sent by the client; NULL when it sent none
+    is_correct = Column(Boolean)  # Set when the test session is graded
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
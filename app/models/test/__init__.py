@@ -1,3 +1,7 @@
 from app.models.test.test import Test, test_questions
+from app.models.test.analytics import TestStats, TestScoreBucket, QuestionStats, OptionStats, TestItemStats, QuestionItemStats
 
-__all__ = ["Test", "test_questions"]
+__all__ = [
+    "Test", "test_questions", "TestStats", "TestScoreBucket", "QuestionStats", "OptionStats",
+    "TestItemStats", "QuestionItemStats"
+]
@@ -0,0 +1,65 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime
+from sqlalchemy.sql import func
+
+from app.database.database import Base
+
+# Running aggregates of graded attempts, updated by every submit (see app.services.analytics)
+
+class TestStats(Base):
+    __tablename__ = "test_stats"
+    
+    test_id = Column(Integer, ForeignKey("tests.id", ondelete="CASCADE"), primary_key=True)
+    attempt_count = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Float, nullable=False, default=0.0)
+    percentage_sum = Column(Float, nullable=False, default=0.0)
+    percentage_sq_sum = Column(Float, nullable=False, default=0.0)  # For the standard deviation
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class TestScoreBucket(Base):
+    __tablename__ = "test_score_buckets"
+    
+    test_id = Column(Integer, ForeignKey("tests.id", ondelete="CASCADE"), primary_key=True)
+    bucket = Column(Integer, primary_key=True)  # Percentage range, see app.services.analytics.score_bucket
+    attempt_count = Column(Integer, nullable=False, default=0)
+
+class QuestionStats(Base):
+    __tablename__ = "question_stats"
+    
+    test_id = Column(Integer, ForeignKey("tests.id", ondelete="CASCADE"), primary_key=True)
+    question_id = Column(Integer, ForeignKey("questions.id", ondelete="CASCADE"), primary_key=True)
+    attempt_count = Column(Integer, nullable=False, default=0)  # Graded attempts that had the question
+    answered_count = Column(Integer, nullable=False, default=0)
+    correct_count = Column(Integer, nullable=False, default=0)
+    # Percentages of those attempts, overall and of the ones answering correctly, for the discrimination index
+    percentage_sum = Column(Float, nullable=False, default=0.0)
+    percentage_sq_sum = Column(Float, nullable=False, default=0.0)
+    correct_percentage_sum = Column(Float, nullable=False, default=0.0)
+
+class OptionStats(Base):
+    __tablename__ = "option_stats"
+    
+    test_id = Column(Integer, ForeignKey("tests.id", ondelete="CASCADE"), primary_key=True)
+    option_id = Column(Integer, ForeignKey("options.id", ondelete="CASCADE"), primary_key=True)
+    question_id = Column(Integer, ForeignKey("questions.id", ondelete="CASCADE"), nullable=False)
+    pick_count = Column(Integer, nullable=False, default=0)
+
+# Classical item analysis, written by the item_analysis batch job (see app.jobs.item_analysis)
+
+class TestItemStats(Base):
+    __tablename__ = "test_item_stats"
+    
+    test_id = Column(Integer, ForeignKey("tests.id", ondelete="CASCADE"), primary_key=True)
+    session_count = Column(Integer, nullable=False)
+    question_count = Column(Integer, nullable=False)
+    mean_score = Column(Float)  # Mean number of correct answers
+    kr20 = Column(Float)  # Kuder-Richardson 20 reliability; NULL when undefined
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class QuestionItemStats(Base):
+    __tablename__ = "question_item_stats"
+    
+    test_id = Column(Integer, ForeignKey("tests.id", ondelete="CASCADE"), primary_key=True)
+    question_id = Column(Integer, ForeignKey("questions.id", ondelete="CASCADE"), primary_key=True)
+    answered_count = Column(Integer, nullable=False)
+    p_value = Column(Float)  # Share of sessions answering correctly
+    point_biserial = Column(Float)  # Correlation with the score on the other questions; NULL when undefined
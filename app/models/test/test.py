@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Float, Table, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Float, Index, Table, Text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -12,10 +12,17 @@ test_questions = Table(
     Column("question_id", Integer, ForeignKey("questions.id"), primary_key=True),
     Column("question_order", Integer),
     Column("marks", Float, default=1.0),
+    # Questions of a test in order; the reverse lookup invalidates cached answer keys
+    Index("ix_test_questions_test_id_question_order", "test_id", "question_order"),
+    Index("ix_test_questions_question_id", "question_id"),
 )
 
 class Test(Base):
     __tablename__ = "tests"
+    __table_args__ = (
+        # Keyset pages of the active tests students list
+        Index("ix_tests_is_active_id", "is_active", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
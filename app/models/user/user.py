@@ -22,6 +22,7 @@ class User(Base):
     hashed_password = Column(String)
     role = Column(Enum(UserRole), default=UserRole.FACULTY)
     is_active = Column(Boolean, default=True)
+    token_version = Column(Integer, default=0, nullable=False)  # Bumped when role or active status changes
     
     # Simplified UTC timestamp creation
     created_at = Column(
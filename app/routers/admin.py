@@ -1,47 +1,55 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Union
 
-from app.database.database import get_db
+from app.database.async_database import get_async_db
 from app.models.user import User, UserRole
 from app.schemas.user.user_schemas import UserResponse
+from app.schemas.common.pagination_schemas import CursorPage
+from app.services.pagination import PageParams, page_params
 from app.auth.rbac import get_admin_user
+from app.auth.utils import invalidate_principal
+from app.database.pool import pool_stats
+from app.services.answer_keys import answer_key_cache_stats
+from app.services.autosave import autosave_buffer
+from app.utils.instrumentation import InstrumentedRoute
 
 router = APIRouter(
     prefix="/admin",
     tags=["admin"],
-    dependencies=[Depends(get_admin_user)]
+    dependencies=[Depends(get_admin_user)],
+    route_class=InstrumentedRoute
 )
 
-@router.get("/users", response_model=List[UserResponse])
-def list_all_users(
-    skip: int = 0, 
-    limit: int = 100, 
-    db: Session = Depends(get_db),
+@router.get("/users", response_model=Union[List[UserResponse], CursorPage[UserResponse]])
+async def list_all_users(
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_admin_user)
 ):
     """List all users - Admin only"""
-    users = db.query(User).offset(skip).limit(limit).all()
-    return users
+    users = (await db.scalars(page.paginate(select(User), User.id))).all()
+    return page.response(users)
 
 @router.get("/users/by-role/{role}", response_model=List[UserResponse])
-def list_users_by_role(
+async def list_users_by_role(
     role: UserRole,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_admin_user)
 ):
     """List users by role - Admin only"""
-    users = db.query(User).filter(User.role == role).all()
+    users = (await db.scalars(select(User).where(User.role == role))).all()
     return users
 
 @router.put("/users/{user_id}/toggle-active", response_model=UserResponse)
-def toggle_user_active(
+async def toggle_user_active(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_admin_user)
 ):
     """Toggle user active status - Admin only"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -53,19 +61,21 @@ def toggle_user_active(
         )
     
     user.is_active = not user.is_active
-    db.commit()
-    db.refresh(user)
+    user.token_version = (user.token_version or 0) + 1  # Revokes tokens issued before the change
+    await db.commit()
+    invalidate_principal(user.id)
+    await db.refresh(user)
     return user
 
 @router.put("/users/{user_id}/set-role", response_model=UserResponse)
-def set_user_role(
+async def set_user_role(
     user_id: int, 
     role: UserRole,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_admin_user)
 ):
     """Change user role - Admin only"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -77,6 +87,23 @@ def set_user_role(
         )
     
     user.role = role
-    db.commit()
-    db.refresh(user)
+    user.token_version = (user.token_version or 0) + 1  # Revokes tokens issued before the change
+    await db.commit()
+    invalidate_principal(user.id)
+    await db.refresh(user)
     return user
+
+@router.get("/cache-stats")
+async def get_cache_stats(current_user: User = Depends(get_admin_user)):
+    """In-process cache counters of this worker - Admin only"""
+    return {"answer_keys": answer_key_cache_stats()}
+
+@router.get("/db-pool")
+async def get_db_pool_stats(current_user: User = Depends(get_admin_user)):
+    """Connection pool counters of this worker, per engine - Admin only"""
+    return pool_stats()
+
+@router.get("/autosave")
+async def get_autosave_stats(current_user: User = Depends(get_admin_user)):
+    """Autosave write-behind buffer counters of this worker - Admin only"""
+    return autosave_buffer.stats()
@@ -2,24 +2,29 @@
 from datetime import timedelta, datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.utils import (
-    authenticate_user, create_access_token, get_password_hash, 
-    ACCESS_TOKEN_EXPIRE_MINUTES, get_current_active_user
+    authenticate_user_async, create_access_token,
+    ACCESS_TOKEN_EXPIRE_MINUTES, get_current_db_user, token_claims
 )
-from app.database.database import get_db
+from app.auth.passwords import hash_password_async
+from app.database.async_database import get_async_db
 from app.models.user import User, UserRole
 from app.schemas.user.user_schemas import Token, UserCreate, UserResponse
+from app.utils.instrumentation import InstrumentedRoute
 
 router = APIRouter(
     prefix="/auth",
-    tags=["authentication"]
+    tags=["authentication"],
+    route_class=InstrumentedRoute
 )
 
 @router.post("/token", response_model=Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = authenticate_user(db, form_data.username, form_data.password)
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    # bcrypt runs on the password pool so logins don't block other requests
+    user = await authenticate_user_async(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -28,14 +33,14 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
         )
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data=token_claims(user), expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     # Check if user with email already exists
-    db_user_email = db.query(User).filter(User.email == user.email).first()
+    db_user_email = await db.scalar(select(User).where(User.email == user.email))
     if db_user_email:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -43,22 +48,23 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Check if user with username already exists
-    db_user_username = db.query(User).filter(User.username == user.username).first()
+    db_user_username = await db.scalar(select(User).where(User.username == user.username))
     if db_user_username:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already taken"
         )
     
-    # Create new user
-    hashed_password = get_password_hash(user.password)
-    
+    # Hash on the password pool so registrations don't block other requests; only once the
+    # uniqueness checks passed, so duplicate registrations don't take pool slots
+    hashed_password = await hash_password_async(user.password)
+
     # Get role from request, default to faculty
     role = user.role if user.role else UserRole.FACULTY
     
     # For security, check if this is the first user in the system
     # If yes, make them an admin automatically
-    user_count = db.query(User).count()
+    user_count = await db.scalar(select(func.count(User.id)))
     if user_count == 0:
         role = UserRole.ADMIN
     
@@ -71,10 +77,12 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
         created_at=datetime.now(timezone.utc)  # Explicitly set UTC timestamp
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 @router.get("/users/me", response_model=UserResponse)
-def read_users_me(current_user: User = Depends(get_current_active_user)):
+async def read_users_me(current_user: User = Depends(get_current_db_user)):
+    if not current_user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
\ No newline at end of file
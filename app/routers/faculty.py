@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from app.database.database import get_db
+from app.database.async_database import get_async_db
 from app.models.user import User, UserRole
 from app.auth.rbac import get_user_with_roles
+from app.utils.instrumentation import InstrumentedRoute
 
 # Faculty, institution, and admins can access these endpoints
 faculty_users = get_user_with_roles([UserRole.FACULTY, UserRole.INSTITUTION, UserRole.ADMIN])
@@ -12,6 +13,7 @@ faculty_users = get_user_with_roles([UserRole.FACULTY, UserRole.INSTITUTION, Use
 router = APIRouter(
     prefix="/faculty",
     tags=["faculty"],
-    dependencies=[Depends(faculty_users)]
+    dependencies=[Depends(faculty_users)],
+    route_class=InstrumentedRoute
 )
 
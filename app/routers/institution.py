@@ -1,11 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Union
 
-from app.database.database import get_db
+from app.database.async_database import get_async_db
 from app.models.user import User, UserRole
 from app.schemas.user.user_schemas import UserResponse
+from app.schemas.common.pagination_schemas import CursorPage
+from app.services.pagination import PageParams, page_params
 from app.auth.rbac import get_user_with_roles
+from app.utils.instrumentation import InstrumentedRoute
 
 # Only institutions and admins can access these endpoints
 institution_users = get_user_with_roles([UserRole.INSTITUTION, UserRole.ADMIN])
@@ -13,19 +17,22 @@ institution_users = get_user_with_roles([UserRole.INSTITUTION, UserRole.ADMIN])
 router = APIRouter(
     prefix="/institution",
     tags=["institution"],
-    dependencies=[Depends(institution_users)]
+    dependencies=[Depends(institution_users)],
+    route_class=InstrumentedRoute
 )
 
-@router.get("/users", response_model=List[UserResponse])
-def list_faculty_students(
-    skip: int = 0, 
-    limit: int = 100, 
-    db: Session = Depends(get_db),
+@router.get("/users", response_model=Union[List[UserResponse], CursorPage[UserResponse]])
+async def list_faculty_students(
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(institution_users)
 ):
     """List faculty and student users (no institutions or admins) - Institution only"""
-    users = db.query(User).filter(
-        User.role.in_([UserRole.FACULTY, UserRole.STUDENT])
-    ).offset(skip).limit(limit).all()
-    return users
+    users = (await db.scalars(
+        page.paginate(
+            select(User).where(User.role.in_([UserRole.FACULTY, UserRole.STUDENT])),
+            User.id
+        )
+    )).all()
+    return page.response(users)
 
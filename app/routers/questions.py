@@ -1,29 +1,85 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from sqlalchemy import func, or_
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
+from sqlalchemy import Select, func, or_, select, update
 
-from app.database.database import get_db
+from app.database.async_database import get_async_db
 from app.models.user import User, UserRole
 from app.models.question import Question, Option
-from app.schemas.question.question_schemas import QuestionCreate, QuestionResponse, QuestionUpdate
+from app.models.test import Test, test_questions
+from app.schemas.question.question_schemas import QuestionCreate, QuestionImportResult, QuestionResponse, QuestionUpdate
 from app.schemas.question.option_schemas import OptionUpdate, OptionCreate
+from app.schemas.question.tag_schemas import TagFacet
+from app.schemas.common.pagination_schemas import CursorPage
 from app.auth.rbac import get_user_with_roles
+from app.services.answer_keys import invalidate_question, invalidate_test, question_test_ids
+from app.services.loaders import QUESTION_RESPONSE_LOADERS
+from app.services.pagination import PageParams, page_params
+from app.services.exports import (
+    ExportFormat, export_response, max_option_count, question_csv_header, question_csv_row,
+    question_export_statement, question_record
+)
+from app.services.question_import import (
+    IMPORT_CHUNK_SIZE, MAX_REPORTED_ERRORS, ImportFormat, import_format, import_questions, iter_lines, iter_records
+)
+from app.services.question_search import apply_question_search
+from app.services.tags import TagMatch, apply_tag_filter, parse_tag_filter, set_question_tags, tag_facets
+from app.utils.instrumentation import InstrumentedRoute
 
 router = APIRouter(
     prefix="/questions",
     tags=["questions"],
+    route_class=InstrumentedRoute
 )
 
 # Permissions
 get_faculty_or_admin = get_user_with_roles([UserRole.FACULTY, UserRole.ADMIN])
 get_student_or_above = get_user_with_roles([UserRole.STUDENT, UserRole.FACULTY, UserRole.INSTITUTION, UserRole.ADMIN])
 
+async def _get_question_with_options(db: AsyncSession, question_id: int) -> Optional[Question]:
+    """Load a question with its options, which QuestionResponse serializes"""
+    return await db.scalar(
+        select(Question)
+        .options(*QUESTION_RESPONSE_LOADERS)
+        .where(Question.id == question_id)
+        .execution_options(populate_existing=True)
+    )
+
+def _filter_questions(
+    query: Select,
+    current_user: User,
+    subject: Optional[str],
+    difficulty: Optional[str],
+    tags: List[str],
+    tag_match: TagMatch
+) -> Select:
+    """Restrict a select over questions to those the user may see and the filters match"""
+    # Handle permissions:
+    # - Admin can see all questions
+    # - Faculty can see only their own questions AND public questions from other faculty
+    if current_user.role == UserRole.FACULTY:
+        query = query.where(
+            or_(
+                Question.created_by == current_user.id,  # Their own questions (public or private)
+                Question.is_public == True  # Public questions from anyone
+            )
+        )
+    
+    # Apply filters
+    if subject:
+        query = query.where(Question.subject == subject)
+    if difficulty:
+        query = query.where(Question.difficulty_level == difficulty)
+    if tags:
+        query = apply_tag_filter(query, tags, tag_match)
+    return query
+
 @router.post("/", response_model=QuestionResponse, status_code=status.HTTP_201_CREATED)
-def create_question(
+async def create_question(
     question_data: QuestionCreate,
     current_user: User = Depends(get_faculty_or_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new question with options (faculty or admin only)"""
     # Create question
@@ -32,7 +88,8 @@ def create_question(
         created_by=current_user.id
     )
     db.add(new_question)
-    db.flush()  # Get ID without committing
+    await db.flush()  # Get ID without committing
+    await db.run_sync(set_question_tags, new_question.id, new_question.tags)
     
     # Create options
     for option_data in question_data.options:
@@ -42,61 +99,136 @@ def create_question(
         )
         db.add(new_option)
     
-    db.commit()
-    db.refresh(new_question)
-    return new_question
+    await db.commit()
+    return await _get_question_with_options(db, new_question.id)
+
+@router.post("/bulk", response_model=QuestionImportResult)
+async def import_questions_bulk(
+    request: Request,
+    format: Optional[ImportFormat] = Query(None, description="Upload format; taken from Content-Type when omitted"),
+    current_user: User = Depends(get_faculty_or_admin),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Import questions from an NDJSON or CSV upload (faculty or admin only).
+    
+    - The body is parsed as it streams in, one record at a time
+    - Every record is validated like a single question; invalid ones are reported and skipped
+    - Valid questions are inserted and committed in chunks (see app.services.question_import)
+    """
+    format = format or import_format(request.headers.get("content-type"))
+    if format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Upload application/x-ndjson or text/csv, or pass format=ndjson|csv"
+        )
+    imported, failed, errors = 0, 0, []
+    
+    async def flush(records):
+        nonlocal imported, failed
+        count, chunk_errors = await db.run_sync(import_questions, records, current_user.id)
+        imported += count
+        failed += len(chunk_errors)
+        errors.extend(chunk_errors[:MAX_REPORTED_ERRORS - len(errors)])
+    
+    records = []
+    async for record in iter_records(iter_lines(request.stream()), format):
+        records.append(record)
+        if len(records) >= IMPORT_CHUNK_SIZE:
+            await flush(records)
+            records = []
+    if records:
+        await flush(records)
+    
+    return QuestionImportResult(imported=imported, failed=failed, errors=errors)
 
-@router.get("/", response_model=List[QuestionResponse])
-def get_questions(
-    skip: int = 0, 
-    limit: int = 100,
+@router.get("/", response_model=Union[List[QuestionResponse], CursorPage[QuestionResponse]])
+async def get_questions(
     subject: Optional[str] = None,
     difficulty: Optional[str] = None,
     search: Optional[str] = None,
+    tags: Optional[List[str]] = Query(None, description="Tag names, repeated or comma separated"),
+    tag_match: TagMatch = TagMatch.ALL,
+    page: PageParams = Depends(page_params),
     current_user: User = Depends(get_faculty_or_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get questions with filtering and pagination (faculty or admin only)"""
-    # Base query
-    query = db.query(Question)
-    
-    # Handle permissions:
-    # - Admin can see all questions
-    # - Faculty can see only their own questions AND public questions from other faculty
-    if current_user.role == UserRole.FACULTY:
-        query = query.filter(
-            or_(
-                Question.created_by == current_user.id,  # Their own questions (public or private)
-                Question.is_public == True  # Public questions from anyone
-            )
-        )
-    
-    # Apply filters
-    if subject:
-        query = query.filter(Question.subject == subject)
-    if difficulty:
-        query = query.filter(Question.difficulty_level == difficulty)
+    query = _filter_questions(
+        select(Question).options(*QUESTION_RESPONSE_LOADERS),
+        current_user, subject, difficulty, parse_tag_filter(tags), tag_match
+    )
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                Question.question_text.ilike(search_term),
-                Question.tags.ilike(search_term)
-            )
-        )
+        # Full-text index match, ordered by relevance
+        query = apply_question_search(query, search, db.get_bind().dialect.name)
     
     # Get questions with pagination
-    questions = query.offset(skip).limit(limit).all()
-    return questions
+    questions = (await db.scalars(page.paginate(query, Question.id))).all()
+    return page.response(questions)
+
+@router.get("/tags/facets", response_model=List[TagFacet])
+async def get_tag_facets(
+    limit: int = 50,
+    subject: Optional[str] = None,
+    difficulty: Optional[str] = None,
+    search: Optional[str] = None,
+    tags: Optional[List[str]] = Query(None, description="Tag names, repeated or comma separated"),
+    tag_match: TagMatch = TagMatch.ALL,
+    current_user: User = Depends(get_faculty_or_admin),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Count the questions per tag among the questions matching the filters (faculty or admin only)"""
+    question_ids = _filter_questions(
+        select(Question.id), current_user, subject, difficulty, parse_tag_filter(tags), tag_match
+    )
+    if search:
+        question_ids = apply_question_search(question_ids, search, db.get_bind().dialect.name)
+    
+    facets = await db.execute(tag_facets(question_ids, limit))
+    return [{"tag": tag, "count": count} for tag, count in facets.all()]
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_questions(
+    format: ExportFormat = ExportFormat.NDJSON,
+    gzip: bool = Query(False, description="Compress the download with gzip"),
+    subject: Optional[str] = None,
+    difficulty: Optional[str] = None,
+    tags: Optional[List[str]] = Query(None, description="Tag names, repeated or comma separated"),
+    tag_match: TagMatch = TagMatch.ALL,
+    current_user: User = Depends(get_faculty_or_admin),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Stream the questions matching the filters with their options (faculty or admin only).
+    
+    Records use the `/questions/bulk` import format, so the download can be imported again.
+    """
+    tag_names = parse_tag_filter(tags)
+    option_count = 0
+    if format == ExportFormat.CSV:
+        # The header has a column per option of the question with the most
+        option_count = await db.scalar(max_option_count(
+            _filter_questions(select(Question.id), current_user, subject, difficulty, tag_names, tag_match)
+        ))
+    return export_response(
+        _filter_questions(question_export_statement(), current_user, subject, difficulty, tag_names, tag_match),
+        key=lambda row: row.id,
+        to_record=question_record,
+        format=format,
+        filename="questions",
+        gzip=gzip,
+        csv_header=question_csv_header(option_count),
+        csv_rows=lambda record: [question_csv_row(record, option_count)]
+    )
 
 @router.get("/{question_id}", response_model=QuestionResponse)
-def get_question(
+async def get_question(
     question_id: int,
     current_user: User = Depends(get_faculty_or_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific question by ID (faculty or admin only)"""
-    question = db.query(Question).filter(Question.id == question_id).first()
+    question = await _get_question_with_options(db, question_id)
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
     
@@ -109,14 +241,14 @@ def get_question(
     return question
 
 @router.put("/{question_id}", response_model=QuestionResponse)
-def update_question(
+async def update_question(
     question_id: int,
     question_data: QuestionUpdate,
     current_user: User = Depends(get_faculty_or_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a question (faculty owner or admin only)"""
-    question = db.query(Question).filter(Question.id == question_id).first()
+    question = await db.get(Question, question_id)
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
     
@@ -125,21 +257,24 @@ def update_question(
         raise HTTPException(status_code=403, detail="You don't have permission to update this question")
     
     # Update question fields
-    for key, value in question_data.model_dump(exclude_unset=True).items():
+    changes = question_data.model_dump(exclude_unset=True)
+    for key, value in changes.items():
         setattr(question, key, value)
+    if "tags" in changes:
+        await db.run_sync(set_question_tags, question_id, question.tags)
     
-    db.commit()
-    db.refresh(question)
-    return question
+    await db.commit()
+    await db.run_sync(invalidate_question, question_id)
+    return await _get_question_with_options(db, question_id)
 
 @router.delete("/{question_id}", status_code=status.HTTP_200_OK)
-def delete_question(
+async def delete_question(
     question_id: int,
     current_user: User = Depends(get_faculty_or_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a question and its options (faculty owner or admin only)"""
-    question = db.query(Question).filter(Question.id == question_id).first()
+    question = await db.get(Question, question_id)
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
     
@@ -147,20 +282,34 @@ def delete_question(
     if current_user.role != UserRole.ADMIN and question.created_by != current_user.id:
         raise HTTPException(status_code=403, detail="You don't have permission to delete this question")
     
-    db.delete(question)  # This should cascade to options
-    db.commit()
+    # Look the tests up first: the delete removes the question's test_questions rows
+    test_ids = await db.run_sync(question_test_ids, question_id)
+    if test_ids:
+        # The tests lose the question's marks, as when it is removed from them
+        await db.execute(
+            update(Test)
+            .where(Test.id.in_(test_ids))
+            .values(total_marks=select(func.coalesce(func.sum(test_questions.c.marks), 0)).where(
+                test_questions.c.test_id == Test.id, test_questions.c.question_id != question_id
+            ).scalar_subquery())
+            .execution_options(synchronize_session=False)
+        )
+    await db.delete(question)  # This should cascade to options
+    await db.commit()
+    for test_id in test_ids:
+        invalidate_test(test_id)
     
     return {"status": "success", "message": "Question deleted successfully"}
 
 @router.post("/{question_id}/options", status_code=status.HTTP_201_CREATED)
-def add_option(
+async def add_option(
     question_id: int,
     option_data: OptionCreate,
     current_user: User = Depends(get_faculty_or_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Add a new option to a question (faculty owner or admin only)"""
-    question = db.query(Question).filter(Question.id == question_id).first()
+    question = await db.get(Question, question_id)
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
     
@@ -174,20 +323,21 @@ def add_option(
         question_id=question_id
     )
     db.add(new_option)
-    db.commit()
+    await db.commit()
+    await db.run_sync(invalidate_question, question_id)
     
     return {"status": "success", "message": "Option added successfully"}
 
 @router.put("/{question_id}/options/{option_id}")
-def update_option(
+async def update_option(
     question_id: int,
     option_id: int,
     option_data: OptionUpdate,
     current_user: User = Depends(get_faculty_or_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update an option (faculty owner or admin only)"""
-    question = db.query(Question).filter(Question.id == question_id).first()
+    question = await db.get(Question, question_id)
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
     
@@ -195,7 +345,7 @@ def update_option(
     if current_user.role != UserRole.ADMIN and question.created_by != current_user.id:
         raise HTTPException(status_code=403, detail="You don't have permission to update this question")
     
-    option = db.query(Option).filter(Option.id == option_id, Option.question_id == question_id).first()
+    option = await db.scalar(select(Option).where(Option.id == option_id, Option.question_id == question_id))
     if not option:
         raise HTTPException(status_code=404, detail="Option not found")
     
@@ -203,19 +353,20 @@ def update_option(
     for key, value in option_data.model_dump(exclude_unset=True).items():
         setattr(option, key, value)
     
-    db.commit()
+    await db.commit()
+    await db.run_sync(invalidate_question, question_id)
     
     return {"status": "success", "message": "Option updated successfully"}
 
 @router.delete("/{question_id}/options/{option_id}", status_code=status.HTTP_200_OK)
-def delete_option(
+async def delete_option(
     question_id: int,
     option_id: int,
     current_user: User = Depends(get_faculty_or_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete an option (faculty owner or admin only)"""
-    question = db.query(Question).filter(Question.id == question_id).first()
+    question = await db.get(Question, question_id)
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
     
@@ -223,19 +374,20 @@ def delete_option(
     if current_user.role != UserRole.ADMIN and question.created_by != current_user.id:
         raise HTTPException(status_code=403, detail="You don't have permission to update this question")
     
-    option = db.query(Option).filter(Option.id == option_id, Option.question_id == question_id).first()
+    option = await db.scalar(select(Option).where(Option.id == option_id, Option.question_id == question_id))
     if not option:
         raise HTTPException(status_code=404, detail="Option not found")
     
     # Ensure question has at least 2 options after deletion
-    option_count = db.query(func.count(Option.id)).filter(Option.question_id == question_id).scalar()
+    option_count = await db.scalar(select(func.count(Option.id)).where(Option.question_id == question_id))
     if option_count <= 2:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot delete option: questions must have at least 2 options"
         )
     
-    db.delete(option)
-    db.commit()
+    await db.delete(option)
+    await db.commit()
+    await db.run_sync(invalidate_question, question_id)
     
     return {"status": "success", "message": "Option deleted successfully"}
\ No newline at end of file
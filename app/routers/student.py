@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
 from typing import List
 
-from app.database.database import get_db
+from app.database.async_database import get_async_db
 from app.models.user import User, UserRole
 from app.auth.rbac import get_user_with_roles
-from app.models.session.test_session import TestSession
+from app.models.session.test_session import OptionOrderMode, TestSession
 from app.models.session.user_response import UserResponse
 from app.models.test import Test
 from app.models.question.question import Question
@@ -15,6 +17,13 @@ from app.schemas.session.session_schemas import (
     TestSessionResponse, 
     TestSessionCreate
 )
+from app.services import autosave
+from app.services.analytics import record_attempt
+from app.services.grading import grade_test_session
+from app.services.responses import upsert_responses
+from app.services.results import results_summary, store_results
+from app.services.option_orders import create_option_orders
+from app.utils.instrumentation import InstrumentedRoute
 
 from datetime import datetime, timedelta
 import random
@@ -25,13 +34,14 @@ all_users = get_user_with_roles([UserRole.STUDENT, UserRole.FACULTY, UserRole.IN
 router = APIRouter(
     prefix="/student",
     tags=["student"],
-    dependencies=[Depends(all_users)]
+    dependencies=[Depends(all_users)],
+    route_class=InstrumentedRoute
 )
 
 @router.get("/available-tests", response_model=List[TestSessionResponse])
-def get_available_tests(
+async def get_available_tests(
     current_user: User = Depends(get_user_with_roles([UserRole.STUDENT])),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get available tests for the student
@@ -41,22 +51,21 @@ def get_available_tests(
     # Query tests that:
     # 1. Are active
     # 2. Have not been taken by the current student
-    available_tests = (
-        db.query(Test)
-        .filter(
+    available_tests = (await db.scalars(
+        select(Test)
+        .where(
             Test.is_active == True,
             ~Test.test_sessions.any(TestSession.user_id == current_user.id)
         )
-        .all()
-    )
+    )).all()
     
     return available_tests
 
 @router.post("/start-test/{test_id}", response_model=TestSessionResponse)
-def start_test(
+async def start_test(
     test_id: int,
     current_user: User = Depends(get_user_with_roles([UserRole.STUDENT])),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Start a new test session
@@ -64,16 +73,16 @@ def start_test(
     - Create test session with randomized option order
     """
     # Fetch the test
-    test = db.query(Test).filter(Test.id == test_id, Test.is_active == True).first()
+    test = await db.scalar(select(Test).where(Test.id == test_id, Test.is_active == True))
     
     if not test:
         raise HTTPException(status_code=404, detail="Test not found or inactive")
     
     # Check if student has already taken this test
-    existing_session = db.query(TestSession).filter(
+    existing_session = await db.scalar(select(TestSession).where(
         TestSession.test_id == test_id, 
         TestSession.user_id == current_user.id
-    ).first()
+    ))
     
     if existing_session:
         raise HTTPException(status_code=400, detail="Test already taken")
@@ -83,36 +92,32 @@ def start_test(
     test_session = TestSession(
         user_id=current_user.id,
         test_id=test_id,
-        shuffle_seed=shuffle_seed
+        shuffle_seed=shuffle_seed,
+        # Seeded orders are derived counting from 0, so this endpoint's 1-based orders are stored
+        option_order_mode=OptionOrderMode.STORED
     )
     db.add(test_session)
+    try:
+        await db.flush()
+    except IntegrityError:
+        # A concurrent request started the session first (one active session per user and test)
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Test already taken")
     
-    # Create shuffled option orders for each question
-    random.seed(shuffle_seed)
-    for question in test.questions:
-        option_ids = [option.id for option in question.options]
-        random.shuffle(option_ids)
-        
-        for order, option_id in enumerate(option_ids, 1):
-            option_order = OptionOrder(
-                test_session_id=test_session.id,
-                question_id=question.id,
-                option_id=option_id,
-                display_order=order
-            )
-            db.add(option_order)
+    # Create shuffled option orders for every question, numbered from 1
+    await db.run_sync(create_option_orders, test_session, 1)
     
-    db.commit()
-    db.refresh(test_session)
+    await db.commit()
+    await db.refresh(test_session)
     
     return test_session
 
 @router.post("/submit-test/{test_session_id}")
-def submit_test(
+async def submit_test(
     test_session_id: int,
     submission: TestSubmission,
     current_user: User = Depends(get_user_with_roles([UserRole.STUDENT])),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Submit test answers and calculate results
@@ -121,10 +126,10 @@ def submit_test(
     - Calculate score
     """
     # Fetch the test session
-    test_session = db.query(TestSession).filter(
+    test_session = await db.scalar(select(TestSession).where(
         TestSession.id == test_session_id, 
         TestSession.user_id == current_user.id
-    ).first()
+    ))
     
     if not test_session:
         raise HTTPException(status_code=404, detail="Test session not found")
@@ -133,83 +138,55 @@ def submit_test(
         raise HTTPException(status_code=400, detail="Test already submitted")
     
     # Calculate test duration
-    test = test_session.test
+    test = await db.get(Test, test_session.test_id)
     max_duration = timedelta(minutes=test.duration_minutes)
     if datetime.utcnow() - test_session.started_at > max_duration:
         raise HTTPException(status_code=400, detail="Test time exceeded")
     
-    # Store user responses and calculate score
-    correct_answers = 0
-    total_questions = len(test.questions)
-    
-    for response in submission.responses:
-        # Find the question
-        question = db.query(Question).filter(Question.id == response.question_id).first()
-        
-        # Create user response
-        user_response = UserResponse(
-            test_session_id=test_session.id,
-            question_id=response.question_id,
-            selected_option_id=response.selected_option_id
-        )
-        db.add(user_response)
-        
-        # Check if answer is correct
-        if question.is_answer_correct(response.selected_option_id):
-            correct_answers += 1
-    
-    # Calculate score
-    score = (correct_answers / total_questions) * test.total_marks
-    
-    # Update test session
-    test_session.completed_at = datetime.utcnow()
-    test_session.score = score
-    
-    db.commit()
-    
-    # Prepare results summary
-    results = TestResultsSummary(
-        test_id=test.id,
-        test_title=test.title,
-        total_marks=test.total_marks,
-        score=score,
-        percentage=(score / test.total_marks) * 100,
-        completed_at=test_session.completed_at,
-        duration_minutes=test.duration_minutes,
-        question_count=total_questions,
-        correct_answers=correct_answers
-    )
+    try:
+        async with autosave.taken_rows(test_session.id, close=True) as buffered:
+            # Complete the session only if no concurrent submit did: only one of them grades it and counts the attempt
+            claimed = await db.execute(
+                update(TestSession)
+                .where(TestSession.id == test_session.id, TestSession.completed_at.is_(None))
+                .values(completed_at=datetime.utcnow())
+            )
+            if not claimed.rowcount:
+                await db.rollback()
+                raise autosave.SessionClosed()
+            
+            # Write answers still in the autosave buffer, then grade every response against the test's answer key in one pass
+            await db.run_sync(upsert_responses, test_session.id, buffered)
+            result = await db.run_sync(grade_test_session, test_session, submission.responses)
+            
+            # Keep the results for the result pages and add them to the test analytics
+            store_results(test_session, test.total_marks, result)
+            await db.run_sync(record_attempt, test_session, result)
+            
+            await db.commit()
+    except autosave.SessionClosed:
+        # The concurrent submit that completed it keeps the session closed to saves
+        raise HTTPException(status_code=400, detail="Test already submitted")
     
-    return results
+    return results_summary(test_session, test)
 
 @router.get("/test-results", response_model=List[TestResultsSummary])
-def get_test_results(
+async def get_test_results(
     current_user: User = Depends(get_user_with_roles([UserRole.STUDENT])),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Retrieve all test results for the student
     """
-    # Fetch completed test sessions
-    test_sessions = db.query(TestSession).filter(
-        TestSession.user_id == current_user.id,
-        TestSession.completed_at.isnot(None)
-    ).all()
-    
-    # Convert to results summary
-    results = []
-    for session in test_sessions:
-        test = session.test
-        results.append(TestResultsSummary(
-            test_id=test.id,
-            test_title=test.title,
-            total_marks=test.total_marks,
-            score=session.score,
-            percentage=(session.score / test.total_marks) * 100,
-            completed_at=session.completed_at,
-            duration_minutes=test.duration_minutes,
-            question_count=len(test.questions),
-            correct_answers=int((session.score / test.total_marks) * len(test.questions))
-        ))
+    # Completed sessions with their tests and stored results, in one query
+    rows = (await db.execute(
+        select(TestSession, Test)
+        .join(Test, Test.id == TestSession.test_id)
+        .where(
+            TestSession.user_id == current_user.id,
+            TestSession.completed_at.isnot(None)
+        )
+        .order_by(TestSession.completed_at)
+    )).all()
     
-    return results
\ No newline at end of file
+    return [results_summary(test_session, test) for test_session, test in rows]
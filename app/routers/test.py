@@ -1,33 +1,57 @@
 # app/routers/tests.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Union
 from datetime import datetime
 
-from app.database.database import get_db
+from app.database.async_database import get_async_db
 from app.models.user import User, UserRole
-from app.models.test import Test
+from app.models.test import Test, test_questions
 from app.schemas.test.test_schemas import (
     TestCreate, TestUpdate, TestResponse
 )
+from app.schemas.test.analytics_schemas import TestAnalytics, QuestionAnalytics
+from app.schemas.common.pagination_schemas import CursorPage
 from app.auth.rbac import get_user_with_roles
+from app.services.analytics import load_test_aggregates, question_statistics, score_statistics
+from app.services.answer_keys import get_answer_key, invalidate_test
+from app.services.exports import (
+    RESPONSE_FIELDS, SESSION_FIELDS, ExportFormat, export_response, results_export_statement,
+    session_csv_rows, session_record
+)
+from app.services.pagination import PageParams, page_params
+from app.utils.instrumentation import InstrumentedRoute
 
 router = APIRouter(
     prefix="/tests",
     tags=["tests"],
+    route_class=InstrumentedRoute
 )
 
 # Permissions
 get_faculty_or_admin = get_user_with_roles([UserRole.FACULTY, UserRole.ADMIN])
 get_student_or_above = get_user_with_roles([UserRole.STUDENT, UserRole.FACULTY, UserRole.INSTITUTION, UserRole.ADMIN])
 
+async def _question_counts(db: AsyncSession, test_ids: List[int]) -> Dict[int, int]:
+    """Number of questions of each test, counted in one GROUP BY over test_questions"""
+    if not test_ids:
+        return {}
+    rows = await db.execute(
+        select(test_questions.c.test_id, func.count(test_questions.c.question_id))
+        .where(test_questions.c.test_id.in_(test_ids))
+        .group_by(test_questions.c.test_id)
+    )
+    return dict(rows.all())
+
 # Test management endpoints (for faculty and admins)
 @router.post("/", response_model=TestResponse, status_code=status.HTTP_201_CREATED)
-def create_test(
+async def create_test(
     test_data: TestCreate,
     current_user: User = Depends(get_faculty_or_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new test (faculty or admin only)"""
     new_test = Test(
@@ -35,48 +59,48 @@ def create_test(
         created_by=current_user.id
     )
     db.add(new_test)
-    db.commit()
-    db.refresh(new_test)
+    await db.commit()
+    await db.refresh(new_test)
     
     # Add question_count to response
     setattr(new_test, 'question_count', 0)
     
     return new_test
 
-@router.get("/", response_model=List[TestResponse])
-def get_tests(
-    skip: int = 0, 
-    limit: int = 100,
+@router.get("/", response_model=Union[List[TestResponse], CursorPage[TestResponse]])
+async def get_tests(
+    page: PageParams = Depends(page_params),
     current_user: User = Depends(get_student_or_above),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all tests with pagination"""
     # For students, show only active tests
+    query = select(Test)
     if current_user.role == UserRole.STUDENT:
-        tests = db.query(Test).filter(Test.is_active == True).offset(skip).limit(limit).all()
+        query = query.where(Test.is_active == True)
     # For faculty, show only their own tests and active tests
     elif current_user.role == UserRole.FACULTY:
-        tests = db.query(Test).filter(
+        query = query.where(
             (Test.created_by == current_user.id) | (Test.is_active == True)
-        ).offset(skip).limit(limit).all()
+        )
     # For admin and institution, show all tests
-    else:
-        tests = db.query(Test).offset(skip).limit(limit).all()
+    tests = (await db.scalars(page.paginate(query, Test.id))).all()
     
-    # Add question count to each test using the relationship
+    # Add question count to each test, counted for the whole page at once
+    question_counts = await _question_counts(db, [test.id for test in tests])
     for test in tests:
-        setattr(test, 'question_count', len(test.questions))
+        setattr(test, 'question_count', question_counts.get(test.id, 0))
     
-    return tests
+    return page.response(tests)
 
 @router.get("/{test_id}", response_model=TestResponse)
-def get_test(
+async def get_test(
     test_id: int,
     current_user: User = Depends(get_student_or_above),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific test by ID"""
-    test = db.query(Test).filter(Test.id == test_id).first()
+    test = await db.get(Test, test_id)
     if not test:
         raise HTTPException(status_code=404, detail="Test not found")
     
@@ -87,20 +111,79 @@ def get_test(
     if current_user.role == UserRole.FACULTY and not test.is_active and test.created_by != current_user.id:
         raise HTTPException(status_code=403, detail="You don't have permission to view this test")
     
-    # Add question count using the relationship
-    setattr(test, 'question_count', len(test.questions))
+    # Add question count without loading the questions
+    question_counts = await _question_counts(db, [test.id])
+    setattr(test, 'question_count', question_counts.get(test.id, 0))
     
     return test
 
+async def _analytics_test(db: AsyncSession, test_id: int, current_user: User, what: str = "analytics") -> Test:
+    """The test whose analytics (or results) the user asked for, if they own it or are an admin"""
+    test = await db.get(Test, test_id)
+    if not test:
+        raise HTTPException(status_code=404, detail="Test not found")
+    if current_user.role != UserRole.ADMIN and test.created_by != current_user.id:
+        raise HTTPException(status_code=403, detail=f"You don't have permission to view {what} of this test")
+    return test
+
+@router.get("/{test_id}/analytics", response_model=TestAnalytics)
+async def get_test_analytics(
+    test_id: int,
+    current_user: User = Depends(get_faculty_or_admin),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Score statistics and distribution of a test's graded attempts (faculty owner or admin only)"""
+    await _analytics_test(db, test_id, current_user)
+    aggregates = await db.run_sync(load_test_aggregates, test_id)
+    return score_statistics(aggregates)
+
+@router.get("/{test_id}/analytics/questions", response_model=List[QuestionAnalytics])
+async def get_question_analytics(
+    test_id: int,
+    current_user: User = Depends(get_faculty_or_admin),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Difficulty, discrimination and option pick rates of a test's questions (faculty owner or admin only)"""
+    await _analytics_test(db, test_id, current_user)
+    aggregates = await db.run_sync(load_test_aggregates, test_id)
+    answer_key = await db.run_sync(get_answer_key, test_id)
+    return question_statistics(aggregates, answer_key)
+
+@router.get("/{test_id}/results/export", response_class=StreamingResponse)
+async def export_test_results(
+    test_id: int,
+    format: ExportFormat = ExportFormat.NDJSON,
+    gzip: bool = Query(False, description="Compress the download with gzip"),
+    current_user: User = Depends(get_faculty_or_admin),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Stream every completed session of a test with its graded responses (faculty owner or admin only).
+    
+    - NDJSON: one object per session, its responses nested
+    - CSV: one row per response, the session columns repeated
+    """
+    await _analytics_test(db, test_id, current_user, "results")
+    return export_response(
+        results_export_statement(test_id),
+        key=lambda row: row.session_id,
+        to_record=session_record,
+        format=format,
+        filename=f"test-{test_id}-results",
+        gzip=gzip,
+        csv_header=[*SESSION_FIELDS, *RESPONSE_FIELDS],
+        csv_rows=session_csv_rows
+    )
+
 @router.put("/{test_id}", response_model=TestResponse)
-def update_test(
+async def update_test(
     test_id: int,
     test_data: TestUpdate,
     current_user: User = Depends(get_faculty_or_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a test (faculty owner or admin only)"""
-    test = db.query(Test).filter(Test.id == test_id).first()
+    test = await db.get(Test, test_id)
     if not test:
         raise HTTPException(status_code=404, detail="Test not found")
     
@@ -112,22 +195,23 @@ def update_test(
     for key, value in test_data.model_dump(exclude_unset=True).items():
         setattr(test, key, value)
     
-    db.commit()
-    db.refresh(test)
+    await db.commit()
+    await db.refresh(test)
     
-    # Add question count using the relationship
-    setattr(test, 'question_count', len(test.questions))
+    # Add question count without loading the questions
+    question_counts = await _question_counts(db, [test.id])
+    setattr(test, 'question_count', question_counts.get(test.id, 0))
     
     return test
 
 @router.delete("/{test_id}")
-def delete_test(
+async def delete_test(
     test_id: int,
     current_user: User = Depends(get_faculty_or_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a test (faculty owner or admin only)"""
-    test = db.query(Test).filter(Test.id == test_id).first()
+    test = await db.get(Test, test_id)
     if not test:
         raise HTTPException(status_code=404, detail="Test not found")
     
@@ -135,7 +219,8 @@ def delete_test(
     if current_user.role != UserRole.ADMIN and test.created_by != current_user.id:
         raise HTTPException(status_code=403, detail="You don't have permission to delete this test")
     
-    db.delete(test)
-    db.commit()
+    await db.delete(test)
+    await db.commit()
+    invalidate_test(test_id)
     
     return {"detail": "Test deleted successfully"}
\ No newline at end of file
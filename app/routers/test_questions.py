@@ -1,35 +1,39 @@
 # app/routers/test_questions.py
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from sqlalchemy import select, insert, update, delete
 
-from app.database.database import get_db
+from app.database.async_database import get_async_db
 from app.models.user import User, UserRole
 from app.models.test import Test, test_questions
 from app.models.question import Question
 from app.schemas.test.test_schemas import TestQuestionAdd, TestQuestionUpdate, TestQuestionResponse, QuestionResponse
 from app.auth.rbac import get_user_with_roles
+from app.services.answer_keys import invalidate_test
+from app.services.loaders import QUESTION_RESPONSE_LOADERS
+from app.utils.instrumentation import InstrumentedRoute
 
 router = APIRouter(
     prefix="/tests/{test_id}/questions",
     tags=["test-questions"],
+    route_class=InstrumentedRoute
 )
 
 # Permissions
 get_faculty_or_admin = get_user_with_roles([UserRole.FACULTY, UserRole.ADMIN])
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
-def add_question_to_test(
+async def add_question_to_test(
     test_id: int,
     question_data: TestQuestionAdd,
     current_user: User = Depends(get_faculty_or_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Add a question to a test (faculty owner or admin only)"""
     # Verify the test exists
-    test = db.query(Test).filter(Test.id == test_id).first()
+    test = await db.get(Test, test_id)
     if not test:
         raise HTTPException(status_code=404, detail="Test not found")
     
@@ -38,7 +42,7 @@ def add_question_to_test(
         raise HTTPException(status_code=403, detail="You don't have permission to update this test")
     
     # Verify the question exists
-    question = db.query(Question).filter(Question.id == question_data.question_id).first()
+    question = await db.get(Question, question_data.question_id)
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
     
@@ -47,10 +51,10 @@ def add_question_to_test(
         raise HTTPException(status_code=403, detail="You don't have permission to use this question")
     
     # Check if question is already in the test
-    existing = db.query(test_questions).filter(
+    existing = (await db.execute(select(test_questions).where(
         test_questions.c.test_id == test_id,
         test_questions.c.question_id == question_data.question_id
-    ).first()
+    ))).first()
     
     if existing:
         raise HTTPException(status_code=400, detail="Question is already in this test")
@@ -58,11 +62,11 @@ def add_question_to_test(
     # Determine question order if not provided
     if not question_data.question_order:
         # Get the highest current order
-        max_order = db.query(test_questions.c.question_order).filter(
+        max_order = (await db.execute(select(test_questions.c.question_order).where(
             test_questions.c.test_id == test_id
         ).order_by(
             test_questions.c.question_order.desc()
-        ).first()
+        ))).first()
         
         if max_order:
             question_order = max_order[0] + 1
@@ -78,27 +82,28 @@ def add_question_to_test(
         question_order=question_order,
         marks=question_data.marks
     )
-    db.execute(stmt)
+    await db.execute(stmt)
     
     # Update test total marks
-    total_marks = db.query(test_questions.c.marks).filter(
+    total_marks = (await db.execute(select(test_questions.c.marks).where(
         test_questions.c.test_id == test_id
-    ).all()
+    ))).all()
     test.total_marks = sum(mark[0] for mark in total_marks)
     
-    db.commit()
+    await db.commit()
+    invalidate_test(test_id)
     
     return {"status": "success", "message": "Question added to test"}
 
 @router.get("/", response_model=List[TestQuestionResponse])
-def get_test_questions(
+async def get_test_questions(
     test_id: int,
     current_user: User = Depends(get_faculty_or_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all questions in a test (faculty owner or admin only)"""
     # Verify the test exists
-    test = db.query(Test).filter(Test.id == test_id).first()
+    test = await db.get(Test, test_id)
     if not test:
         raise HTTPException(status_code=404, detail="Test not found")
     
@@ -107,15 +112,17 @@ def get_test_questions(
         raise HTTPException(status_code=403, detail="You don't have permission to view this test's questions")
     
     # Get questions with their test metadata
-    questions = db.query(
+    questions = (await db.execute(select(
         Question, test_questions.c.question_order, test_questions.c.marks
     ).join(
         test_questions, Question.id == test_questions.c.question_id
-    ).filter(
+    ).options(
+        *QUESTION_RESPONSE_LOADERS
+    ).where(
         test_questions.c.test_id == test_id
     ).order_by(
         test_questions.c.question_order
-    ).all()
+    ))).all()
     
     # Format response
     result = []
@@ -130,16 +137,16 @@ def get_test_questions(
     return result
 
 @router.put("/{question_id}", status_code=status.HTTP_200_OK)
-def update_test_question(
+async def update_test_question(
     test_id: int,
     question_id: int,
     update_data: TestQuestionUpdate,
     current_user: User = Depends(get_faculty_or_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a question in a test (faculty owner or admin only)"""
     # Verify the test exists
-    test = db.query(Test).filter(Test.id == test_id).first()
+    test = await db.get(Test, test_id)
     if not test:
         raise HTTPException(status_code=404, detail="Test not found")
     
@@ -148,10 +155,10 @@ def update_test_question(
         raise HTTPException(status_code=403, detail="You don't have permission to update this test")
     
     # Check if the question is in the test
-    test_question = db.query(test_questions).filter(
+    test_question = (await db.execute(select(test_questions).where(
         test_questions.c.test_id == test_id,
         test_questions.c.question_id == question_id
-    ).first()
+    ))).first()
     
     if not test_question:
         raise HTTPException(status_code=404, detail="Question not found in this test")
@@ -168,29 +175,30 @@ def update_test_question(
             test_questions.c.test_id == test_id,
             test_questions.c.question_id == question_id
         ).values(**update_values)
-        db.execute(stmt)
+        await db.execute(stmt)
         
         # Update test total marks if marks were changed
         if "marks" in update_values:
-            total_marks = db.query(test_questions.c.marks).filter(
+            total_marks = (await db.execute(select(test_questions.c.marks).where(
                 test_questions.c.test_id == test_id
-            ).all()
+            ))).all()
             test.total_marks = sum(mark[0] for mark in total_marks)
         
-        db.commit()
+        await db.commit()
+        invalidate_test(test_id)
     
     return {"status": "success", "message": "Test question updated"}
 
 @router.delete("/{question_id}", status_code=status.HTTP_204_NO_CONTENT)
-def remove_question_from_test(
+async def remove_question_from_test(
     test_id: int,
     question_id: int,
     current_user: User = Depends(get_faculty_or_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Remove a question from a test (faculty owner or admin only)"""
     # Verify the test exists
-    test = db.query(Test).filter(Test.id == test_id).first()
+    test = await db.get(Test, test_id)
     if not test:
         raise HTTPException(status_code=404, detail="Test not found")
     
@@ -199,10 +207,10 @@ def remove_question_from_test(
         raise HTTPException(status_code=403, detail="You don't have permission to update this test")
     
     # Check if the question is in the test
-    test_question = db.query(test_questions).filter(
+    test_question = (await db.execute(select(test_questions).where(
         test_questions.c.test_id == test_id,
         test_questions.c.question_id == question_id
-    ).first()
+    ))).first()
     
     if not test_question:
         raise HTTPException(status_code=404, detail="Question not found in this test")
@@ -212,14 +220,15 @@ def remove_question_from_test(
         test_questions.c.test_id == test_id,
         test_questions.c.question_id == question_id
     )
-    db.execute(stmt)
+    await db.execute(stmt)
     
     # Update test total marks
-    total_marks = db.query(test_questions.c.marks).filter(
+    total_marks = (await db.execute(select(test_questions.c.marks).where(
         test_questions.c.test_id == test_id
-    ).all()
+    ))).all()
     test.total_marks = sum(mark[0] for mark in total_marks) if total_marks else 0
     
-    db.commit()
+    await db.commit()
+    invalidate_test(test_id)
     
     return None
\ No newline at end of file
@@ -1,53 +1,76 @@
 # app/routers/test_sessions.py
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Dict
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Dict, Optional
 from datetime import datetime
 import random
 
-from app.database.database import get_db
+from app.database.async_database import get_async_db
 from app.models.user import User, UserRole
-from app.models.test import Test, test_questions
-from app.models.question import Question, Option
+from app.models.test import Test
+from app.models.question import Question
 from app.models.session import TestSession, UserResponse, OptionOrder
 from app.schemas.session.session_schemas import (
     TestSessionCreate, TestSessionResponse, TestSessionDetailResponse,
-    UserResponseCreate, TestSubmission, TestResultsSummary, TestSessionWithOptions
+    UserResponseCreate, TestSubmission, TestResultsSummary, TestSessionWithOptions,
+    UserResponseBatch, UserResponseBatchResult, ResponseSaveResult, ResponseSaveStatus
 )
 from app.auth.rbac import get_user_with_roles
+from app.services import autosave
+from app.services.answer_keys import get_answer_key
+from app.services.analytics import record_attempt
+from app.services.grading import grade_test_session
+from app.services.option_orders import OPTION_ORDER_MODE, create_option_orders, get_option_orders
+from app.services.results import results_summary, store_results
+from app.services.responses import latest_per_question, response_error, response_row, supersedes, upsert_responses
+from app.utils.instrumentation import InstrumentedRoute
 from sqlalchemy.exc import IntegrityError
 
 router = APIRouter(
     prefix="/test-sessions",
     tags=["test-sessions"],
+    route_class=InstrumentedRoute
 )
 
 # Permissions
 get_student_or_above = get_user_with_roles([UserRole.STUDENT, UserRole.FACULTY, UserRole.INSTITUTION, UserRole.ADMIN])
 
+def _session_with_options(session: TestSession, option_orders: List[dict]) -> TestSessionWithOptions:
+    return TestSessionWithOptions(
+        id=session.id,
+        test_id=session.test_id,
+        user_id=session.user_id,
+        started_at=session.started_at,
+        option_orders=option_orders
+    )
+
+async def _active_session(db: AsyncSession, user_id: int, test_id: int) -> Optional[TestSession]:
+    return await db.scalar(select(TestSession).where(
+        TestSession.user_id == user_id,
+        TestSession.test_id == test_id,
+        TestSession.completed_at.is_(None)
+    ))
+
 @router.post("/", response_model=TestSessionWithOptions, status_code=status.HTTP_201_CREATED)
-def start_test_session(
+async def start_test_session(
     session_data: TestSessionCreate,
     current_user: User = Depends(get_student_or_above),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Start a new test session for a student"""
     # Verify the test exists and is active
-    test = db.query(Test).filter(Test.id == session_data.test_id, Test.is_active == True).first()
+    test = await db.scalar(select(Test).where(Test.id == session_data.test_id, Test.is_active == True))
     if not test:
         raise HTTPException(status_code=404, detail="Test not found or not active")
     
     # Check if user already has an active session for this test
-    existing_session = db.query(TestSession).filter(
-        TestSession.user_id == current_user.id,
-        TestSession.test_id == session_data.test_id,
-        TestSession.completed_at.is_(None)
-    ).first()
+    existing_session = await _active_session(db, current_user.id, session_data.test_id)
     
     if existing_session:
         # Return the existing session
-        return existing_session
+        return _session_with_options(existing_session, await db.run_sync(get_option_orders, existing_session))
     
     # Generate a random seed for reproducible shuffling
     shuffle_seed = random.randint(1, 1000000)
@@ -56,69 +79,47 @@ def start_test_session(
     new_session = TestSession(
         user_id=current_user.id,
         test_id=session_data.test_id,
-        shuffle_seed=shuffle_seed
+        shuffle_seed=shuffle_seed,
+        option_order_mode=OPTION_ORDER_MODE
     )
     db.add(new_session)
-    db.flush()
-    
-    # Get all questions for this test including their order and marks
-    questions_query = db.query(
-        Question, test_questions.c.question_order, test_questions.c.marks
-    ).join(
-        test_questions, Question.id == test_questions.c.question_id
-    ).filter(
-        test_questions.c.test_id == session_data.test_id
-    ).order_by(
-        test_questions.c.question_order
-    ).all()
-    
-    # Shuffle and store option orders for each question
-    random_generator = random.Random(shuffle_seed)  # Use seed for reproducible shuffling
-    
-    for question_data in questions_query:
-        question, _, _ = question_data
-        
-        # Get all options for this question
-        options = db.query(Option).filter(Option.question_id == question.id).all()
-        
-        # Create a shuffled order of options
-        option_ids = [option.id for option in options]
-        random_generator.shuffle(option_ids)
-        
-        # Store the shuffled order
-        for display_order, option_id in enumerate(option_ids):
-            option_order = OptionOrder(
-                test_session_id=new_session.id,
-                question_id=question.id,
-                option_id=option_id,
-                display_order=display_order
-            )
-            db.add(option_order)
+    try:
+        await db.flush()
+    except IntegrityError:
+        # A concurrent request started the session first (one active session per user and test)
+        await db.rollback()
+        # The rollback expired current_user; the discarded session keeps its plain attributes
+        existing_session = await _active_session(db, new_session.user_id, new_session.test_id)
+        return _session_with_options(existing_session, await db.run_sync(get_option_orders, existing_session))
+    
+    # Shuffle every question's options in memory (stored mode writes them in one bulk insert)
+    option_orders = await db.run_sync(create_option_orders, new_session)
     
-    db.commit()
-    db.refresh(new_session)
-    return new_session
+    await db.commit()
+    await db.refresh(new_session)
+    
+    return _session_with_options(new_session, option_orders)
 
 @router.get("/active", response_model=List[TestSessionResponse])
-def get_user_active_sessions(
+async def get_user_active_sessions(
     current_user: User = Depends(get_student_or_above),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all active (incomplete) test sessions for the current user"""
-    sessions = db.query(TestSession).filter(
+    sessions = (await db.scalars(select(TestSession).where(
         TestSession.user_id == current_user.id,
         TestSession.completed_at.is_(None)
-    ).all()
+    ))).all()
     return sessions
 
 @router.get("/{session_id}", response_model=TestSessionWithOptions)
-def get_test_session(
+async def get_test_session(
     session_id: int,
     current_user: User = Depends(get_student_or_above),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific test session with shuffled options"""
-    session = db.query(TestSession).filter(TestSession.id == session_id).first()
+    session = await db.get(TestSession, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Test session not found")
     
@@ -130,18 +131,18 @@ def get_test_session(
     if session.completed_at:
         raise HTTPException(status_code=400, detail="Test session is already completed")
     
-    return session
+    return _session_with_options(session, await db.run_sync(get_option_orders, session))
 
 @router.post("/{session_id}/submit", response_model=TestResultsSummary)
-def submit_test(
+async def submit_test(
     session_id: int,
     submission: TestSubmission,
     current_user: User = Depends(get_student_or_above),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Submit answers for a test session and get results"""
     # Get the test session
-    session = db.query(TestSession).filter(TestSession.id == session_id).first()
+    session = await db.get(TestSession, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Test session not found")
     
@@ -154,77 +155,49 @@ def submit_test(
         raise HTTPException(status_code=400, detail="Test already submitted")
     
     # Get the test
-    test = db.query(Test).filter(Test.id == session.test_id).first()
-    
-    # Process responses
-    total_score = 0
-    correct_count = 0
-    
-    # Get all test questions
-    test_question_data = db.query(
-        Question, test_questions.c.marks
-    ).join(
-        test_questions, Question.id == test_questions.c.question_id
-    ).filter(
-        test_questions.c.test_id == session.test_id
-    ).all()
-    
-    # Create a dictionary for easy access to question marks
-    question_marks = {q.id: marks for q, marks in test_question_data}
-    
-    # Add user responses and calculate score
-    for response in submission.responses:
-        # Verify this question belongs to the test
-        if response.question_id not in question_marks:
-            continue
-        
-        # Create user response
-        user_response = UserResponse(
-            test_session_id=session.id,
-            question_id=response.question_id,
-            selected_option_id=response.selected_option_id
-        )
-        db.add(user_response)
-        
-        # Check if answer is correct
-        option = db.query(Option).filter(Option.id == response.selected_option_id).first()
-        if option and option.is_correct:
-            # Add marks for correct answer
-            total_score += question_marks[response.question_id]
-            correct_count += 1
-    
-    # Update session as completed
-    session.completed_at = datetime.now()
-    session.score = total_score
-    
-    db.commit()
-    
-    # Create and return result summary
-    result_summary = TestResultsSummary(
-        test_id=test.id,
-        test_title=test.title,
-        total_marks=test.total_marks,
-        score=total_score,
-        percentage=(total_score / test.total_marks) * 100 if test.total_marks > 0 else 0,
-        completed_at=session.completed_at,
-        duration_minutes=test.duration_minutes,
-        question_count=len(test_question_data),
-        correct_answers=correct_count
-    )
+    test = await db.get(Test, session.test_id)
     
-    return result_summary
+    try:
+        async with autosave.taken_rows(session.id, close=True) as buffered:
+            # Complete the session only if no concurrent submit did: only one of them grades it and counts the attempt
+            claimed = await db.execute(
+                update(TestSession)
+                .where(TestSession.id == session.id, TestSession.completed_at.is_(None))
+                .values(completed_at=datetime.now())
+            )
+            if not claimed.rowcount:
+                await db.rollback()
+                raise autosave.SessionClosed()
+            
+            # Write answers still in the autosave buffer, then grade every response against the test's answer key in one pass
+            await db.run_sync(upsert_responses, session.id, buffered)
+            result = await db.run_sync(grade_test_session, session, submission.responses)
+            
+            # Keep the results for the result pages and add them to the test analytics
+            store_results(session, test.total_marks, result)
+            await db.run_sync(record_attempt, session, result)
+            
+            await db.commit()
+    except autosave.SessionClosed:
+        # The concurrent submit that completed it keeps the session closed to saves
+        raise HTTPException(status_code=400, detail="Test already submitted")
+    
+    return results_summary(session, test)
 
 @router.get("/{session_id}/results", response_model=TestResultsSummary)
-def get_test_results(
+async def get_test_results(
     session_id: int,
     current_user: User = Depends(get_student_or_above),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get results for a completed test session"""
-    # Get the test session
-    session = db.query(TestSession).filter(TestSession.id == session_id).first()
-    if not session:
+    # Get the test session with its test and stored results
+    row = (await db.execute(
+        select(TestSession, Test).join(Test, Test.id == TestSession.test_id).where(TestSession.id == session_id)
+    )).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Test session not found")
+    session, test = row
     
     # Check permissions
     if session.user_id != current_user.id and current_user.role != UserRole.ADMIN:
@@ -234,53 +207,25 @@ def get_test_results(
     if not session.completed_at:
         raise HTTPException(status_code=400, detail="Test is not yet completed")
     
-    # Get the test
-    test = db.query(Test).filter(Test.id == session.test_id).first()
-    
-    # Get question count
-    question_count = db.query(test_questions).filter(test_questions.c.test_id == test.id).count()
-    
-    # Get correct answers count
-    correct_answers = db.query(UserResponse).join(
-        Option, UserResponse.selected_option_id == Option.id
-    ).filter(
-        UserResponse.test_session_id == session.id,
-        Option.is_correct == True
-    ).count()
-    
-    # Create result summary
-    result_summary = TestResultsSummary(
-        test_id=test.id,
-        test_title=test.title,
-        total_marks=test.total_marks,
-        score=session.score,
-        percentage=(session.score / test.total_marks) * 100 if test.total_marks > 0 else 0,
-        completed_at=session.completed_at,
-        duration_minutes=test.duration_minutes,
-        question_count=question_count,
-        correct_answers=correct_answers
-    )
-    
-    return result_summary
-
+    return results_summary(session, test)
 
 @router.post("/{session_id}/save-response", status_code=status.HTTP_201_CREATED)
-def save_single_response(
+async def save_single_response(
     session_id: int,
     response: UserResponseCreate,
     current_user: User = Depends(get_student_or_above),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Save a single question response during an ongoing test session.
     
     - Validates the test session exists
     - Ensures the user owns the session
-    - Checks the test is still active
-    - Prevents multiple responses for the same question in a session
+    - Checks the question and options belong to the test (cached answer key)
+    - Replaces an earlier response for the same question in one upsert
     """
     # Get the test session
-    session = db.query(TestSession).filter(TestSession.id == session_id).first()
+    session = await db.get(TestSession, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Test session not found")
     
@@ -292,49 +237,33 @@ def save_single_response(
     if session.completed_at:
         raise HTTPException(status_code=400, detail="Test session is already completed")
     
-    # Get the test to verify question belongs to this test
-    test = db.query(Test).filter(Test.id == session.test_id).first()
-    
-    # Verify the question belongs to this test
-    test_question = db.query(test_questions).filter(
-        test_questions.c.test_id == test.id,
-        test_questions.c.question_id == response.question_id
-    ).first()
+    # Verify the question belongs to this test and the options to the question
+    answer_key = await db.run_sync(get_answer_key, session.test_id)
+    error = response_error(answer_key, response)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
     
-    if not test_question:
-        raise HTTPException(status_code=400, detail="Question does not belong to this test")
-    
-    # Check if the option belongs to the question
-    option = db.query(Option).filter(
-        Option.id == response.selected_option_id,
-        Option.question_id == response.question_id
-    ).first()
-    
-    if not option:
-        raise HTTPException(status_code=400, detail="Invalid option for the question")
+    if autosave.AUTOSAVE_MODE == autosave.AutosaveMode.WRITE_BEHIND:
+        # Acknowledge once buffered (and journaled); the flusher writes it with other saves
+        if not autosave.autosave_buffer.record(session.id, [response_row(response)]):
+            raise HTTPException(status_code=400, detail="Test session is already completed")
+        return {
+            "status": "success",
+            "message": "Response saved successfully",
+            "question_id": response.question_id
+        }
     
     try:
-        # Check if a response for this question already exists
-        existing_response = db.query(UserResponse).filter(
-            UserResponse.test_session_id == session.id,
-            UserResponse.question_id == response.question_id
-        ).first()
-        
-        if existing_response:
-            # Update existing response
-            existing_response.selected_option_id = response.selected_option_id
-        else:
-            # Create new response
-            new_response = UserResponse(
-                test_session_id=session.id,
-                question_id=response.question_id,
-                selected_option_id=response.selected_option_id
-            )
-            db.add(new_response)
-        
-        # Commit the changes
-        db.commit()
+        # Insert the response, or replace the saved one for this question
+        saved = await db.run_sync(upsert_responses, session.id, [response_row(response)])
+        await db.commit()
         
+        if not saved:
+            return {
+                "status": "stale",
+                "message": "A response with a higher client_sequence is already saved",
+                "question_id": response.question_id
+            }
         return {
             "status": "success", 
             "message": "Response saved successfully",
@@ -342,14 +271,80 @@ def save_single_response(
         }
     
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail="Error saving response")
 
+@router.post("/{session_id}/save-responses", response_model=UserResponseBatchResult)
+async def save_responses(
+    session_id: int,
+    batch: UserResponseBatch,
+    current_user: User = Depends(get_student_or_above),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Save several question responses of an ongoing test session in one transaction.
+    
+    - Validates the session once and every item against the cached answer key
+    - Keeps the item with the highest client_sequence per question (the last one on ties)
+    - Writes the kept items with one bulk upsert, never replacing a newer saved response
+    - Returns a status per item: saved, superseded, stale or invalid
+    """
+    # Get the test session
+    session = await db.get(TestSession, session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Test session not found")
+    
+    # Check if this is the user's session
+    if session.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="You can only save responses for your own test session")
+    
+    # Check if session is already completed
+    if session.completed_at:
+        raise HTTPException(status_code=400, detail="Test session is already completed")
+    
+    answer_key = await db.run_sync(get_answer_key, session.test_id)
+    errors = [response_error(answer_key, response) for response in batch.responses]
+    valid = [response for response, error in zip(batch.responses, errors) if not error]
+    latest = {valid[index].question_id: valid[index] for index in latest_per_question(valid).values()}
+    
+    try:
+        if autosave.AUTOSAVE_MODE == autosave.AutosaveMode.WRITE_BEHIND:
+            # Buffered single saves came first: write them before the batch, so a later flush cannot overwrite it
+            async with autosave.taken_rows(session.id) as buffered:
+                await db.run_sync(upsert_responses, session.id, buffered)
+                saved = await db.run_sync(upsert_responses, session.id, [response_row(response) for response in latest.values()])
+                await db.commit()
+        else:
+            saved = await db.run_sync(upsert_responses, session.id, [response_row(response) for response in latest.values()])
+            await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Error saving responses")
+    
+    results = []
+    for response, error in zip(batch.responses, errors):
+        if error:
+            item_status = ResponseSaveStatus.INVALID
+        elif latest[response.question_id] is not response:
+            item_status = ResponseSaveStatus.SUPERSEDED
+        elif response.question_id in saved:
+            item_status = ResponseSaveStatus.SAVED
+        else:
+            item_status = ResponseSaveStatus.STALE
+        results.append(ResponseSaveResult(
+            question_id=response.question_id,
+            client_sequence=response.client_sequence,
+            status=item_status,
+            detail=error
+        ))
+    
+    return UserResponseBatchResult(saved=len(saved), results=results)
+
 @router.get("/{session_id}/saved-responses")
-def get_saved_responses(
+async def get_saved_responses(
     session_id: int,
     current_user: User = Depends(get_student_or_above),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Retrieve all saved responses for a specific test session.
@@ -359,7 +354,7 @@ def get_saved_responses(
     - Returns list of saved responses
     """
     # Get the test session
-    session = db.query(TestSession).filter(TestSession.id == session_id).first()
+    session = await db.get(TestSession, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Test session not found")
     
@@ -372,18 +367,31 @@ def get_saved_responses(
         raise HTTPException(status_code=400, detail="Test session is already completed")
     
     # Retrieve saved responses
-    saved_responses = db.query(UserResponse).filter(
+    saved_responses = (await db.scalars(select(UserResponse).where(
         UserResponse.test_session_id == session.id
-    ).all()
+    ))).all()
     
     # Transform to response schema
-    response_list = [
-        {
+    responses = {
+        response.question_id: {
             "question_id": response.question_id,
             "selected_option_id": response.selected_option_id,
+            "selected_option_ids": response.selected_option_ids,
             "created_at": response.created_at
         } for response in saved_responses
-    ]
+    }
+    # Saves still in the autosave buffer, where the flush will let them replace the written ones
+    sequences = {response.question_id: response.client_sequence for response in saved_responses}
+    for row in autosave.autosave_buffer.pending(session.id):
+        if row["question_id"] in sequences and not supersedes(row["client_sequence"], sequences[row["question_id"]]):
+            continue
+        responses[row["question_id"]] = {
+            "question_id": row["question_id"],
+            "selected_option_id": row["selected_option_id"],
+            "selected_option_ids": row["selected_option_ids"],
+            "created_at": None
+        }
+    response_list = list(responses.values())
     
     return {
         "total_saved_responses": len(response_list),
@@ -9,14 +9,19 @@ from app.schemas.question.option_schemas import (
     OptionBase, OptionCreate, OptionUpdate, OptionResponse
 )
 from app.schemas.question.question_schemas import (
-    QuestionType, QuestionBase, QuestionCreate, QuestionUpdate, QuestionResponse
+    QuestionType, QuestionBase, QuestionCreate, QuestionUpdate, QuestionResponse,
+    QuestionImportError, QuestionImportResult
 )
 from app.schemas.test.test_schemas import (
     TestBase, TestCreate, TestUpdate, TestQuestionAdd, TestQuestionUpdate,
     TestQuestionResponse, TestResponse, TestDetailResponse
 )
+from app.schemas.test.analytics_schemas import (
+    ScoreBucket, TestAnalytics, OptionAnalytics, QuestionAnalytics
+)
 from app.schemas.session.session_schemas import (
     TestSessionBase, TestSessionCreate, OptionOrderResponse, TestSessionWithOptions,
-    UserResponseCreate, UserResponseResponse, TestSessionUpdate, TestSubmission,
+    UserResponseCreate, UserResponseBatch, ResponseSaveStatus, ResponseSaveResult, UserResponseBatchResult,
+    UserResponseResponse, TestSessionUpdate, TestSubmission,
     TestSessionResponse, TestSessionDetailResponse, TestResultsSummary
 )
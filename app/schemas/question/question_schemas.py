@@ -64,3 +64,12 @@ class QuestionResponse(QuestionBase):
     
     class Config:
         from_attributes = True
+
+class QuestionImportError(BaseModel):
+    row: int  # 1-based record number in the upload, CSV header excluded
+    errors: List[str]
+
+class QuestionImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[QuestionImportError]  # The first failed rows only, see `failed` for the count
@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+
+# Tag schemas
+class TagFacet(BaseModel):
+    tag: str
+    count: int  # Questions having the tag
@@ -1,6 +1,7 @@
 from datetime import datetime
+from enum import Enum
 from typing import Optional, List
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 # Test session schemas
 class TestSessionBase(BaseModel):
@@ -29,11 +30,36 @@ class TestSessionWithOptions(TestSessionBase):
 class UserResponseCreate(BaseModel):
     question_id: int
     selected_option_id: int
+    # Every selected option of a multiple choice question (defaults to selected_option_id)
+    selected_option_ids: Optional[List[int]] = None
+    # Client-side counter of the answer; a save never replaces a response with a higher one
+    client_sequence: Optional[int] = None
+
+class UserResponseBatch(BaseModel):
+    responses: List[UserResponseCreate] = Field(..., max_length=1000)
+
+class ResponseSaveStatus(str, Enum):
+    SAVED = "saved"
+    SUPERSEDED = "superseded"  # A later item of the same batch answers the same question
+    STALE = "stale"  # The saved response has a higher client_sequence
+    INVALID = "invalid"  # Question or options do not belong to the test
+
+class ResponseSaveResult(BaseModel):
+    question_id: int
+    client_sequence: Optional[int] = None
+    status: ResponseSaveStatus
+    detail: Optional[str] = None
+
+class UserResponseBatchResult(BaseModel):
+    saved: int
+    results: List[ResponseSaveResult]  # One per submitted item, in submission order
 
 class UserResponseResponse(BaseModel):
     id: int
     question_id: int
     selected_option_id: int
+    selected_option_ids: Optional[List[int]] = None
+    is_correct: Optional[bool] = None
     created_at: datetime
     
     class Config:
@@ -72,3 +98,5 @@ class TestResultsSummary(BaseModel):
     duration_minutes: int
     question_count: int
     correct_answers: int
+    # Whether each question was answered correctly, in question order (None for sessions graded before outcomes were kept)
+    question_outcomes: Optional[List[bool]] = None
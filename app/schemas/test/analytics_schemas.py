@@ -0,0 +1,31 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+# Test analytics schemas (see app.services.analytics)
+class ScoreBucket(BaseModel):
+    min_percentage: float
+    max_percentage: float
+    attempt_count: int
+
+class TestAnalytics(BaseModel):
+    test_id: int
+    attempt_count: int
+    mean_score: Optional[float] = None
+    mean_percentage: Optional[float] = None
+    median_percentage: Optional[float] = None  # Estimated from the distribution buckets
+    std_dev_percentage: Optional[float] = None
+    distribution: List[ScoreBucket]
+
+class OptionAnalytics(BaseModel):
+    option_id: int
+    pick_count: int
+    pick_rate: Optional[float] = None  # Share of the question's attempts picking the option
+
+class QuestionAnalytics(BaseModel):
+    question_id: int
+    attempt_count: int
+    answered_count: int
+    correct_count: int
+    difficulty_index: Optional[float] = None  # Share of attempts answering correctly
+    discrimination_index: Optional[float] = None  # Point-biserial correlation with the attempt's percentage
+    options: List[OptionAnalytics]
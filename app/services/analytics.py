@@ -0,0 +1,353 @@
+# app/services/analytics.py
+"""
+Per-test analytics kept as running aggregates.
+
+Every graded submit adds its attempt to the aggregates of its test in the
+same transaction: attempt count and score sums per test, attempts per
+percentage bucket, attempts, correct answers and percentage sums per
+question, and picks per option. The analytics endpoints derive means,
+medians, difficulty and discrimination from those few rows and never read
+`user_responses`.
+
+`compute_test_aggregates` rebuilds the same aggregates from the graded
+sessions and responses; the `recompute_test_analytics` job uses it to
+backfill and to check the running aggregates.
+"""
+import math
+from dataclasses import dataclass, field
+from itertools import groupby
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models.session import TestSession, UserResponse
+from app.models.test import OptionStats, QuestionStats, TestScoreBucket, TestStats
+from app.services.answer_keys import AnswerKey, get_answer_key, load_answer_key
+from app.services.grading import GradedResponse, GradeResult
+
+BUCKET_COUNT = 10  # Percentage buckets 10 points wide; 100% counts in the last one
+BUCKET_WIDTH = 100 / BUCKET_COUNT
+
+def score_bucket(percentage: float) -> int:
+    return min(max(int(percentage // BUCKET_WIDTH), 0), BUCKET_COUNT - 1)
+
+@dataclass
+class QuestionAggregate:
+    attempt_count: int = 0
+    answered_count: int = 0
+    correct_count: int = 0
+    percentage_sum: float = 0.0
+    percentage_sq_sum: float = 0.0
+    correct_percentage_sum: float = 0.0
+
+@dataclass
+class TestAggregates:
+    test_id: int
+    attempt_count: int = 0
+    score_sum: float = 0.0
+    percentage_sum: float = 0.0
+    percentage_sq_sum: float = 0.0
+    buckets: Dict[int, int] = field(default_factory=dict)
+    questions: Dict[int, QuestionAggregate] = field(default_factory=dict)
+    option_picks: Dict[Tuple[int, int], int] = field(default_factory=dict)  # (question_id, option_id) -> picks
+
+    def add_attempt(
+        self,
+        score: float,
+        percentage: float,
+        question_ids: Iterable[int],
+        responses: Iterable[GradedResponse]
+    ) -> None:
+        """Add one graded attempt having `question_ids` and the graded `responses`"""
+        self.attempt_count += 1
+        self.score_sum += score
+        self.percentage_sum += percentage
+        self.percentage_sq_sum += percentage * percentage
+        bucket = score_bucket(percentage)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+        responses = {response.question_id: response for response in responses}
+        for question_id in question_ids:
+            question = self.questions.setdefault(question_id, QuestionAggregate())
+            question.attempt_count += 1
+            question.percentage_sum += percentage
+            question.percentage_sq_sum += percentage * percentage
+            response = responses.get(question_id)
+            if response is None:
+                continue
+            question.answered_count += 1
+            if response.is_correct:
+                question.correct_count += 1
+                question.correct_percentage_sum += percentage
+            for option_id in response.selected_option_ids:
+                key = (question_id, option_id)
+                self.option_picks[key] = self.option_picks.get(key, 0) + 1
+
+    def rows(self) -> Dict[type, List[dict]]:
+        """Rows of each aggregate table"""
+        if not self.attempt_count:
+            return {TestStats: [], TestScoreBucket: [], QuestionStats: [], OptionStats: []}
+        return {
+            TestStats: [{
+                "test_id": self.test_id,
+                "attempt_count": self.attempt_count,
+                "score_sum": self.score_sum,
+                "percentage_sum": self.percentage_sum,
+                "percentage_sq_sum": self.percentage_sq_sum
+            }],
+            TestScoreBucket: [
+                {"test_id": self.test_id, "bucket": bucket, "attempt_count": count}
+                for bucket, count in sorted(self.buckets.items())
+            ],
+            QuestionStats: [
+                {"test_id": self.test_id, "question_id": question_id, **vars(question)}
+                for question_id, question in sorted(self.questions.items())
+            ],
+            OptionStats: [
+                {"test_id": self.test_id, "question_id": question_id, "option_id": option_id, "pick_count": count}
+                for (question_id, option_id), count in sorted(self.option_picks.items())
+            ]
+        }
+
+# Primary key and summed columns of each aggregate table
+_AGGREGATE_TABLES = {
+    TestStats: (("test_id",), ("attempt_count", "score_sum", "percentage_sum", "percentage_sq_sum")),
+    TestScoreBucket: (("test_id", "bucket"), ("attempt_count",)),
+    QuestionStats: (("test_id", "question_id"), (
+        "attempt_count", "answered_count", "correct_count",
+        "percentage_sum", "percentage_sq_sum", "correct_percentage_sum"
+    )),
+    OptionStats: (("test_id", "option_id"), ("pick_count",))
+}
+
+def _add_rows(db: Session, model, rows: List[dict]) -> None:
+    """Add the summed columns of `rows` to the stored rows, inserting the missing ones"""
+    if not rows:
+        return
+    key_columns, sum_columns = _AGGREGATE_TABLES[model]
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        statement = (postgresql_insert if dialect == "postgresql" else sqlite_insert)(model)
+        increments = {column: getattr(model, column) + statement.excluded[column] for column in sum_columns}
+        if model is TestStats:
+            increments["updated_at"] = func.now()
+        db.execute(statement.on_conflict_do_update(index_elements=list(key_columns), set_=increments), rows)
+        return
+
+    for row in rows:
+        result = db.execute(
+            update(model)
+            .where(*(getattr(model, column) == row[column] for column in key_columns))
+            .values({column: getattr(model, column) + row[column] for column in sum_columns})
+        )
+        if result.rowcount == 0:
+            db.execute(insert(model), [row])
+
+def record_attempt(db: Session, test_session: TestSession, result: GradeResult) -> None:
+    """Add a graded session, with its stored results, to its test's aggregates (no commit)"""
+    answer_key = get_answer_key(db, test_session.test_id)
+    aggregates = TestAggregates(test_session.test_id)
+    aggregates.add_attempt(
+        result.score,
+        test_session.percentage,
+        (entry.question_id for entry in answer_key.ordered_entries),
+        result.responses
+    )
+    for model, rows in aggregates.rows().items():
+        _add_rows(db, model, rows)
+
+def compute_test_aggregates(db: Session, test_id: int, batch_size: int = 1000) -> TestAggregates:
+    """
+    Aggregates of a test rebuilt from its completed sessions and their graded responses.
+
+    Every attempt counts the test's current questions, so this only matches
+    the running aggregates while the questions stay unchanged.
+    """
+    question_ids = [entry.question_id for entry in load_answer_key(db, test_id).ordered_entries]
+    completed = (TestSession.test_id == test_id, TestSession.completed_at.isnot(None))
+    sessions = db.execute(
+        select(TestSession.id, TestSession.score, TestSession.percentage)
+        .where(*completed)
+        .order_by(TestSession.id)
+        .execution_options(yield_per=batch_size)
+    )
+    responses = db.execute(
+        select(
+            UserResponse.test_session_id,
+            UserResponse.question_id,
+            UserResponse.selected_option_id,
+            UserResponse.selected_option_ids,
+            UserResponse.is_correct
+        )
+        .join(TestSession, TestSession.id == UserResponse.test_session_id)
+        .where(*completed)
+        .order_by(UserResponse.test_session_id)
+        .execution_options(yield_per=batch_size)
+    )
+    # Both streams are ordered by session, so each session's responses are the next group
+    response_groups = groupby(responses, key=lambda row: row.test_session_id)
+    group_session_id, group = next(response_groups, (None, iter(())))
+
+    aggregates = TestAggregates(test_id)
+    for session_id, score, percentage in sessions:
+        while group_session_id is not None and group_session_id < session_id:
+            group_session_id, group = next(response_groups, (None, iter(())))
+        graded = []
+        if group_session_id == session_id:
+            graded = [
+                GradedResponse(
+                    question_id=row.question_id,
+                    selected_option_ids=frozenset(row.selected_option_ids or [row.selected_option_id]),
+                    is_correct=bool(row.is_correct),
+                    marks_awarded=0.0
+                )
+                for row in group
+            ]
+        aggregates.add_attempt(score or 0.0, percentage or 0.0, question_ids, graded)
+    return aggregates
+
+def load_test_aggregates(db: Session, test_id: int) -> TestAggregates:
+    """The running aggregates of a test, one indexed read per aggregate table"""
+    aggregates = TestAggregates(test_id)
+    stats = db.get(TestStats, test_id)
+    if stats is None:
+        return aggregates
+    aggregates.attempt_count = stats.attempt_count
+    aggregates.score_sum = stats.score_sum
+    aggregates.percentage_sum = stats.percentage_sum
+    aggregates.percentage_sq_sum = stats.percentage_sq_sum
+    aggregates.buckets = dict(db.execute(
+        select(TestScoreBucket.bucket, TestScoreBucket.attempt_count).where(TestScoreBucket.test_id == test_id)
+    ).all())
+    _, question_columns = _AGGREGATE_TABLES[QuestionStats]
+    for row in db.execute(select(QuestionStats).where(QuestionStats.test_id == test_id)).scalars():
+        aggregates.questions[row.question_id] = QuestionAggregate(
+            **{column: getattr(row, column) for column in question_columns}
+        )
+    aggregates.option_picks = {
+        (question_id, option_id): count
+        for question_id, option_id, count in db.execute(
+            select(OptionStats.question_id, OptionStats.option_id, OptionStats.pick_count)
+            .where(OptionStats.test_id == test_id)
+        )
+    }
+    return aggregates
+
+def replace_test_aggregates(db: Session, aggregates: TestAggregates) -> None:
+    """Overwrite the stored aggregates of a test (no commit)"""
+    for model, rows in aggregates.rows().items():
+        db.execute(delete(model).where(model.test_id == aggregates.test_id))
+        if rows:
+            db.execute(insert(model), rows)
+
+def compare_aggregates(stored: TestAggregates, computed: TestAggregates) -> List[str]:
+    """Differences between two aggregates of a test, empty when they agree"""
+    stored_rows, computed_rows = stored.rows(), computed.rows()
+    differences = []
+    for model, (key_columns, sum_columns) in _AGGREGATE_TABLES.items():
+        stored_by_key = {tuple(row[column] for column in key_columns): row for row in stored_rows[model]}
+        computed_by_key = {tuple(row[column] for column in key_columns): row for row in computed_rows[model]}
+        for key in sorted(stored_by_key.keys() | computed_by_key.keys()):
+            stored_row, computed_row = stored_by_key.get(key, {}), computed_by_key.get(key, {})
+            for column in sum_columns:
+                stored_value, computed_value = stored_row.get(column, 0), computed_row.get(column, 0)
+                if not math.isclose(stored_value, computed_value, rel_tol=1e-9, abs_tol=1e-6):
+                    differences.append(
+                        f"{model.__tablename__} {dict(zip(key_columns, key))} {column}: "
+                        f"stored {stored_value}, recomputed {computed_value}"
+                    )
+    return differences
+
+def _mean(total: float, count: int) -> Optional[float]:
+    return total / count if count else None
+
+def _std_dev(total: float, sq_total: float, count: int) -> Optional[float]:
+    if not count:
+        return None
+    # Rounding can leave a tiny negative variance when every percentage is equal
+    return math.sqrt(max(sq_total / count - (total / count) ** 2, 0.0))
+
+def median_percentage(buckets: Dict[int, int]) -> Optional[float]:
+    """Median estimated from the bucket counts, interpolating within the bucket holding it"""
+    middle = sum(buckets.values()) / 2
+    if not middle:
+        return None
+    below = 0
+    for bucket in range(BUCKET_COUNT):
+        count = buckets.get(bucket, 0)
+        if count and below + count >= middle:
+            return bucket * BUCKET_WIDTH + (middle - below) / count * BUCKET_WIDTH
+        below += count
+    return 100.0
+
+def discrimination_index(question: QuestionAggregate) -> Optional[float]:
+    """
+    Point-biserial correlation between answering correctly and the attempt's percentage.
+
+    None until the question has both correct and incorrect attempts with differing percentages.
+    """
+    attempts, correct = question.attempt_count, question.correct_count
+    std_dev = _std_dev(question.percentage_sum, question.percentage_sq_sum, attempts)
+    if not correct or correct == attempts or not std_dev:
+        return None
+    correct_mean = question.correct_percentage_sum / correct
+    incorrect_mean = (question.percentage_sum - question.correct_percentage_sum) / (attempts - correct)
+    proportion = correct / attempts
+    return (correct_mean - incorrect_mean) / std_dev * math.sqrt(proportion * (1 - proportion))
+
+def score_statistics(aggregates: TestAggregates) -> dict:
+    """Score statistics and distribution of a test (see TestAnalytics)"""
+    return {
+        "test_id": aggregates.test_id,
+        "attempt_count": aggregates.attempt_count,
+        "mean_score": _mean(aggregates.score_sum, aggregates.attempt_count),
+        "mean_percentage": _mean(aggregates.percentage_sum, aggregates.attempt_count),
+        "median_percentage": median_percentage(aggregates.buckets),
+        "std_dev_percentage": _std_dev(
+            aggregates.percentage_sum, aggregates.percentage_sq_sum, aggregates.attempt_count
+        ),
+        "distribution": [
+            {
+                "min_percentage": bucket * BUCKET_WIDTH,
+                "max_percentage": (bucket + 1) * BUCKET_WIDTH,
+                "attempt_count": aggregates.buckets.get(bucket, 0)
+            }
+            for bucket in range(BUCKET_COUNT)
+        ]
+    }
+
+def question_statistics(aggregates: TestAggregates, answer_key: AnswerKey) -> List[dict]:
+    """Difficulty, discrimination and option pick rates per question (see QuestionAnalytics), in question order"""
+    option_ids: Dict[int, Sequence[int]] = {
+        entry.question_id: sorted(entry.option_ids) for entry in answer_key.ordered_entries
+    }
+    # Questions removed from the test since they were attempted come last
+    for question_id, option_id in sorted(aggregates.option_picks):
+        if option_id not in option_ids.setdefault(question_id, []):
+            option_ids[question_id] = [*option_ids[question_id], option_id]
+    for question_id in sorted(aggregates.questions):
+        option_ids.setdefault(question_id, [])
+
+    analytics = []
+    for question_id, options in option_ids.items():
+        question = aggregates.questions.get(question_id, QuestionAggregate())
+        analytics.append({
+            "question_id": question_id,
+            "attempt_count": question.attempt_count,
+            "answered_count": question.answered_count,
+            "correct_count": question.correct_count,
+            "difficulty_index": _mean(question.correct_count, question.attempt_count),
+            "discrimination_index": discrimination_index(question),
+            "options": [
+                {
+                    "option_id": option_id,
+                    "pick_count": aggregates.option_picks.get((question_id, option_id), 0),
+                    "pick_rate": _mean(aggregates.option_picks.get((question_id, option_id), 0), question.attempt_count)
+                }
+                for option_id in options
+            ]
+        })
+    return analytics
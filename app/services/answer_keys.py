@@ -0,0 +1,127 @@
+# app/services/answer_keys.py
+import os
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.test import test_questions
+from app.models.question import Question, QuestionType, Option
+from app.utils.cache import LRUCache
+
+# Load environment variables
+load_dotenv()
+
+@dataclass(frozen=True)
+class AnswerKeyEntry:
+    question_id: int
+    question_type: QuestionType
+    marks: float
+    option_ids: FrozenSet[int]
+    correct_option_ids: FrozenSet[int]
+    question_order: int = 0
+
+@dataclass(frozen=True)
+class AnswerKey:
+    test_id: int
+    questions: Dict[int, AnswerKeyEntry]
+
+    @property
+    def question_count(self) -> int:
+        return len(self.questions)
+
+    @property
+    def ordered_entries(self) -> Tuple[AnswerKeyEntry, ...]:
+        """Entries in question order (question_order, then question id)"""
+        return tuple(sorted(self.questions.values(), key=lambda entry: (entry.question_order, entry.question_id)))
+
+    @property
+    def option_layout(self) -> Tuple[Tuple[int, Tuple[int, ...]], ...]:
+        """(question_id, (option_id, ...)) pairs in question order with option ids ascending"""
+        return tuple(
+            (entry.question_id, tuple(sorted(entry.option_ids)))
+            for entry in self.ordered_entries
+            if entry.option_ids
+        )
+
+# Answer keys per test. A test's key does not change during an exam window, so
+# the TTL only bounds how long another worker may serve a key edited elsewhere.
+_answer_key_cache = LRUCache(
+    maxsize=int(os.getenv("ANSWER_KEY_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("ANSWER_KEY_CACHE_TTL", "300"))
+)
+
+def load_answer_key(db: Session, test_id: int) -> AnswerKey:
+    """
+    Load the answer key of a test (marks, order, question type and options) with a single query.
+    """
+    rows = db.execute(
+        select(
+            test_questions.c.question_id,
+            test_questions.c.marks,
+            test_questions.c.question_order,
+            Question.question_type,
+            Option.id,
+            Option.is_correct
+        )
+        .join(Question, Question.id == test_questions.c.question_id)
+        .outerjoin(Option, Option.question_id == test_questions.c.question_id)
+        .where(test_questions.c.test_id == test_id)
+    ).all()
+
+    questions, option_ids, correct_option_ids = {}, {}, {}
+    for question_id, marks, question_order, question_type, option_id, is_correct in rows:
+        questions[question_id] = (
+            QuestionType(question_type or QuestionType.SINGLE),
+            marks if marks is not None else 1.0,
+            question_order or 0
+        )
+        option_ids.setdefault(question_id, set())
+        correct_option_ids.setdefault(question_id, set())
+        if option_id is not None:
+            option_ids[question_id].add(option_id)
+            if is_correct:
+                correct_option_ids[question_id].add(option_id)
+
+    return AnswerKey(
+        test_id=test_id,
+        questions={
+            question_id: AnswerKeyEntry(
+                question_id=question_id,
+                question_type=question_type,
+                marks=marks,
+                option_ids=frozenset(option_ids[question_id]),
+                correct_option_ids=frozenset(correct_option_ids[question_id]),
+                question_order=question_order
+            )
+            for question_id, (question_type, marks, question_order) in questions.items()
+        }
+    )
+
+def get_answer_key(db: Session, test_id: int) -> AnswerKey:
+    """Return the answer key of a test, loading it on a cache miss"""
+    answer_key = _answer_key_cache.get(test_id)
+    if answer_key is None:
+        answer_key = load_answer_key(db, test_id)
+        _answer_key_cache.set(test_id, answer_key)
+    return answer_key
+
+def invalidate_test(test_id: int) -> None:
+    """Drop the cached answer key of a test after its questions change"""
+    _answer_key_cache.pop(test_id)
+
+def question_test_ids(db: Session, question_id: int) -> List[int]:
+    """Ids of the tests using a question, whose answer keys change with it"""
+    return db.execute(
+        select(test_questions.c.test_id).where(test_questions.c.question_id == question_id)
+    ).scalars().all()
+
+def invalidate_question(db: Session, question_id: int) -> None:
+    """Drop the cached answer key of every test using a question after the question or its options change"""
+    for test_id in question_test_ids(db, question_id):
+        _answer_key_cache.pop(test_id)
+
+def answer_key_cache_stats() -> dict:
+    return _answer_key_cache.stats()
@@ -0,0 +1,315 @@
+# app/services/autosave.py
+"""
+Write-behind buffer for autosaved responses.
+
+With AUTOSAVE_MODE=write_behind, `save-response` records the answer in this
+process's buffer and returns without touching `user_responses`. A background
+task flushes the buffered answers every AUTOSAVE_FLUSH_INTERVAL_MS, latest
+answer per question only, with one upsert per session and one commit per
+flush. Submitting a test, or saving a batch of answers, takes its session's
+buffered rows into its own transaction instead (see `taken_rows`), after
+waiting for any flush holding rows of that session to settle, so neither an
+acknowledged save nor a newer answer can be lost to a concurrent flush.
+Submitting also closes the session to later saves. Shutdown flushes
+everything.
+
+The buffer lives in one process: with several workers, the saves and the
+submit of a session must reach the same worker (a single worker, or sticky
+sessions in the load balancer), or a submit on another worker grades without
+them.
+
+When AUTOSAVE_JOURNAL_PATH is set, every recorded answer is also appended to
+that file (one JSON line each) before it is acknowledged, and the journal is
+cut back to the still-buffered answers after each flush. A worker that dies
+before flushing replays the journal on its next start. Each worker process
+needs its own journal file.
+"""
+import asyncio
+import enum
+import json
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.database.database import SessionLocal
+from app.models.session import TestSession
+from app.services.responses import supersedes, upsert_responses
+
+# Load environment variables
+load_dotenv()
+
+class AutosaveMode(str, enum.Enum):
+    DIRECT = "direct"  # Every save is upserted in its own transaction
+    WRITE_BEHIND = "write_behind"  # Saves are buffered and flushed in batches
+
+AUTOSAVE_MODE = AutosaveMode(os.getenv("AUTOSAVE_MODE", AutosaveMode.DIRECT.value))
+AUTOSAVE_FLUSH_INTERVAL_MS = int(os.getenv("AUTOSAVE_FLUSH_INTERVAL_MS", "200"))
+AUTOSAVE_JOURNAL_PATH = os.getenv("AUTOSAVE_JOURNAL_PATH") or None
+# How long a submitted session keeps refusing saves still on their way through the save endpoint
+CLOSED_SESSION_RETENTION_S = 600
+
+class AutosaveBuffer:
+    """
+    Latest buffered response row (see `response_row`) per session and question.
+
+    Thread-safe: requests record on the event loop while flushes run on the threadpool.
+    """
+
+    def __init__(self, journal_path: Optional[str] = None):
+        self.journal_path = journal_path
+        self._pending: Dict[int, Dict[int, dict]] = {}
+        # Rows taken by flushes that have not committed yet; kept in the journal until they do
+        self._in_flight: List[Dict[int, Dict[int, dict]]] = []
+        # Submitted sessions refusing new saves, with when they were closed
+        self._closed: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._settled = threading.Condition(self._lock)
+        self._journal = open(journal_path, "a", encoding="utf-8") if journal_path else None
+        self.recorded = 0
+        self.flushed = 0
+
+    def _merge(self, test_session_id: int, rows: Iterable[dict]) -> None:
+        answers = self._pending.setdefault(test_session_id, {})
+        for row in rows:
+            buffered = answers.get(row["question_id"])
+            if buffered is None or supersedes(row["client_sequence"], buffered["client_sequence"]):
+                answers[row["question_id"]] = row
+
+    def record(self, test_session_id: int, rows: List[dict]) -> bool:
+        """
+        Buffer response rows of a session, journaling them first when a journal is configured.
+
+        Returns False, buffering nothing, when the session was submitted meanwhile.
+        """
+        with self._lock:
+            if test_session_id in self._closed:
+                return False
+            if self._journal:
+                for row in rows:
+                    self._journal.write(json.dumps({"test_session_id": test_session_id, **row}) + "\n")
+                # Reaches the OS before the save is acknowledged, so it survives a process crash
+                self._journal.flush()
+            self._merge(test_session_id, rows)
+            self.recorded += len(rows)
+            return True
+
+    def pending(self, test_session_id: int) -> List[dict]:
+        """Unflushed rows of a session, for reads that must see every acknowledged save"""
+        with self._lock:
+            rows = {}
+            for batch in self._in_flight + [self._pending]:
+                for row in batch.get(test_session_id, {}).values():
+                    saved = rows.get(row["question_id"])
+                    if saved is None or supersedes(row["client_sequence"], saved["client_sequence"]):
+                        rows[row["question_id"]] = row
+            return list(rows.values())
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return sum(len(answers) for answers in self._pending.values())
+
+    def _take(self, test_session_ids: Optional[Iterable[int]]) -> Dict[int, Dict[int, dict]]:
+        with self._lock:
+            if test_session_ids is None:
+                taken, self._pending = self._pending, {}
+            else:
+                taken = {
+                    test_session_id: self._pending.pop(test_session_id)
+                    for test_session_id in test_session_ids
+                    if test_session_id in self._pending
+                }
+            if taken:
+                self._in_flight.append(taken)
+            return taken
+
+    def take_session(self, test_session_id: int, close: bool = False) -> Dict[int, Dict[int, dict]]:
+        """
+        Take the buffered rows of one session for the caller's own transaction.
+
+        Blocks until flushes holding rows of the session have settled, so the
+        rows taken are the session's latest. With `close`, later saves of the
+        session are refused. Pass the result to `release` once the caller's
+        transaction has ended.
+        """
+        with self._settled:
+            self._settled.wait_for(lambda: not any(test_session_id in batch for batch in self._in_flight))
+            if close:
+                now = time.monotonic()
+                self._closed = {
+                    closed_id: closed_at for closed_id, closed_at in self._closed.items()
+                    if now - closed_at < CLOSED_SESSION_RETENTION_S
+                }
+                self._closed[test_session_id] = now
+            # Kept in flight even when empty, so concurrent takes of the session wait for this one
+            taken = {test_session_id: self._pending.pop(test_session_id, {})}
+            self._in_flight.append(taken)
+            return taken
+
+    def release(self, taken: Dict[int, Dict[int, dict]], committed: bool, reopen: bool = True) -> None:
+        """
+        Settle rows of `take_session`.
+
+        When not committed the rows go back into the buffer and, unless
+        `reopen` is False, the session takes saves again.
+        """
+        if not committed and reopen:
+            with self._lock:
+                for test_session_id in taken:
+                    self._closed.pop(test_session_id, None)
+        self._settle(taken, committed)
+        if committed:
+            self._compact_journal()
+
+    def _settle(self, taken: Dict[int, Dict[int, dict]], committed: bool) -> None:
+        with self._settled:
+            self._in_flight = [batch for batch in self._in_flight if batch is not taken]
+            self._settled.notify_all()
+            if committed:
+                return
+            for test_session_id, answers in taken.items():
+                if not answers:
+                    continue
+                # Rows recorded since the take are newer unless their sequence says otherwise
+                newer = self._pending.pop(test_session_id, {})
+                self._merge(test_session_id, answers.values())
+                self._merge(test_session_id, newer.values())
+
+    def _compact_journal(self) -> None:
+        """Rewrite the journal with only the rows not committed yet"""
+        with self._lock:
+            if not self._journal:
+                return
+            temporary_path = f"{self.journal_path}.tmp"
+            with open(temporary_path, "w", encoding="utf-8") as journal:
+                for batch in self._in_flight + [self._pending]:
+                    for test_session_id, answers in batch.items():
+                        for row in answers.values():
+                            journal.write(json.dumps({"test_session_id": test_session_id, **row}) + "\n")
+            self._journal.close()
+            os.replace(temporary_path, self.journal_path)
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+
+    def flush(self, db: Session, test_session_ids: Optional[Iterable[int]] = None) -> int:
+        """
+        Upsert and commit the buffered rows of the given sessions (all when None).
+
+        Rows of sessions completed in the meantime are dropped: their graded
+        responses are final. On failure the rows go back into the buffer.
+        Returns the number of rows written.
+        """
+        taken = self._take(test_session_ids)
+        if not taken:
+            return 0
+        try:
+            open_session_ids = set(db.execute(
+                select(TestSession.id).where(TestSession.id.in_(taken), TestSession.completed_at.is_(None))
+            ).scalars())
+            written = 0
+            for test_session_id, answers in taken.items():
+                if test_session_id in open_session_ids:
+                    upsert_responses(db, test_session_id, answers.values())
+                    written += len(answers)
+            db.commit()
+        except Exception:
+            db.rollback()
+            self._settle(taken, committed=False)
+            raise
+        self._settle(taken, committed=True)
+        self.flushed += written
+        self._compact_journal()
+        return written
+
+    def recover(self, db: Session) -> int:
+        """Replay the journal left by a previous process and flush it; returns the rows replayed"""
+        if not self._journal:
+            return 0
+        with open(self.journal_path, encoding="utf-8") as journal:
+            lines = [line for line in journal if line.strip()]
+        with self._lock:
+            for line in lines:
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    # A write torn by the crash; it was never acknowledged
+                    continue
+                self._merge(row.pop("test_session_id"), [row])
+        self.flush(db)
+        return len(lines)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._journal:
+                self._journal.close()
+                self._journal = None
+
+    def stats(self) -> dict:
+        return {
+            "mode": AUTOSAVE_MODE.value,
+            "pending": self.pending_count(),
+            "recorded": self.recorded,
+            "flushed": self.flushed,
+            "journal": self.journal_path
+        }
+
+autosave_buffer = AutosaveBuffer(AUTOSAVE_JOURNAL_PATH if AUTOSAVE_MODE == AutosaveMode.WRITE_BEHIND else None)
+
+class SessionClosed(Exception):
+    """Raised inside `taken_rows` when the session was completed by someone else; it stays closed to saves"""
+
+@asynccontextmanager
+async def taken_rows(test_session_id: int, close: bool = False) -> AsyncIterator[List[dict]]:
+    """
+    Buffered rows of a session taken for the caller's transaction (see `AutosaveBuffer.take_session`).
+
+    Commit inside the block: the rows count as written when it exits
+    normally and go back into the buffer when it raises. Nothing is ever
+    buffered in direct mode, where the block gets no rows.
+    """
+    if AUTOSAVE_MODE == AutosaveMode.DIRECT:
+        yield []
+        return
+    buffer = autosave_buffer
+    # Waiting for a flush to settle must not block the event loop
+    taken = await run_in_threadpool(buffer.take_session, test_session_id, close)
+    try:
+        yield list(taken[test_session_id].values())
+    except SessionClosed:
+        buffer.release(taken, committed=False, reopen=False)
+        raise
+    except BaseException:
+        buffer.release(taken, committed=False)
+        raise
+    buffer.release(taken, committed=True)
+
+def flush_autosave_buffer(
+    test_session_ids: Optional[Iterable[int]] = None,
+    buffer: Optional[AutosaveBuffer] = None
+) -> int:
+    """Flush a buffer (the process buffer when None) with a session of its own (for the threadpool)"""
+    buffer = buffer or autosave_buffer
+    db = SessionLocal()
+    try:
+        return buffer.flush(db, test_session_ids)
+    finally:
+        db.close()
+
+async def run_autosave_flusher(interval_ms: int = AUTOSAVE_FLUSH_INTERVAL_MS) -> None:
+    """Flush the process buffer every `interval_ms` until cancelled"""
+    # The buffer of the process when the flusher starts, not whatever replaces it later (as tests do)
+    buffer = autosave_buffer
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(interval_ms / 1000)
+        if buffer.pending_count():
+            try:
+                await loop.run_in_executor(None, flush_autosave_buffer, None, buffer)
+            except Exception as error:
+                # The rows were requeued; try again on the next tick
+                print(f"Autosave flush failed: {error}")
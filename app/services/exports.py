@@ -0,0 +1,218 @@
+# app/services/exports.py
+"""
+Streaming NDJSON / CSV exports.
+
+Export endpoints build one select ordered by the exported record (a question,
+a test session) and hand it to `export_response`. Its rows are fetched
+EXPORT_BATCH_SIZE at a time from a server-side cursor (see
+`stream_partitions`), grouped into records, encoded and sent as they come,
+optionally gzip compressed, so memory stays flat however large the export.
+
+Question exports use the import format of `POST /questions/bulk`, so an
+export can be imported again.
+"""
+import csv
+import enum
+import io
+import zlib
+from datetime import datetime
+from itertools import groupby
+from typing import AsyncIterator, Callable, Iterable, List, Optional, Sequence
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, func, select
+
+from app.database.async_database import stream_partitions
+from app.models.question import Option, Question
+from app.models.session import TestSession, UserResponse
+from app.models.user import User
+from app.utils.time_utils import json_serializer, normalize_to_utc
+
+EXPORT_BATCH_SIZE = 1000  # Rows fetched from the cursor per round trip
+
+QUESTION_FIELDS = (
+    "id", "question_text", "question_type", "subject", "difficulty_level", "tags", "explanation", "is_public"
+)
+SESSION_FIELDS = (
+    "session_id", "user_id", "username", "email", "started_at", "completed_at",
+    "score", "percentage", "correct_answers", "question_count"
+)
+RESPONSE_FIELDS = ("question_id", "selected_option_ids", "is_correct")
+
+class ExportFormat(str, enum.Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+}
+
+async def group_records(partitions: AsyncIterator[Sequence], key: Callable) -> AsyncIterator[List]:
+    """Consecutive rows with the same key, as lists; a group may span partitions"""
+    carried = []
+    async for partition in partitions:
+        rows = carried + list(partition)
+        groups = [list(group) for _, group in groupby(rows, key=key)]
+        # The last group may continue in the next partition
+        carried = groups.pop()
+        for group in groups:
+            yield group
+    if carried:
+        yield carried
+
+def question_export_statement() -> Select:
+    """Rows of questions with their options, one row per option; filter it like a select over Question"""
+    return (
+        select(*(getattr(Question, field) for field in QUESTION_FIELDS), Option.option_text, Option.is_correct)
+        .outerjoin(Option, Option.question_id == Question.id)
+        .order_by(Question.id, Option.id)
+    )
+
+def max_option_count(questions: Select) -> Select:
+    """Most options any of the questions of a filtered `select(Question.id)` has"""
+    counts = (
+        select(func.count(Option.id).label("count"))
+        .where(Option.question_id.in_(questions))
+        .group_by(Option.question_id)
+        .subquery()
+    )
+    return select(func.coalesce(func.max(counts.c.count), 0))
+
+def question_record(rows: List) -> dict:
+    record = {field: getattr(rows[0], field) for field in QUESTION_FIELDS}
+    record["options"] = [
+        {"option_text": row.option_text, "is_correct": row.is_correct}
+        for row in rows if row.option_text is not None
+    ]
+    return record
+
+def question_csv_header(option_count: int) -> List[str]:
+    return [*QUESTION_FIELDS, *(f"option_{n}" for n in range(1, option_count + 1)), "correct"]
+
+def question_csv_row(record: dict, option_count: int) -> list:
+    options = record["options"]
+    texts = [option["option_text"] for option in options]
+    return [
+        *(record[field] for field in QUESTION_FIELDS),
+        *texts, *[""] * (option_count - len(texts)),
+        ",".join(str(n) for n, option in enumerate(options, 1) if option["is_correct"])
+    ]
+
+def results_export_statement(test_id: int) -> Select:
+    """Rows of the completed sessions of a test with their responses, one row per response"""
+    return (
+        select(
+            TestSession.id.label("session_id"), TestSession.user_id, User.username, User.email,
+            TestSession.started_at, TestSession.completed_at, TestSession.score, TestSession.percentage,
+            TestSession.correct_answers, TestSession.question_count,
+            UserResponse.question_id, UserResponse.selected_option_id, UserResponse.selected_option_ids,
+            UserResponse.is_correct
+        )
+        .join(User, User.id == TestSession.user_id)
+        .outerjoin(UserResponse, UserResponse.test_session_id == TestSession.id)
+        .where(TestSession.test_id == test_id, TestSession.completed_at.isnot(None))
+        .order_by(TestSession.id, UserResponse.question_id)
+    )
+
+def _selected_option_ids(row) -> List[int]:
+    return row.selected_option_ids or [row.selected_option_id]
+
+def session_record(rows: List) -> dict:
+    record = {field: getattr(rows[0], field) for field in SESSION_FIELDS}
+    record["responses"] = [
+        {"question_id": row.question_id, "selected_option_ids": _selected_option_ids(row), "is_correct": row.is_correct}
+        for row in rows if row.question_id is not None
+    ]
+    return record
+
+def session_csv_rows(record: dict) -> Iterable[list]:
+    """One row per response, the session columns repeated; one row with empty response columns when there is none"""
+    session = [
+        normalize_to_utc(record[field]).isoformat() if isinstance(record[field], datetime) else record[field]
+        for field in SESSION_FIELDS
+    ]
+    if not record["responses"]:
+        yield session + [""] * len(RESPONSE_FIELDS)
+    for response in record["responses"]:
+        yield session + [
+            response["question_id"],
+            ",".join(str(option_id) for option_id in response["selected_option_ids"]),
+            response["is_correct"]
+        ]
+
+class _CsvEncoder:
+    def __init__(self):
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+
+    def encode(self, rows: Iterable[list]) -> bytes:
+        self.writer.writerows(rows)
+        text = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return text.encode("utf-8")
+
+async def encode_records(
+    records: AsyncIterator[dict],
+    format: ExportFormat,
+    csv_header: Optional[List[str]] = None,
+    csv_rows: Optional[Callable[[dict], Iterable[list]]] = None,
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> AsyncIterator[bytes]:
+    """Encoded records, about `batch_size` per chunk"""
+    encoder = _CsvEncoder()
+    if format == ExportFormat.CSV:
+        yield encoder.encode([csv_header])
+
+    batch = []
+
+    def encode_batch() -> bytes:
+        if format == ExportFormat.NDJSON:
+            return "".join(json_serializer(record) + "\n" for record in batch).encode("utf-8")
+        return encoder.encode(row for record in batch for row in csv_rows(record))
+
+    async for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield encode_batch()
+            batch = []
+    if batch:
+        yield encode_batch()
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def export_response(
+    statement: Select,
+    key: Callable,
+    to_record: Callable[[List], dict],
+    format: ExportFormat,
+    filename: str,
+    gzip: bool = False,
+    csv_header: Optional[List[str]] = None,
+    csv_rows: Optional[Callable[[dict], Iterable[list]]] = None
+) -> StreamingResponse:
+    """
+    Stream the records of an ordered select as an NDJSON or CSV download.
+
+    Rows with the same `key` form one record, built by `to_record`; CSV
+    exports write `csv_header`, then `csv_rows(record)` for every record.
+    """
+    records = (
+        to_record(rows)
+        async for rows in group_records(stream_partitions(statement, EXPORT_BATCH_SIZE), key)
+    )
+    body = encode_records(records, format, csv_header, csv_rows)
+    filename = f"{filename}.{format.value}"
+    media_type = MEDIA_TYPES[format]
+    if gzip:
+        body, filename, media_type = gzip_chunks(body), f"{filename}.gz", "application/gzip"
+    return StreamingResponse(
+        body, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,119 @@
+# app/services/grading.py
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.question import QuestionType
+from app.models.session import TestSession, UserResponse
+from app.services.answer_keys import AnswerKey, get_answer_key
+from app.services.results import encode_outcomes
+
+@dataclass(frozen=True)
+class GradedResponse:
+    question_id: int
+    selected_option_ids: FrozenSet[int]
+    is_correct: bool
+    marks_awarded: float
+
+@dataclass(frozen=True)
+class GradeResult:
+    score: float
+    correct_answers: int
+    question_count: int
+    responses: List[GradedResponse]
+    outcome_bitmap: bytes = b""  # Per-question outcomes in question order, see app.services.results
+
+def collect_selections(responses: Iterable) -> Dict[int, FrozenSet[int]]:
+    """
+    Merge submitted responses into the set of selected options per question.
+
+    Accepts `UserResponseCreate` items or `UserResponse` rows; several
+    responses for the same question are combined into one selection.
+    """
+    selections = {}
+    for response in responses:
+        selected = response.selected_option_ids or [response.selected_option_id]
+        selections.setdefault(response.question_id, set()).update(selected)
+    return {question_id: frozenset(selected) for question_id, selected in selections.items()}
+
+def grade_selections(answer_key: AnswerKey, selections: Dict[int, FrozenSet[int]]) -> GradeResult:
+    """
+    Score a whole submission against an answer key.
+
+    A question is correct when the selected options equal its correct options,
+    so multiple choice questions need every correct option and no wrong one.
+    Questions outside the test and options outside the question are ignored.
+    """
+    graded = []
+    for question_id, selected in selections.items():
+        entry = answer_key.questions.get(question_id)
+        if entry is None:
+            continue
+
+        selected = selected & entry.option_ids
+        if not selected:
+            continue
+
+        is_correct = selected == entry.correct_option_ids
+        graded.append(GradedResponse(
+            question_id=question_id,
+            selected_option_ids=selected,
+            is_correct=is_correct,
+            marks_awarded=entry.marks if is_correct else 0.0
+        ))
+
+    correct_question_ids = {response.question_id for response in graded if response.is_correct}
+    return GradeResult(
+        score=sum(response.marks_awarded for response in graded),
+        correct_answers=len(correct_question_ids),
+        question_count=answer_key.question_count,
+        responses=graded,
+        outcome_bitmap=encode_outcomes(
+            entry.question_id in correct_question_ids for entry in answer_key.ordered_entries
+        )
+    )
+
+def grade_test_session(
+    db: Session,
+    test_session: TestSession,
+    responses: Iterable,
+    answer_key: Optional[AnswerKey] = None
+) -> GradeResult:
+    """
+    Grade a test session and replace its stored responses with the graded ones.
+
+    Responses saved during the session are graded too; a submitted response
+    replaces the saved one for the same question. All rows are written with
+    one executemany INSERT. The caller updates the session and commits.
+    """
+    if answer_key is None:
+        answer_key = get_answer_key(db, test_session.test_id)
+
+    saved_responses = db.execute(
+        select(UserResponse).where(UserResponse.test_session_id == test_session.id)
+    ).scalars().all()
+    selections = collect_selections(saved_responses)
+    selections.update(collect_selections(responses))
+
+    result = grade_selections(answer_key, selections)
+
+    db.execute(delete(UserResponse).where(UserResponse.test_session_id == test_session.id))
+    if result.responses:
+        db.execute(insert(UserResponse), [
+            {
+                "test_session_id": test_session.id,
+                "question_id": response.question_id,
+                "selected_option_id": min(response.selected_option_ids),
+                "selected_option_ids": (
+                    sorted(response.selected_option_ids)
+                    if answer_key.questions[response.question_id].question_type == QuestionType.MULTIPLE
+                    else None
+                ),
+                "is_correct": response.is_correct
+            }
+            for response in result.responses
+        ])
+
+    return result
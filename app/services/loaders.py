@@ -0,0 +1,19 @@
+# app/services/loaders.py
+"""
+Loader options for the ORM objects the routers serialise.
+
+Relationships a response schema reads are eager loaded with the query that
+fetches the page; every other relationship raises when touched. In sync
+database mode a forgotten relationship would otherwise lazy load once per
+row while the response is serialised, so it fails loudly in the tests
+instead.
+"""
+from sqlalchemy.orm import raiseload, selectinload
+
+from app.models.question import Question
+
+# QuestionResponse: the question's columns and its options' columns
+QUESTION_RESPONSE_LOADERS = (
+    selectinload(Question.options).raiseload("*"),
+    raiseload("*"),
+)
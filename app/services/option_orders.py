@@ -0,0 +1,77 @@
+# app/services/option_orders.py
+import os
+import random
+from typing import List
+
+from dotenv import load_dotenv
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.session import TestSession, OptionOrder, OptionOrderMode
+from app.services.answer_keys import get_answer_key
+
+# Load environment variables
+load_dotenv()
+
+# How option orders of new sessions are kept:
+# - "stored" writes one option_orders row per option (the original behaviour)
+# - "seeded" writes nothing and derives the order from shuffle_seed on every read
+OPTION_ORDER_MODE = OptionOrderMode(os.getenv("OPTION_ORDER_MODE", OptionOrderMode.STORED.value))
+
+def shuffle_option_layout(layout, shuffle_seed: int, first_display_order: int = 0) -> List[dict]:
+    """
+    Shuffle the options of each question in memory.
+
+    `layout` holds (question_id, (option_id, ...)) pairs in question order,
+    as returned by `AnswerKey.option_layout`. Display orders of a question
+    count from `first_display_order`.
+
+    Every question gets its own generator seeded from the session seed and
+    the question id, so the result is identical in every process and a
+    question's order does not depend on the other questions in the test.
+    """
+    option_orders = []
+    for question_id, option_ids in layout:
+        shuffled_ids = list(option_ids)
+        random.Random(f"{shuffle_seed}:{question_id}").shuffle(shuffled_ids)
+        option_orders.extend(
+            {"question_id": question_id, "option_id": option_id, "display_order": display_order}
+            for display_order, option_id in enumerate(shuffled_ids, first_display_order)
+        )
+    return option_orders
+
+def create_option_orders(db: Session, test_session: TestSession, first_display_order: int = 0) -> List[dict]:
+    """
+    Build the shuffled option order for a new, flushed test session.
+
+    In stored mode all `option_orders` rows are written with one executemany
+    INSERT, so the statement count does not grow with the number of
+    questions. In seeded mode nothing is written. The caller commits.
+    """
+    layout = get_answer_key(db, test_session.test_id).option_layout
+    option_orders = shuffle_option_layout(layout, test_session.shuffle_seed, first_display_order)
+    if test_session.option_order_mode == OptionOrderMode.SEEDED:
+        return option_orders
+
+    if option_orders:
+        db.execute(
+            insert(OptionOrder),
+            [{"test_session_id": test_session.id, **order} for order in option_orders]
+        )
+    return option_orders
+
+def get_option_orders(db: Session, test_session: TestSession) -> List[dict]:
+    """
+    Return the option order of an existing test session.
+
+    Seeded sessions are derived from their seed; stored sessions, including
+    those created before modes existed, are read from `option_orders`.
+    """
+    if test_session.option_order_mode == OptionOrderMode.SEEDED:
+        layout = get_answer_key(db, test_session.test_id).option_layout
+        return shuffle_option_layout(layout, test_session.shuffle_seed)
+
+    return [
+        {"question_id": order.question_id, "option_id": order.option_id, "display_order": order.display_order}
+        for order in test_session.option_orders
+    ]
@@ -0,0 +1,82 @@
+# app/services/pagination.py
+"""
+Offset and keyset pagination for the list endpoints.
+
+Offset pagination (`skip`/`limit`) stays the default. `pagination=cursor`
+(or passing a `cursor`) switches an endpoint to keyset pagination: rows are
+ordered by their id and each page starts after the last id of the previous
+one, so every page costs one index range scan however deep it is. Keyset
+responses are wrapped as `{"items": [...], "next_cursor": "..."}`;
+`next_cursor` is null on the last page.
+"""
+import base64
+import binascii
+import enum
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Union
+
+from fastapi import HTTPException, Query
+from sqlalchemy import Select
+
+class Pagination(str, enum.Enum):
+    OFFSET = "offset"  # skip/limit, plain list response
+    CURSOR = "cursor"  # Keyset on id, {"items", "next_cursor"} response
+
+def encode_cursor(last_id: int) -> str:
+    """Opaque cursor pointing after the row with id `last_id`"""
+    payload = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+def decode_cursor(cursor: str) -> int:
+    """Id a cursor points after; raises ValueError for cursors this module did not issue"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        last_id = payload["id"]
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError, KeyError, TypeError) as error:
+        raise ValueError("Malformed cursor") from error
+    if not isinstance(last_id, int) or isinstance(last_id, bool):
+        raise ValueError("Malformed cursor")
+    return last_id
+
+@dataclass
+class PageParams:
+    skip: int
+    limit: int
+    keyset: bool
+    after_id: Optional[int] = None
+
+    def paginate(self, query: Select, key_column) -> Select:
+        """Apply the page window to `query`, ordered by `key_column` (the id column of the listed model)"""
+        if not self.keyset:
+            # Append the key so pages are stable even when earlier orderings tie
+            return query.order_by(key_column).offset(self.skip).limit(self.limit)
+        # Keyset pages are in id order; drop any relevance ordering
+        query = query.order_by(None).order_by(key_column)
+        if self.after_id is not None:
+            query = query.where(key_column > self.after_id)
+        # One extra row tells whether there is a next page
+        return query.limit(self.limit + 1)
+
+    def response(self, rows: List[Any]) -> Union[List[Any], Dict[str, Any]]:
+        """Response body for the rows fetched with `paginate`"""
+        if not self.keyset:
+            return rows
+        items = rows[:self.limit]
+        next_cursor = encode_cursor(items[-1].id) if len(rows) > self.limit else None
+        return {"items": items, "next_cursor": next_cursor}
+
+def page_params(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1),
+    pagination: Pagination = Pagination.OFFSET,
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; implies pagination=cursor")
+) -> PageParams:
+    """Dependency reading the pagination query parameters of a list endpoint"""
+    if cursor is None:
+        return PageParams(skip=skip, limit=limit, keyset=pagination == Pagination.CURSOR)
+    try:
+        after_id = decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return PageParams(skip=skip, limit=limit, keyset=True, after_id=after_id)
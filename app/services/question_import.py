@@ -0,0 +1,169 @@
+# app/services/question_import.py
+"""
+Bulk question import.
+
+`POST /questions/bulk` reads its upload as a stream of records, NDJSON (one
+`QuestionCreate` object per line) or CSV, without holding the body in
+memory. Every record is validated with the `QuestionCreate` rules; valid ones
+are inserted IMPORT_CHUNK_SIZE at a time with one executemany INSERT ...
+RETURNING for the questions, one for their options and one for their tags,
+and each chunk is committed on its own. Invalid records are reported by
+record number and skipped; they never abort the import.
+
+CSV columns are the QuestionCreate fields (`question_text`, `question_type`,
+`subject`, `difficulty_level`, `tags`, `explanation`, `is_public`), the option
+texts in `option_1`, `option_2`, ... and in `correct` the numbers of the
+correct options, comma separated (e.g. `2` or `1,3`). Empty cells take the
+field's default.
+"""
+import codecs
+import csv
+import enum
+import json
+from typing import AsyncIterator, List, Optional, Tuple, Union
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.question import Option, Question
+from app.schemas.question.question_schemas import QuestionCreate, QuestionImportError
+from app.services.tags import add_question_tags
+
+IMPORT_CHUNK_SIZE = 1000  # Valid records inserted and committed together
+MAX_REPORTED_ERRORS = 1000  # Failed records listed in the result; the rest are only counted
+
+class ImportFormat(str, enum.Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+def import_format(content_type: Optional[str]) -> Optional[ImportFormat]:
+    """Format of an upload from its Content-Type, None when not recognised"""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        return ImportFormat.NDJSON
+    if media_type in ("text/csv", "application/csv"):
+        return ImportFormat.CSV
+    return None
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """UTF-8 lines (with their line ending) of a byte stream, a leading BOM dropped"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        # Split on \n only: JSON strings may hold other characters str.splitlines() breaks on
+        *lines, pending = (pending + decoder.decode(chunk)).split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+def _csv_question(record: dict) -> dict:
+    """QuestionCreate data of a CSV record"""
+    data = {
+        name: value for name, value in record.items()
+        if name and value not in (None, "") and not name.startswith("option_") and name != "correct"
+    }
+    correct = {number.strip() for number in (record.get("correct") or "").split(",")}
+    option_columns = sorted(
+        (name for name in record if name and name.startswith("option_") and name[len("option_"):].isdigit()),
+        key=lambda name: int(name[len("option_"):])
+    )
+    data["options"] = [
+        {"option_text": record[name], "is_correct": name[len("option_"):] in correct}
+        for name in option_columns
+        if record[name] not in (None, "")
+    ]
+    return data
+
+async def iter_records(
+    lines: AsyncIterator[str],
+    format: ImportFormat
+) -> AsyncIterator[Tuple[int, Union[dict, str]]]:
+    """(record number, QuestionCreate data or parse error) of each record of an upload"""
+    row = 0
+    if format == ImportFormat.NDJSON:
+        async for line in lines:
+            if not line.strip():
+                continue
+            row += 1
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError as error:
+                yield row, f"Invalid JSON: {error}"
+                continue
+            yield row, data if isinstance(data, dict) else "Expected a JSON object"
+        return
+
+    header = None
+    record = ""
+    async for line in lines:
+        record += line
+        # A quoted field may span lines; quotes inside one are doubled, so a record ends on an even count
+        if record.count('"') % 2:
+            continue
+        if not record.strip():
+            record = ""
+            continue
+        values = next(csv.reader([record]))
+        record = ""
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row += 1
+        if len(values) > len(header):
+            yield row, f"Expected at most {len(header)} columns, got {len(values)}"
+            continue
+        yield row, _csv_question(dict(zip(header, values)))
+    if record.strip():
+        yield row + 1, "Unterminated quoted field"
+
+def _validation_errors(error: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}" if detail["loc"] else detail["msg"]
+        for detail in error.errors()
+    ]
+
+def import_questions(
+    db: Session,
+    records: List[Tuple[int, Union[dict, str]]],
+    created_by: int
+) -> Tuple[int, List[QuestionImportError]]:
+    """
+    Validate and insert a chunk of records, then commit.
+
+    Returns:
+        Tuple[int, List[QuestionImportError]]: Questions imported, errors of the invalid records
+    """
+    questions, errors = [], []
+    for row, data in records:
+        if isinstance(data, str):
+            errors.append(QuestionImportError(row=row, errors=[data]))
+            continue
+        try:
+            questions.append(QuestionCreate.model_validate(data))
+        except ValidationError as error:
+            errors.append(QuestionImportError(row=row, errors=_validation_errors(error)))
+    if not questions:
+        return 0, errors
+
+    # SQLAlchemy falls back to one INSERT per row for ordered RETURNING on SQLite. Its single
+    # writer numbers the rows of a multi-row INSERT in order, so sorted ids match the rows there.
+    sqlite = db.get_bind().dialect.name == "sqlite"
+    question_ids = db.execute(
+        insert(Question).returning(Question.id, sort_by_parameter_order=not sqlite),
+        [{**question.model_dump(exclude={"options"}), "created_by": created_by} for question in questions]
+    ).scalars().all()
+    if sqlite:
+        question_ids.sort()
+    db.execute(insert(Option), [
+        {**option.model_dump(), "question_id": question_id}
+        for question_id, question in zip(question_ids, questions)
+        for option in question.options
+    ])
+    add_question_tags(db, {
+        question_id: question.tags for question_id, question in zip(question_ids, questions) if question.tags
+    })
+    db.commit()
+    return len(question_ids), errors
@@ -0,0 +1,80 @@
+# app/services/question_search.py
+"""
+Question bank search.
+
+`apply_question_search` narrows a Question query to the questions matching a
+search string and orders them by relevance. Every word of the search string
+must match the start of an indexed word, so results refine as the faculty UI
+types. The full-text backends use the index from
+app.models.question.search_index; QUESTION_SEARCH_MODE=ilike keeps the old
+substring scan, for comparison and for databases without a full-text index.
+"""
+import enum
+import os
+import re
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import Select, column, func, literal_column, or_, select, table
+
+from app.models.question import Question
+from app.models.question.search_index import SQLITE_FTS_TABLE, POSTGRES_SEARCH_COLUMN
+
+# Load environment variables
+load_dotenv()
+
+class SearchMode(str, enum.Enum):
+    FULLTEXT = "fulltext"  # FTS5 on SQLite, tsvector on PostgreSQL
+    ILIKE = "ilike"  # Substring match, scans the whole table
+
+QUESTION_SEARCH_MODE = SearchMode(os.getenv("QUESTION_SEARCH_MODE", SearchMode.FULLTEXT.value))
+
+_questions_fts = table(SQLITE_FTS_TABLE, column("rowid"))
+
+def search_terms(search: str) -> List[str]:
+    """Words of a search string, lowercased; punctuation never reaches the query parser"""
+    return re.findall(r"\w+", search.lower())
+
+def _ilike(query: Select, search: str) -> Select:
+    search_term = f"%{search}%"
+    return query.where(
+        or_(
+            Question.question_text.ilike(search_term),
+            Question.tags.ilike(search_term)
+        )
+    )
+
+def _sqlite_fulltext(query: Select, terms: List[str]) -> Select:
+    match = " ".join(f'"{term}"*' for term in terms)
+    fts = literal_column(SQLITE_FTS_TABLE)
+    hits = (
+        select(
+            _questions_fts.c.rowid.label("question_id"),
+            # bm25 is lower for better matches; question text weighs twice as much as tags
+            func.bm25(fts, 2.0, 1.0).label("rank")
+        )
+        .where(fts.op("MATCH")(match))
+        .subquery()
+    )
+    return query.join(hits, hits.c.question_id == Question.id).order_by(hits.c.rank, Question.id)
+
+def _postgres_fulltext(query: Select, terms: List[str]) -> Select:
+    tsquery = func.to_tsquery("english", " & ".join(f"{term}:*" for term in terms))
+    vector = literal_column(f"questions.{POSTGRES_SEARCH_COLUMN}")
+    return (
+        query.where(vector.op("@@")(tsquery))
+        .order_by(func.ts_rank_cd(vector, tsquery).desc(), Question.id)
+    )
+
+def apply_question_search(query: Select, search: str, dialect_name: str, mode: Optional[SearchMode] = None) -> Select:
+    """Filter a select of Question to `search` matches, best matches first"""
+    mode = mode or QUESTION_SEARCH_MODE
+    terms = search_terms(search)
+    if mode == SearchMode.ILIKE or not terms:
+        return _ilike(query, search)
+    if dialect_name == "sqlite":
+        return _sqlite_fulltext(query, terms)
+    if dialect_name == "postgresql":
+        return _postgres_fulltext(query, terms)
+    # No full-text index on other databases
+    return _ilike(query, search)
@@ -0,0 +1,122 @@
+# app/services/responses.py
+"""
+Autosaved responses of an ongoing test session.
+
+Responses are checked against the cached answer key of the test instead of
+the database, and written with one INSERT ... ON CONFLICT DO UPDATE on the
+unique (test_session_id, question_id) pair, so saving an answer costs one
+statement whether or not the question was answered before. Clients may number
+their saves (`client_sequence`); a save never replaces a newer one, so
+retried or reordered requests cannot bring back an old answer.
+"""
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models.session import UserResponse
+from app.services.answer_keys import AnswerKey
+
+def response_error(answer_key: AnswerKey, response) -> Optional[str]:
+    """Why a UserResponseCreate cannot be saved for the test of `answer_key`, or None if it can"""
+    entry = answer_key.questions.get(response.question_id)
+    if entry is None:
+        return "Question does not belong to this test"
+    selected_option_ids = set(response.selected_option_ids or [response.selected_option_id])
+    if not selected_option_ids <= entry.option_ids:
+        return "Invalid option for the question"
+    return None
+
+def response_row(response) -> dict:
+    """Column values of a UserResponseCreate"""
+    return {
+        "question_id": response.question_id,
+        "selected_option_id": response.selected_option_id,
+        "selected_option_ids": response.selected_option_ids,
+        "client_sequence": response.client_sequence
+    }
+
+def supersedes(new_sequence: Optional[int], saved_sequence: Optional[int]) -> bool:
+    """Whether a save with `new_sequence` replaces one with `saved_sequence`"""
+    # Saves without a sequence always win, as before sequences existed
+    return new_sequence is None or saved_sequence is None or new_sequence > saved_sequence
+
+def latest_per_question(responses: List) -> Dict[int, int]:
+    """
+    Index of the response that wins for each question of a batch.
+
+    The highest client_sequence wins; without sequences (or on ties) the later item does.
+    """
+    latest = {}
+    for index, response in enumerate(responses):
+        current = latest.get(response.question_id)
+        if (
+            current is None
+            or response.client_sequence == responses[current].client_sequence
+            or supersedes(response.client_sequence, responses[current].client_sequence)
+        ):
+            latest[response.question_id] = index
+    return latest
+
+def _upsert_one_by_one(db: Session, test_session_id: int, rows: List[dict]) -> Set[int]:
+    saved = {
+        question_id: (response_id, client_sequence)
+        for question_id, response_id, client_sequence in db.execute(
+            select(UserResponse.question_id, UserResponse.id, UserResponse.client_sequence).where(
+                UserResponse.test_session_id == test_session_id,
+                UserResponse.question_id.in_([row["question_id"] for row in rows])
+            )
+        ).all()
+    }
+    written = set()
+    for row in rows:
+        if row["question_id"] not in saved:
+            db.execute(insert(UserResponse).values(test_session_id=test_session_id, **row))
+        elif supersedes(row["client_sequence"], saved[row["question_id"]][1]):
+            db.execute(update(UserResponse).where(UserResponse.id == saved[row["question_id"]][0]).values(**row))
+        else:
+            continue
+        written.add(row["question_id"])
+    return written
+
+def upsert_responses(db: Session, test_session_id: int, responses: Iterable[dict]) -> Set[int]:
+    """
+    Insert or replace the saved responses of a session (rows as built by `response_row`, no commit).
+
+    Rows must have distinct question ids. A row does not replace a saved
+    response with a higher client_sequence. PostgreSQL and SQLite write all
+    rows with one statement; other databases fall back to a read and one
+    write per row.
+
+    Returns:
+        Set[int]: Question ids whose response was written
+    """
+    rows = list(responses)
+    if not rows:
+        return set()
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        statement = postgresql_insert(UserResponse)
+    elif dialect == "sqlite":
+        statement = sqlite_insert(UserResponse)
+    else:
+        return _upsert_one_by_one(db, test_session_id, rows)
+    saved_sequence = UserResponse.__table__.c.client_sequence
+    statement = statement.values(
+        [{"test_session_id": test_session_id, **row} for row in rows]
+    ).on_conflict_do_update(
+        index_elements=[UserResponse.test_session_id, UserResponse.question_id],
+        set_={
+            "selected_option_id": statement.excluded.selected_option_id,
+            "selected_option_ids": statement.excluded.selected_option_ids,
+            "client_sequence": statement.excluded.client_sequence
+        },
+        where=or_(
+            statement.excluded.client_sequence.is_(None),
+            saved_sequence.is_(None),
+            statement.excluded.client_sequence > saved_sequence
+        )
+    ).returning(UserResponse.question_id)
+    return set(db.execute(statement).scalars())
@@ -0,0 +1,56 @@
+# app/services/results.py
+"""
+Results of completed test sessions.
+
+Submitting a test stores its whole result on the test session: score,
+correct answers, question count, percentage and a bitmap of per-question
+outcomes. Result pages then read one row per session (joined to its test)
+and never recount responses or test questions.
+"""
+from typing import Iterable, List, Optional
+
+from app.models.session import TestSession
+from app.models.test import Test
+from app.schemas.session.session_schemas import TestResultsSummary
+
+def encode_outcomes(outcomes: Iterable[bool]) -> bytes:
+    """Pack per-question outcomes, in question order, into a bitmap (bit i of byte i // 8, least significant first)"""
+    bitmap = bytearray()
+    for index, is_correct in enumerate(outcomes):
+        if index % 8 == 0:
+            bitmap.append(0)
+        if is_correct:
+            bitmap[-1] |= 1 << (index % 8)
+    return bytes(bitmap)
+
+def decode_outcomes(bitmap: Optional[bytes], question_count: int) -> Optional[List[bool]]:
+    """Per-question outcomes of a bitmap made by `encode_outcomes`; None for sessions graded before bitmaps"""
+    if bitmap is None:
+        return None
+    return [bool(bitmap[index // 8] >> (index % 8) & 1) for index in range(question_count)]
+
+def percentage(score: float, total_marks: int) -> float:
+    return (score / total_marks) * 100 if total_marks > 0 else 0
+
+def store_results(test_session: TestSession, total_marks: int, result) -> None:
+    """Copy a GradeResult onto the test session (the caller sets completed_at and commits)"""
+    test_session.score = result.score
+    test_session.correct_answers = result.correct_answers
+    test_session.question_count = result.question_count
+    test_session.percentage = percentage(result.score, total_marks)
+    test_session.outcome_bitmap = result.outcome_bitmap
+
+def results_summary(test_session: TestSession, test: Test) -> TestResultsSummary:
+    """Result summary of a completed session from its stored results"""
+    return TestResultsSummary(
+        test_id=test.id,
+        test_title=test.title,
+        total_marks=test.total_marks,
+        score=test_session.score,
+        percentage=test_session.percentage,
+        completed_at=test_session.completed_at,
+        duration_minutes=test.duration_minutes,
+        question_count=test_session.question_count,
+        correct_answers=test_session.correct_answers,
+        question_outcomes=decode_outcomes(test_session.outcome_bitmap, test_session.question_count)
+    )
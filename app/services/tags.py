@@ -0,0 +1,107 @@
+# app/services/tags.py
+"""
+Normalised question tags.
+
+`Question.tags` stays the comma separated string the API accepts and
+returns; every write also stores its parsed tags as `question_tags` rows,
+which the tag filter and the facet counts query through their indexes.
+"""
+import enum
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import Select, delete, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models.question import Question, Tag, question_tags
+
+class TagMatch(str, enum.Enum):
+    ALL = "all"  # Questions having every requested tag
+    ANY = "any"  # Questions having at least one requested tag
+
+def parse_tags(value: Optional[str]) -> List[str]:
+    """Split a comma separated tag string into distinct, lowercased tag names"""
+    names = []
+    for name in (value or "").split(","):
+        name = name.strip().lower()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+def parse_tag_filter(values: Optional[Iterable[str]]) -> List[str]:
+    """Tag names of a `tags=` query parameter, given repeated and/or comma separated"""
+    names = []
+    for value in values or []:
+        names.extend(name for name in parse_tags(value) if name not in names)
+    return names
+
+def _insert_ignoring_duplicates(db: Session, names: List[str]) -> None:
+    dialect = db.get_bind().dialect.name
+    rows = [{"name": name} for name in names]
+    if dialect == "postgresql":
+        db.execute(postgresql_insert(Tag).on_conflict_do_nothing(index_elements=["name"]), rows)
+    elif dialect == "sqlite":
+        db.execute(sqlite_insert(Tag).on_conflict_do_nothing(index_elements=["name"]), rows)
+    else:
+        db.execute(insert(Tag), rows)
+
+def get_tag_ids(db: Session, names: List[str]) -> Dict[str, int]:
+    """Ids of the named tags, creating the missing ones"""
+    if not names:
+        return {}
+    tag_ids = dict(db.execute(select(Tag.name, Tag.id).where(Tag.name.in_(names))).all())
+    missing = [name for name in names if name not in tag_ids]
+    if missing:
+        # Concurrent writers may create the same tag; the unique name makes that a no-op
+        _insert_ignoring_duplicates(db, missing)
+        tag_ids.update(db.execute(select(Tag.name, Tag.id).where(Tag.name.in_(missing))).all())
+    return tag_ids
+
+def set_question_tags(db: Session, question_id: int, value: Optional[str]) -> None:
+    """Replace the question_tags rows of a question with the tags of `value` (no commit)"""
+    tag_ids = get_tag_ids(db, parse_tags(value))
+    db.execute(delete(question_tags).where(question_tags.c.question_id == question_id))
+    if tag_ids:
+        db.execute(insert(question_tags), [
+            {"question_id": question_id, "tag_id": tag_id} for tag_id in tag_ids.values()
+        ])
+
+def add_question_tags(db: Session, tags_by_question: Dict[int, Optional[str]]) -> None:
+    """Store the tags of new questions (no question_tags rows yet) in one batch (no commit)"""
+    parsed = {question_id: parse_tags(value) for question_id, value in tags_by_question.items()}
+    tag_ids = get_tag_ids(db, list(dict.fromkeys(name for names in parsed.values() for name in names)))
+    rows = [
+        {"question_id": question_id, "tag_id": tag_ids[name]}
+        for question_id, names in parsed.items()
+        for name in names
+    ]
+    if rows:
+        db.execute(insert(question_tags), rows)
+
+def apply_tag_filter(query: Select, names: List[str], match: TagMatch = TagMatch.ALL) -> Select:
+    """Filter a select of Question to questions with all (or any) of the named tags"""
+    if not names:
+        return query
+    tagged = (
+        select(question_tags.c.question_id)
+        .join(Tag, Tag.id == question_tags.c.tag_id)
+        .where(Tag.name.in_(names))
+    )
+    if match == TagMatch.ALL:
+        tagged = tagged.group_by(question_tags.c.question_id).having(
+            func.count(question_tags.c.tag_id) == len(names)
+        )
+    return query.where(Question.id.in_(tagged))
+
+def tag_facets(question_ids: Select, limit: int = 50) -> Select:
+    """Tags of the selected questions with the number of questions having each, most used first"""
+    question_count = func.count(question_tags.c.question_id).label("count")
+    return (
+        select(Tag.name.label("tag"), question_count)
+        .join(question_tags, question_tags.c.tag_id == Tag.id)
+        .where(question_tags.c.question_id.in_(question_ids))
+        .group_by(Tag.id, Tag.name)
+        .order_by(question_count.desc(), Tag.name)
+        .limit(limit)
+    )
@@ -0,0 +1,262 @@
+# app/utils/instrumentation.py
+"""
+Per-route request instrumentation.
+
+`InstrumentationMiddleware` opens a RequestMetrics for every HTTP request
+and keeps it in a context variable. The cursor hooks of every instrumented
+engine add each statement and its duration to the current request's
+metrics, whether the statement ran on the event loop, on the threadpool or
+in an async driver's greenlet. `InstrumentedRoute` records the route
+template and when the endpoint returned, so validating and encoding the
+response is timed on its own.
+
+When the request finishes its metrics are added to the per-route totals of
+this worker process, which `/metrics` serves in the Prometheus text format.
+With SERVER_TIMING on (it follows DEBUG by default) each response also
+carries a `Server-Timing` header with its DB, serialisation and total time.
+"""
+import functools
+import inspect
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+
+# Load environment variables
+load_dotenv()
+
+SERVER_TIMING = os.getenv("SERVER_TIMING", os.getenv("DEBUG", "False")).lower() == "true"
+
+# Upper bounds of the request latency (seconds) and statements per request histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+UNMATCHED_ROUTE = "<unmatched>"  # Requests no route handled (404s), kept in one series
+
+@dataclass
+class RequestMetrics:
+    started: float
+    route: str = UNMATCHED_ROUTE
+    statements: int = 0
+    db_seconds: float = 0.0
+    endpoint_done: Optional[float] = None
+    handler_done: Optional[float] = None
+
+    @property
+    def serialization_seconds(self) -> float:
+        """Time from the endpoint returning to its response being rendered"""
+        if self.endpoint_done is None or self.handler_done is None:
+            return 0.0
+        return max(self.handler_done - self.endpoint_done, 0.0)
+
+_current_request: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+
+def current_request_metrics() -> Optional[RequestMetrics]:
+    return _current_request.get()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_request.get() is not None:
+        conn.info.setdefault("statement_started", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    metrics = _current_request.get()
+    started = conn.info.get("statement_started")
+    if metrics is None or not started:
+        return
+    metrics.statements += 1
+    metrics.db_seconds += time.perf_counter() - started.pop()
+
+def instrument_engine(engine) -> None:
+    """Count and time the statements a (sync) engine runs for the current request"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+def _histogram(bounds: Tuple[float, ...]) -> List[int]:
+    return [0] * (len(bounds) + 1)
+
+def _observe(buckets: List[int], bounds: Tuple[float, ...], value: float) -> None:
+    buckets[next((i for i, bound in enumerate(bounds) if value <= bound), len(bounds))] += 1
+
+class RouteMetrics:
+    """Totals of the requests of one method and route template"""
+
+    def __init__(self):
+        self.statuses: Dict[int, int] = {}
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.serialization_seconds = 0.0
+        self.latency_seconds = 0.0
+        self.latency_buckets = _histogram(LATENCY_BUCKETS)
+        self.statement_buckets = _histogram(STATEMENT_BUCKETS)
+
+    @property
+    def requests(self) -> int:
+        return sum(self.statuses.values())
+
+class MetricsRegistry:
+    """Per-route totals of this worker process"""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._routes: Dict[Tuple[str, str], RouteMetrics] = {}
+
+    def record(self, method: str, status: int, metrics: RequestMetrics, latency: float) -> None:
+        with self._lock:
+            route = self._routes.setdefault((method, metrics.route), RouteMetrics())
+            route.statuses[status] = route.statuses.get(status, 0) + 1
+            route.statements += metrics.statements
+            route.db_seconds += metrics.db_seconds
+            route.serialization_seconds += metrics.serialization_seconds
+            route.latency_seconds += latency
+            _observe(route.latency_buckets, LATENCY_BUCKETS, latency)
+            _observe(route.statement_buckets, STATEMENT_BUCKETS, metrics.statements)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+    def route(self, method: str, route: str) -> Optional[RouteMetrics]:
+        with self._lock:
+            return self._routes.get((method, route))
+
+    def render(self) -> str:
+        """The totals in the Prometheus text exposition format"""
+        lines = []
+
+        def family(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def histogram(name: str, labels: str, bounds: Tuple[float, ...], buckets: List[int], total: float) -> None:
+            cumulative = 0
+            for bound, count in zip(bounds, buckets):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulative + buckets[-1]}')
+            lines.append(f"{name}_sum{{{labels}}} {total}")
+            lines.append(f"{name}_count{{{labels}}} {cumulative + buckets[-1]}")
+
+        with self._lock:
+            routes = sorted(self._routes.items())
+            family("http_requests_total", "counter", "Requests handled, by route and status.")
+            for (method, route), totals in routes:
+                for status, count in sorted(totals.statuses.items()):
+                    lines.append(
+                        f'http_requests_total{{{_labels(method, route)},status="{status}"}} {count}'
+                    )
+            family("http_request_duration_seconds", "histogram", "Request latency until the response is sent.")
+            for (method, route), totals in routes:
+                histogram(
+                    "http_request_duration_seconds", _labels(method, route),
+                    LATENCY_BUCKETS, totals.latency_buckets, totals.latency_seconds
+                )
+            family("http_request_db_statements", "histogram", "SQL statements per request.")
+            for (method, route), totals in routes:
+                histogram(
+                    "http_request_db_statements", _labels(method, route),
+                    STATEMENT_BUCKETS, totals.statement_buckets, totals.statements
+                )
+            family("http_request_db_seconds_total", "counter", "Time spent executing SQL statements.")
+            for (method, route), totals in routes:
+                lines.append(f"http_request_db_seconds_total{{{_labels(method, route)}}} {totals.db_seconds}")
+            family(
+                "http_request_serialization_seconds_total", "counter",
+                "Time spent validating and encoding responses."
+            )
+            for (method, route), totals in routes:
+                lines.append(
+                    f"http_request_serialization_seconds_total{{{_labels(method, route)}}} {totals.serialization_seconds}"
+                )
+        return "\n".join(lines) + "\n"
+
+def _labels(method: str, route: str) -> str:
+    route = route.replace("\\", "\\\\").replace('"', '\\"')
+    return f'method="{method}",route="{route}"'
+
+metrics_registry = MetricsRegistry()
+
+def server_timing(metrics: RequestMetrics, now: float) -> str:
+    return (
+        f'db;dur={metrics.db_seconds * 1000:.2f};desc="{metrics.statements} statements", '
+        f"serialize;dur={metrics.serialization_seconds * 1000:.2f}, "
+        f"total;dur={(now - metrics.started) * 1000:.2f}"
+    )
+
+class InstrumentationMiddleware:
+    """ASGI middleware recording the metrics of every HTTP request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = RequestMetrics(started=time.perf_counter())
+        token = _current_request.set(metrics)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if SERVER_TIMING:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", server_timing(metrics, time.perf_counter()).encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_request.reset(token)
+            metrics_registry.record(scope["method"], status, metrics, time.perf_counter() - metrics.started)
+
+def _mark_endpoint_done() -> None:
+    metrics = _current_request.get()
+    if metrics is not None:
+        metrics.endpoint_done = time.perf_counter()
+
+class InstrumentedRoute(APIRoute):
+    """APIRoute that records its route template and when its endpoint returned"""
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, endpoint, **kwargs)
+        call = self.dependant.call
+        # The request handler awaits or threads the endpoint as it was declared, so keep its kind
+        if inspect.iscoroutinefunction(call):
+            @functools.wraps(call)
+            async def timed_endpoint(*args, **kwargs):
+                try:
+                    return await call(*args, **kwargs)
+                finally:
+                    _mark_endpoint_done()
+        else:
+            @functools.wraps(call)
+            def timed_endpoint(*args, **kwargs):
+                try:
+                    return call(*args, **kwargs)
+                finally:
+                    _mark_endpoint_done()
+        self.dependant.call = timed_endpoint
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        route = self.path_format
+
+        async def instrumented_handler(request):
+            metrics = _current_request.get()
+            if metrics is not None:
+                metrics.route = route
+            response = await handler(request)
+            if metrics is not None:
+                metrics.handler_done = time.perf_counter()
+            return response
+        return instrumented_handler
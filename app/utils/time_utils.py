@@ -53,10 +53,13 @@ def json_serializer(obj: Any) -> str:
     Returns:
         str: JSON serialized string
     """
-    if isinstance(obj, datetime):
-        # Always serialize in UTC
-        return normalize_to_utc(obj).isoformat()
-    raise TypeError(f"Type {type(obj)} not serializable")
+    def datetime_encoder(value):
+        if isinstance(value, datetime):
+            # Always serialize in UTC
+            return normalize_to_utc(value).isoformat()
+        raise TypeError(f"Type {type(value)} not serializable")
+    
+    return json.dumps(obj, default=datetime_encoder)
 
 def json_deserializer(json_str: str) -> Any:
     """
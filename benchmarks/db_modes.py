@@ -0,0 +1,112 @@
+# benchmarks/db_modes.py
+"""
+Database mode load test.
+
+Runs the same concurrent request mix against the app in each database mode
+(DATABASE_MODE=sync, every statement on the threadpool, and DATABASE_MODE=async,
+the aiosqlite / asyncpg engine) and reports throughput and latency per mode.
+
+Usage:
+    python -m benchmarks.db_modes [--requests 2000] [--concurrency 50] [--database-url sqlite:///./benchmark.db]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.login_storm import percentile
+
+async def seed(client):
+    """Create a faculty member, a student, a test and an open session; returns the request mix"""
+    for role in ("faculty", "student"):
+        response = await client.post("/auth/register", json={
+            "email": f"modes_{role}@example.com",
+            "username": f"modes_{role}",
+            "password": "password",
+            "role": role
+        })
+        assert response.status_code in (201, 400)
+
+    headers = {}
+    for role in ("faculty", "student"):
+        response = await client.post("/auth/token", data={"username": f"modes_{role}", "password": "password"})
+        headers[role] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    question_ids = []
+    for i in range(10):
+        response = await client.post("/questions/", json={
+            "question_text": f"Benchmark question {i}?",
+            "is_public": True,
+            "options": [{"option_text": f"Option {n}", "is_correct": n == 0} for n in range(4)]
+        }, headers=headers["faculty"])
+        question_ids.append(response.json()["id"])
+
+    response = await client.post("/tests/", json={
+        "title": "Database mode benchmark", "total_marks": len(question_ids), "duration_minutes": 60
+    }, headers=headers["faculty"])
+    test_id = response.json()["id"]
+    for question_id in question_ids:
+        await client.post(f"/tests/{test_id}/questions/", json={"question_id": question_id, "marks": 1.0}, headers=headers["faculty"])
+
+    response = await client.post("/test-sessions/", json={"test_id": test_id}, headers=headers["student"])
+    session_id = response.json()["id"]
+
+    return [
+        ("GET", "/questions/", headers["faculty"]),
+        ("GET", f"/tests/{test_id}", headers["student"]),
+        ("GET", f"/test-sessions/{session_id}", headers["student"]),
+        ("GET", "/test-sessions/active", headers["student"]),
+    ]
+
+async def run_mode(client, mix, args):
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def request(i):
+        method, url, headers = mix[i % len(mix)]
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.request(method, url, headers=headers)
+            assert response.status_code == 200, (url, response.status_code)
+            return time.perf_counter() - started
+
+    # Warm up connections and caches
+    await asyncio.gather(*(request(i) for i in range(len(mix) * 2)))
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(request(i) for i in range(args.requests)))
+    return latencies, time.perf_counter() - started
+
+async def run(args):
+    import httpx
+    from app.main import app, lifespan
+    from app.database import async_database
+    from app.database.async_database import DatabaseMode
+
+    transport = httpx.ASGITransport(app=app)
+    async with lifespan(app), httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        mix = await seed(client)
+        for mode in DatabaseMode:
+            async_database.DATABASE_MODE = mode
+            latencies, seconds = await run_mode(client, mix, args)
+            print(
+                f"{mode.value:<6} {len(latencies) / seconds:8.1f} req/s  "
+                f"p50={percentile(latencies, 50) * 1000:7.1f}ms "
+                f"p95={percentile(latencies, 95) * 1000:7.1f}ms "
+                f"p99={percentile(latencies, 99) * 1000:7.1f}ms"
+            )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per mode")
+    parser.add_argument("--concurrency", type=int, default=50, help="Requests in flight at once")
+    parser.add_argument("--database-url", default="sqlite:///./benchmark.db")
+    args = parser.parse_args()
+
+    # Configure the app before it is imported; the benchmark database starts empty
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["DB_RESET_ON_STARTUP"] = "true"
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
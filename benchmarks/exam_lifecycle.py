@@ -0,0 +1,314 @@
+# benchmarks/exam_lifecycle.py
+"""
+Exam lifecycle load test.
+
+Seeds a synthetic institution with bulk inserts (--faculty members, --students
+students, a bank of --questions questions with four options each and --tests
+tests of --test-questions questions each), then has every student, up to
+--concurrency at a time, log in, start a session of one of the tests, autosave
+--autosaves answers, submit the rest and fetch the results, all against the
+ASGI app in-process. Reports the throughput and, per endpoint, p50/p95/p99
+latency and SQL statements per request (from the app's route metrics).
+
+Each run is compared with the baseline stored for the same scenario (sizes,
+concurrency and DATABASE_MODE) in benchmarks/baselines/exam_lifecycle.json:
+more statements per request than the baseline, or a p95 or throughput worse
+than the baseline by more than --tolerance, fails the run with exit status 1.
+--save-baseline stores the run as the scenario's new baseline instead.
+Statement counts hold on any machine; latency baselines only on the kind of
+machine that recorded them.
+
+Usage:
+    python -m benchmarks.exam_lifecycle [--faculty 10] [--students 200] [--questions 500] [--tests 5] [--test-questions 20] [--autosaves 10] [--concurrency 20] [--tolerance 0.5] [--save-baseline] [--database-url sqlite:///./benchmark.db]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from benchmarks.login_storm import percentile
+
+BASELINES_PATH = Path(__file__).parent / "baselines" / "exam_lifecycle.json"
+PASSWORD = "password"
+
+# Steps of one student's exam, in order, with the route serving each
+ENDPOINTS = {
+    "login": ("POST", "/auth/token"),
+    "start": ("POST", "/test-sessions/"),
+    "autosave": ("POST", "/test-sessions/{session_id}/save-response"),
+    "submit": ("POST", "/test-sessions/{session_id}/submit"),
+    "results": ("GET", "/test-sessions/{session_id}/results"),
+}
+
+# Mean statements per request may rise this much before failing: answer key cache misses vary between runs
+STATEMENT_SLACK = 0.1
+
+@dataclass(frozen=True)
+class Scenario:
+    faculty: int
+    students: int
+    questions: int
+    tests: int
+    test_questions: int
+    autosaves: int
+    concurrency: int
+    database_mode: str
+
+    @property
+    def key(self) -> str:
+        return ",".join(f"{name}={value}" for name, value in asdict(self).items())
+
+@dataclass
+class Institution:
+    student_usernames: List[str]
+    # Per test id, (question id, correct option id, wrong option id) of each of its questions
+    tests: Dict[int, List[Tuple[int, int, int]]]
+
+def seed_institution(db, scenario: Scenario, hashed_password: str, prefix: str = "lifecycle") -> Institution:
+    """Bulk insert the users, question bank and tests of a scenario (commits)"""
+    from sqlalchemy import insert
+    from app.models import Option, Question, Test, User, UserRole, test_questions
+
+    def users(role, count):
+        return db.execute(insert(User).returning(User.id, sort_by_parameter_order=True), [
+            {
+                "email": f"{prefix}_{role.value}{i}@example.com",
+                "username": f"{prefix}_{role.value}_{i}",
+                "hashed_password": hashed_password,
+                "role": role,
+                "is_active": True,
+                "token_version": 0
+            }
+            for i in range(count)
+        ]).scalars().all()
+
+    faculty_ids = users(UserRole.FACULTY, scenario.faculty)
+    users(UserRole.STUDENT, scenario.students)
+
+    question_ids = db.execute(insert(Question).returning(Question.id, sort_by_parameter_order=True), [
+        {
+            "question_text": f"{prefix} question {i}?",
+            "question_type": "single",
+            "is_public": True,
+            "created_by": faculty_ids[i % len(faculty_ids)],
+            "subject": f"Subject {i % 10}"
+        }
+        for i in range(scenario.questions)
+    ]).scalars().all()
+    option_ids = db.execute(insert(Option).returning(Option.id, sort_by_parameter_order=True), [
+        {"question_id": question_id, "option_text": f"Option {n}", "is_correct": n == 0}
+        for question_id in question_ids
+        for n in range(4)
+    ]).scalars().all()
+    # Correct and first wrong option of each question
+    answers = {
+        question_id: (option_ids[4 * i], option_ids[4 * i + 1])
+        for i, question_id in enumerate(question_ids)
+    }
+
+    rng = random.Random(42)
+    test_ids = db.execute(insert(Test).returning(Test.id, sort_by_parameter_order=True), [
+        {
+            "title": f"{prefix} test {i}",
+            "total_marks": scenario.test_questions,
+            "duration_minutes": 60,
+            "is_active": True,
+            "created_by": faculty_ids[i % len(faculty_ids)]
+        }
+        for i in range(scenario.tests)
+    ]).scalars().all()
+    tests = {test_id: rng.sample(question_ids, scenario.test_questions) for test_id in test_ids}
+    db.execute(insert(test_questions), [
+        {"test_id": test_id, "question_id": question_id, "question_order": order, "marks": 1.0}
+        for test_id, chosen in tests.items()
+        for order, question_id in enumerate(chosen)
+    ])
+    db.commit()
+
+    return Institution(
+        student_usernames=[f"{prefix}_{UserRole.STUDENT.value}_{i}" for i in range(scenario.students)],
+        tests={
+            test_id: [(question_id, *answers[question_id]) for question_id in chosen]
+            for test_id, chosen in tests.items()
+        }
+    )
+
+async def take_exam(client, username: str, test_id: int, questions, autosaves: int, rng, latencies) -> None:
+    """One student's exam; the latency of every request is appended to `latencies[step]`"""
+
+    async def request(step, method, url, expected, **kwargs):
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        latencies[step].append(time.perf_counter() - started)
+        assert response.status_code == expected, (step, url, response.status_code, response.text)
+        return response.json()
+
+    token = await request("login", "POST", "/auth/token", 200, data={"username": username, "password": PASSWORD})
+    headers = {"Authorization": f"Bearer {token['access_token']}"}
+    session = await request("start", "POST", "/test-sessions/", 201, json={"test_id": test_id}, headers=headers)
+
+    # About two thirds of the answers are right
+    answers = [
+        {"question_id": question_id, "selected_option_id": correct if rng.random() < 0.67 else wrong}
+        for question_id, correct, wrong in questions
+    ]
+    for sequence, answer in enumerate(answers[:autosaves]):
+        await request(
+            "autosave", "POST", f"/test-sessions/{session['id']}/save-response", 201,
+            json={**answer, "client_sequence": sequence}, headers=headers
+        )
+    await request(
+        "submit", "POST", f"/test-sessions/{session['id']}/submit", 200,
+        json={"responses": answers[autosaves:]}, headers=headers
+    )
+    await request("results", "GET", f"/test-sessions/{session['id']}/results", 200, headers=headers)
+
+async def run_lifecycle(client, institution: Institution, scenario: Scenario) -> dict:
+    """Run every student's exam, `scenario.concurrency` at a time; returns the report"""
+    from app.utils.instrumentation import metrics_registry
+
+    rng = random.Random(7)
+    semaphore = asyncio.Semaphore(scenario.concurrency)
+    latencies = {step: [] for step in ENDPOINTS}
+    test_ids = sorted(institution.tests)
+
+    async def exam(i, username):
+        test_id = test_ids[i % len(test_ids)]
+        async with semaphore:
+            await take_exam(client, username, test_id, institution.tests[test_id], scenario.autosaves, rng, latencies)
+
+    metrics_registry.reset()
+    started = time.perf_counter()
+    await asyncio.gather(*(exam(i, username) for i, username in enumerate(institution.student_usernames)))
+    seconds = time.perf_counter() - started
+
+    endpoints = {}
+    for step, (method, route) in ENDPOINTS.items():
+        samples = latencies[step]
+        totals = metrics_registry.route(method, route)
+        endpoints[step] = {
+            "requests": len(samples),
+            "p50_ms": round(percentile(samples, 50) * 1000, 2),
+            "p95_ms": round(percentile(samples, 95) * 1000, 2),
+            "p99_ms": round(percentile(samples, 99) * 1000, 2),
+            "statements": round(totals.statements / totals.requests, 2) if totals and totals.requests else 0.0
+        }
+    return {
+        "scenario": asdict(scenario),
+        "exams_per_second": round(len(institution.student_usernames) / seconds, 2),
+        "requests_per_second": round(sum(len(samples) for samples in latencies.values()) / seconds, 2),
+        "endpoints": endpoints
+    }
+
+def compare_with_baseline(report: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Regressions of a report against the baseline of its scenario"""
+    regressions = []
+    if report["exams_per_second"] < baseline["exams_per_second"] / (1 + tolerance):
+        regressions.append(
+            f"throughput {report['exams_per_second']} exams/s, baseline {baseline['exams_per_second']}"
+        )
+    for step, measured in report["endpoints"].items():
+        expected = baseline["endpoints"].get(step)
+        if expected is None:
+            continue
+        if measured["statements"] > expected["statements"] + STATEMENT_SLACK:
+            regressions.append(f"{step}: {measured['statements']} statements per request, baseline {expected['statements']}")
+        if measured["p95_ms"] > expected["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{step}: p95 {measured['p95_ms']}ms, baseline {expected['p95_ms']}ms")
+    return regressions
+
+def load_baselines(path: Path = BASELINES_PATH) -> dict:
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as baselines:
+        return json.load(baselines)
+
+def save_baseline(report: dict, scenario: Scenario, path: Path = BASELINES_PATH) -> None:
+    baselines = load_baselines(path)
+    baselines[scenario.key] = report
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as output:
+        json.dump(baselines, output, indent=2, sort_keys=True)
+        output.write("\n")
+
+def print_report(report: dict) -> None:
+    print(f"{report['exams_per_second']:.1f} exams/s, {report['requests_per_second']:.1f} req/s")
+    for step, measured in report["endpoints"].items():
+        print(
+            f"  {step:<9} n={measured['requests']:<6} "
+            f"p50={measured['p50_ms']:8.1f}ms "
+            f"p95={measured['p95_ms']:8.1f}ms "
+            f"p99={measured['p99_ms']:8.1f}ms "
+            f"statements={measured['statements']:5.2f}"
+        )
+
+async def run(args, scenario: Scenario) -> dict:
+    import httpx
+    from app.auth.passwords import hash_password
+    from app.database.database import SessionLocal
+    from app.main import app, lifespan
+
+    transport = httpx.ASGITransport(app=app)
+    async with lifespan(app), httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        started = time.perf_counter()
+        db = SessionLocal()
+        try:
+            # Every account shares one precomputed hash
+            institution = seed_institution(db, scenario, hash_password(PASSWORD))
+        finally:
+            db.close()
+        print(f"Seeded {scenario.key} in {time.perf_counter() - started:.1f}s")
+        return await run_lifecycle(client, institution, scenario)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--faculty", type=int, default=10, help="Faculty members owning the questions and tests")
+    parser.add_argument("--students", type=int, default=200, help="Students, each taking one exam")
+    parser.add_argument("--questions", type=int, default=500, help="Questions in the bank")
+    parser.add_argument("--tests", type=int, default=5, help="Tests, assigned to students round robin")
+    parser.add_argument("--test-questions", type=int, default=20, help="Questions per test")
+    parser.add_argument("--autosaves", type=int, default=10, help="Answers autosaved before submitting the rest")
+    parser.add_argument("--concurrency", type=int, default=20, help="Exams in flight at once")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed relative p95 / throughput regression")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the scenario's baseline")
+    parser.add_argument("--database-url", default="sqlite:///./benchmark.db")
+    args = parser.parse_args()
+
+    # Configure the app before it is imported; the benchmark database starts empty
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["DB_RESET_ON_STARTUP"] = "true"
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+    # SQLite serialises the submits and autosaves; wait for the write lock rather than fail
+    os.environ.setdefault("DB_CONNECT_TIMEOUT", "60")
+    from app.database.async_database import DATABASE_MODE
+
+    scenario = Scenario(
+        args.faculty, args.students, args.questions, args.tests,
+        args.test_questions, args.autosaves, args.concurrency, DATABASE_MODE.value
+    )
+    report = asyncio.run(run(args, scenario))
+    print_report(report)
+
+    if args.save_baseline:
+        save_baseline(report, scenario)
+        print(f"Baseline saved to {BASELINES_PATH}")
+        return
+    baseline = load_baselines().get(scenario.key)
+    if baseline is None:
+        print("No baseline for this scenario; run with --save-baseline to record one")
+        return
+    regressions = compare_with_baseline(report, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+    print("Within the baseline")
+
+if __name__ == "__main__":
+    main()
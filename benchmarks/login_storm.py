@@ -0,0 +1,115 @@
+# benchmarks/login_storm.py
+"""
+Login storm benchmark.
+
+Measures the latency of an ordinary authenticated endpoint while hundreds of
+logins are in flight, against the same endpoint with no logins running.
+With bcrypt on the password pool the probe's p99 should barely move.
+
+Usage:
+    python -m benchmarks.login_storm [--logins 200] [--probes 200] [--database-url sqlite:///./benchmark.db]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def summarize(name, samples):
+    return (
+        f"{name:<22} n={len(samples):<5} "
+        f"p50={percentile(samples, 50) * 1000:8.1f}ms "
+        f"p95={percentile(samples, 95) * 1000:8.1f}ms "
+        f"p99={percentile(samples, 99) * 1000:8.1f}ms"
+    )
+
+async def run(args):
+    import httpx
+    from sqlalchemy import insert
+    from app.main import app, lifespan
+    from app.auth.passwords import hash_password
+    from app.database.database import SessionLocal
+    from app.models.user import User, UserRole
+
+    transport = httpx.ASGITransport(app=app)
+    async with lifespan(app), httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        # Seed users directly; every account shares one precomputed hash
+        hashed_password = hash_password("password")
+        db = SessionLocal()
+        try:
+            db.execute(insert(User), [
+                {
+                    "email": f"storm{i}@example.com",
+                    "username": f"storm_{i}",
+                    "hashed_password": hashed_password,
+                    "role": UserRole.STUDENT,
+                    "is_active": True,
+                    "token_version": 0
+                }
+                for i in range(args.logins + 1)
+            ])
+            db.commit()
+        finally:
+            db.close()
+
+        async def login(username):
+            started = time.perf_counter()
+            response = await client.post("/auth/token", data={"username": username, "password": "password"})
+            return response, time.perf_counter() - started
+
+        response, _ = await login("storm_0")
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        async def probe():
+            started = time.perf_counter()
+            response = await client.get("/test-sessions/active", headers=headers)
+            assert response.status_code == 200
+            return time.perf_counter() - started
+
+        async def probes():
+            samples = []
+            for _ in range(args.probes):
+                samples.append(await probe())
+                await asyncio.sleep(args.probe_interval)
+            return samples
+
+        quiet = await probes()
+
+        storm_started = time.perf_counter()
+        login_task = asyncio.gather(*(login(f"storm_{i}") for i in range(1, args.logins + 1)))
+        during_storm, logins = await asyncio.gather(probes(), login_task)
+        storm_seconds = time.perf_counter() - storm_started
+
+    login_latencies = [elapsed for response, elapsed in logins if response.status_code == 200]
+    rejected = sum(1 for response, _ in logins if response.status_code == 503)
+
+    print(summarize("probe (no logins)", quiet))
+    print(summarize("probe (login storm)", during_storm))
+    print(summarize("login", login_latencies))
+    print(f"logins: {len(login_latencies)} ok, {rejected} rejected with 503, "
+          f"{len(login_latencies) / storm_seconds:.1f} logins/s")
+    print(f"probe p99 ratio (storm / quiet): {percentile(during_storm, 99) / max(percentile(quiet, 99), 1e-9):.2f}")
+    print(f"probe mean: {statistics.mean(quiet) * 1000:.1f}ms quiet, {statistics.mean(during_storm) * 1000:.1f}ms during storm")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200, help="Concurrent logins in the storm")
+    parser.add_argument("--probes", type=int, default=200, help="Probe requests per phase")
+    parser.add_argument("--probe-interval", type=float, default=0.005, help="Seconds between probe requests")
+    parser.add_argument("--database-url", default="sqlite:///./benchmark.db")
+    args = parser.parse_args()
+
+    # Configure the app before it is imported; the benchmark database starts empty
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["DB_RESET_ON_STARTUP"] = "true"
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
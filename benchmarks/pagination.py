@@ -0,0 +1,103 @@
+# benchmarks/pagination.py
+"""
+List pagination benchmark.
+
+Fills a fresh database with synthetic questions, then fetches page 1 and deep
+pages of the faculty question bank listing (own or public questions, 20 per
+page) with offset pagination and with keyset (cursor) pagination. Offset
+pages get slower the deeper they are; keyset pages should not.
+
+Usage:
+    python -m benchmarks.pagination [--rows 100000] [--pages 1,10,100,1000] [--repeat 50] [--database-url sqlite:///./benchmark_pagination.db]
+"""
+import argparse
+import os
+import time
+
+from benchmarks.login_storm import percentile
+
+PAGE_SIZE = 20
+
+def seed(engine, rows, chunk_size=10000):
+    from sqlalchemy import insert
+    from app.database.schema import reset_schema
+    from app.models import Question, User, UserRole
+
+    reset_schema(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(User), [
+            {
+                "email": f"paging{n}@example.com", "username": f"paging{n}", "hashed_password": "-",
+                "role": UserRole.FACULTY, "is_active": True, "token_version": 0
+            }
+            for n in (1, 2)
+        ])
+        for start in range(0, rows, chunk_size):
+            connection.execute(insert(Question), [
+                {
+                    "question_text": f"Question {n}?",
+                    "question_type": "single",
+                    # Most of the bank belongs to other faculty and half of it is shared
+                    "is_public": n % 2 == 0,
+                    "created_by": 1 if n % 10 == 0 else 2
+                }
+                for n in range(start, min(start + chunk_size, rows))
+            ])
+
+def faculty_questions():
+    from sqlalchemy import or_, select
+    from app.models import Question
+
+    return select(Question.id).where(or_(Question.created_by == 1, Question.is_public == True))
+
+def time_page(engine, page_number, keyset, repeat):
+    from sqlalchemy import select
+    from app.models import Question
+    from app.services.pagination import PageParams
+
+    skip = (page_number - 1) * PAGE_SIZE
+    after_id = None
+    with engine.connect() as connection:
+        if keyset and skip:
+            # The id the previous page's next_cursor would carry
+            previous = faculty_questions().order_by(Question.id).offset(skip - 1).limit(1)
+            after_id = connection.execute(previous).scalar_one()
+        page = PageParams(skip=skip, limit=PAGE_SIZE, keyset=keyset, after_id=after_id)
+        query = page.paginate(faculty_questions(), Question.id)
+
+        latencies = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            rows = connection.execute(query).all()
+            latencies.append(time.perf_counter() - started)
+        assert len(rows) >= PAGE_SIZE
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="Questions in the bank")
+    parser.add_argument("--pages", default="1,10,100,1000", help="Comma separated page numbers to time")
+    parser.add_argument("--repeat", type=int, default=50, help="Fetches per page and mode")
+    parser.add_argument("--database-url", default="sqlite:///./benchmark_pagination.db")
+    args = parser.parse_args()
+
+    # Configure the app before it is imported
+    os.environ["DATABASE_URL"] = args.database_url
+    from sqlalchemy import create_engine
+
+    engine = create_engine(args.database_url)
+    started = time.perf_counter()
+    seed(engine, args.rows)
+    print(f"{args.rows} questions seeded in {time.perf_counter() - started:.1f}s")
+    for page_number in (int(page) for page in args.pages.split(",")):
+        for mode, keyset in (("offset", False), ("cursor", True)):
+            latencies = time_page(engine, page_number, keyset, args.repeat)
+            print(
+                f"  page {page_number:<5} {mode:<6} "
+                f"p50={percentile(latencies, 50) * 1000:8.2f}ms "
+                f"p95={percentile(latencies, 95) * 1000:8.2f}ms"
+            )
+    engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# benchmarks/question_search.py
+"""
+Question search benchmark.
+
+Fills a fresh database with synthetic questions at each size, then times the
+same prefix searches with the full-text index (FTS5 / tsvector) and with the
+old ILIKE substring scan, as the faculty question bank page issues them
+(first page of 20 results).
+
+Usage:
+    python -m benchmarks.question_search [--sizes 10000,100000,1000000] [--queries 200] [--database-url sqlite:///./benchmark_search.db]
+"""
+import argparse
+import os
+import random
+import string
+import time
+
+from benchmarks.login_storm import percentile
+
+def vocabulary(rng, size=5000):
+    return ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10))) for _ in range(size)]
+
+def seed(engine, rows, words, rng, chunk_size=10000):
+    from sqlalchemy import insert
+    from app.database.schema import reset_schema
+    from app.models import Question, User, UserRole
+
+    reset_schema(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(User), [{
+            "email": "search@example.com", "username": "search", "hashed_password": "-",
+            "role": UserRole.FACULTY, "is_active": True, "token_version": 0
+        }])
+        for start in range(0, rows, chunk_size):
+            connection.execute(insert(Question), [
+                {
+                    "question_text": " ".join(rng.choices(words, k=rng.randint(8, 20))) + "?",
+                    "tags": " ".join(rng.choices(words, k=2)),
+                    "question_type": "single",
+                    "is_public": True,
+                    "created_by": 1
+                }
+                for _ in range(start, min(start + chunk_size, rows))
+            ])
+
+def time_searches(engine, terms, mode):
+    from sqlalchemy import select
+    from app.models import Question
+    from app.services.question_search import apply_question_search
+
+    latencies = []
+    with engine.connect() as connection:
+        for term in terms:
+            query = apply_question_search(select(Question.id), term, engine.dialect.name, mode).limit(20)
+            started = time.perf_counter()
+            connection.execute(query).all()
+            latencies.append(time.perf_counter() - started)
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma separated question counts")
+    parser.add_argument("--queries", type=int, default=200, help="Searches per size and mode")
+    parser.add_argument("--database-url", default="sqlite:///./benchmark_search.db")
+    args = parser.parse_args()
+
+    # Configure the app before it is imported
+    os.environ["DATABASE_URL"] = args.database_url
+    from sqlalchemy import create_engine
+    from app.services.question_search import SearchMode
+
+    rng = random.Random(42)
+    words = vocabulary(rng)
+    # Half single-word prefixes as typed so far, half two-word searches
+    terms = [
+        rng.choice(words)[:4] if i % 2 else f"{rng.choice(words)} {rng.choice(words)[:3]}"
+        for i in range(args.queries)
+    ]
+
+    engine = create_engine(args.database_url)
+    for rows in (int(size) for size in args.sizes.split(",")):
+        started = time.perf_counter()
+        seed(engine, rows, words, rng)
+        print(f"{rows} questions seeded in {time.perf_counter() - started:.1f}s")
+        for mode in SearchMode:
+            latencies = time_searches(engine, terms, mode)
+            print(
+                f"  {mode.value:<9} "
+                f"p50={percentile(latencies, 50) * 1000:8.2f}ms "
+                f"p95={percentile(latencies, 95) * 1000:8.2f}ms "
+                f"p99={percentile(latencies, 99) * 1000:8.2f}ms"
+            )
+    engine.dispose()
+
+if __name__ == "__main__":
+    main()
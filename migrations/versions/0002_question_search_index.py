@@ -0,0 +1,70 @@
+"""question search index
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:12:40.511842
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE questions_fts USING fts5("
+            "question_text, tags, content='questions', content_rowid='id', "
+            "tokenize='porter unicode61', prefix='2 3')"
+        )
+        op.execute(
+            "CREATE TRIGGER questions_fts_ai AFTER INSERT ON questions BEGIN "
+            "INSERT INTO questions_fts(rowid, question_text, tags) VALUES (new.id, new.question_text, new.tags); "
+            "END"
+        )
+        op.execute(
+            "CREATE TRIGGER questions_fts_ad AFTER DELETE ON questions BEGIN "
+            "INSERT INTO questions_fts(questions_fts, rowid, question_text, tags) "
+            "VALUES ('delete', old.id, old.question_text, old.tags); "
+            "END"
+        )
+        op.execute(
+            "CREATE TRIGGER questions_fts_au AFTER UPDATE OF question_text, tags ON questions BEGIN "
+            "INSERT INTO questions_fts(questions_fts, rowid, question_text, tags) "
+            "VALUES ('delete', old.id, old.question_text, old.tags); "
+            "INSERT INTO questions_fts(rowid, question_text, tags) VALUES (new.id, new.question_text, new.tags); "
+            "END"
+        )
+        # Index the questions that already exist
+        op.execute("INSERT INTO questions_fts(questions_fts) VALUES ('rebuild')")
+    elif dialect == 'postgresql':
+        op.execute(
+            "ALTER TABLE questions ADD COLUMN search_vector tsvector "
+            "GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english', coalesce(question_text, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(tags, '')), 'B')"
+            ") STORED"
+        )
+        op.execute("CREATE INDEX ix_questions_search_vector ON questions USING GIN (search_vector)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for trigger in ('questions_fts_au', 'questions_fts_ad', 'questions_fts_ai'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS questions_fts")
+    elif dialect == 'postgresql':
+        op.drop_index('ix_questions_search_vector', table_name='questions')
+        op.drop_column('questions', 'search_vector')
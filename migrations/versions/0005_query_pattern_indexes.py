@@ -0,0 +1,72 @@
+"""query pattern indexes
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 05:29:12.527814
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Drop the duplicates the new unique constraints forbid, left by concurrent requests:
+    # later extra active sessions of a student and test (with their rows), the older
+    # of repeated saved responses and repeated option order rows
+    duplicate_active_sessions = (
+        "SELECT id FROM test_sessions WHERE completed_at IS NULL AND id NOT IN ("
+        "SELECT MIN(id) FROM test_sessions WHERE completed_at IS NULL GROUP BY user_id, test_id)"
+    )
+    op.execute(f"DELETE FROM user_responses WHERE test_session_id IN ({duplicate_active_sessions})")
+    op.execute(f"DELETE FROM option_orders WHERE test_session_id IN ({duplicate_active_sessions})")
+    op.execute(f"DELETE FROM test_sessions WHERE id IN ({duplicate_active_sessions})")
+    op.execute(
+        "DELETE FROM user_responses WHERE id NOT IN ("
+        "SELECT MAX(id) FROM user_responses GROUP BY test_session_id, question_id)"
+    )
+    op.execute(
+        "DELETE FROM option_orders WHERE id NOT IN ("
+        "SELECT MIN(id) FROM option_orders GROUP BY test_session_id, option_id)"
+    )
+
+    with op.batch_alter_table('option_orders', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_option_orders_test_session_id_option_id', ['test_session_id', 'option_id'])
+    with op.batch_alter_table('user_responses', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_user_responses_test_session_id_question_id', ['test_session_id', 'question_id'])
+
+    op.create_index(op.f('ix_options_question_id'), 'options', ['question_id'], unique=False)
+    op.create_index('ix_questions_created_by_is_public', 'questions', ['created_by', 'is_public'], unique=False)
+    op.create_index('ix_questions_subject_difficulty_level', 'questions', ['subject', 'difficulty_level'], unique=False)
+    op.create_index('ix_test_questions_question_id', 'test_questions', ['question_id'], unique=False)
+    op.create_index('ix_test_questions_test_id_question_order', 'test_questions', ['test_id', 'question_order'], unique=False)
+    op.create_index('ix_test_sessions_user_id_test_id_completed_at', 'test_sessions', ['user_id', 'test_id', 'completed_at'], unique=False)
+    op.create_index(
+        'uq_test_sessions_active_user_id_test_id', 'test_sessions', ['user_id', 'test_id'], unique=True,
+        sqlite_where=sa.text('completed_at IS NULL'), postgresql_where=sa.text('completed_at IS NULL')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_test_sessions_active_user_id_test_id', table_name='test_sessions')
+    op.drop_index('ix_test_sessions_user_id_test_id_completed_at', table_name='test_sessions')
+    op.drop_index('ix_test_questions_test_id_question_order', table_name='test_questions')
+    op.drop_index('ix_test_questions_question_id', table_name='test_questions')
+    op.drop_index('ix_questions_subject_difficulty_level', table_name='questions')
+    op.drop_index('ix_questions_created_by_is_public', table_name='questions')
+    op.drop_index(op.f('ix_options_question_id'), table_name='options')
+
+    with op.batch_alter_table('user_responses', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_user_responses_test_session_id_question_id', type_='unique')
+    with op.batch_alter_table('option_orders', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_option_orders_test_session_id_option_id', type_='unique')
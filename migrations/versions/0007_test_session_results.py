@@ -0,0 +1,46 @@
+"""test session results
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 05:39:33.889162
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('test_sessions', sa.Column('correct_answers', sa.Integer(), nullable=True))
+    op.add_column('test_sessions', sa.Column('question_count', sa.Integer(), nullable=True))
+    op.add_column('test_sessions', sa.Column('percentage', sa.Float(), nullable=True))
+    op.add_column('test_sessions', sa.Column('outcome_bitmap', sa.LargeBinary(), nullable=True))
+
+    # Results of sessions completed before they were stored, counted the way the
+    # result pages used to; their per-question outcomes stay unknown
+    op.execute(
+        "UPDATE test_sessions SET "
+        "question_count = (SELECT COUNT(*) FROM test_questions WHERE test_questions.test_id = test_sessions.test_id), "
+        "correct_answers = (SELECT COUNT(*) FROM user_responses "
+        "WHERE user_responses.test_session_id = test_sessions.id AND user_responses.is_correct = TRUE), "
+        "percentage = (SELECT CASE WHEN tests.total_marks > 0 THEN COALESCE(test_sessions.score, 0) * 100.0 / tests.total_marks ELSE 0 END "
+        "FROM tests WHERE tests.id = test_sessions.test_id) "
+        "WHERE completed_at IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('test_sessions', 'outcome_bitmap')
+    op.drop_column('test_sessions', 'percentage')
+    op.drop_column('test_sessions', 'question_count')
+    op.drop_column('test_sessions', 'correct_answers')
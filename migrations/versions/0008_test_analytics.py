@@ -0,0 +1,70 @@
+"""test analytics
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 05:44:03.610241
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('question_stats',
+    sa.Column('test_id', sa.Integer(), nullable=False),
+    sa.Column('question_id', sa.Integer(), nullable=False),
+    sa.Column('attempt_count', sa.Integer(), nullable=False),
+    sa.Column('answered_count', sa.Integer(), nullable=False),
+    sa.Column('correct_count', sa.Integer(), nullable=False),
+    sa.Column('percentage_sum', sa.Float(), nullable=False),
+    sa.Column('percentage_sq_sum', sa.Float(), nullable=False),
+    sa.Column('correct_percentage_sum', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['test_id'], ['tests.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('test_id', 'question_id')
+    )
+    op.create_table('test_score_buckets',
+    sa.Column('test_id', sa.Integer(), nullable=False),
+    sa.Column('bucket', sa.Integer(), nullable=False),
+    sa.Column('attempt_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['test_id'], ['tests.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('test_id', 'bucket')
+    )
+    op.create_table('test_stats',
+    sa.Column('test_id', sa.Integer(), nullable=False),
+    sa.Column('attempt_count', sa.Integer(), nullable=False),
+    sa.Column('score_sum', sa.Float(), nullable=False),
+    sa.Column('percentage_sum', sa.Float(), nullable=False),
+    sa.Column('percentage_sq_sum', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['test_id'], ['tests.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('test_id')
+    )
+    op.create_table('option_stats',
+    sa.Column('test_id', sa.Integer(), nullable=False),
+    sa.Column('option_id', sa.Integer(), nullable=False),
+    sa.Column('question_id', sa.Integer(), nullable=False),
+    sa.Column('pick_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['option_id'], ['options.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['test_id'], ['tests.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('test_id', 'option_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('option_stats')
+    op.drop_table('test_stats')
+    op.drop_table('test_score_buckets')
+    op.drop_table('question_stats')
@@ -0,0 +1,48 @@
+"""item analysis
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 05:47:04.468145
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('question_item_stats',
+    sa.Column('test_id', sa.Integer(), nullable=False),
+    sa.Column('question_id', sa.Integer(), nullable=False),
+    sa.Column('answered_count', sa.Integer(), nullable=False),
+    sa.Column('p_value', sa.Float(), nullable=True),
+    sa.Column('point_biserial', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['test_id'], ['tests.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('test_id', 'question_id')
+    )
+    op.create_table('test_item_stats',
+    sa.Column('test_id', sa.Integer(), nullable=False),
+    sa.Column('session_count', sa.Integer(), nullable=False),
+    sa.Column('question_count', sa.Integer(), nullable=False),
+    sa.Column('mean_score', sa.Float(), nullable=True),
+    sa.Column('kr20', sa.Float(), nullable=True),
+    sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['test_id'], ['tests.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('test_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('test_item_stats')
+    op.drop_table('question_item_stats')
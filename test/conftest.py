@@ -1,5 +1,15 @@
+import os
 import pytest
+from contextlib import contextmanager
 from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Cheap bcrypt hashes keep the suite fast
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+# Start every run from empty tables instead of requiring `alembic upgrade head`
+os.environ.setdefault("DB_RESET_ON_STARTUP", "true")
+
 from app.main import app
 
 # Define the registration and login URLs
@@ -28,8 +38,9 @@ CLIENT_SECRET = "string"
 
 @pytest.fixture(scope="session")
 def client():
-    """Fixture that returns a TestClient instance."""
-    return TestClient(app)
+    """Fixture that returns a TestClient instance running the app's lifespan."""
+    with TestClient(app) as test_client:
+        yield test_client
 
 def register_user(client, role, index):
     """Helper function to register a user with a specific role and index."""
@@ -61,4 +72,100 @@ def setup_users(client):
     users = {}
     for role, count in ROLES.items():
         users[role] = [register_user(client, role, i) for i in range(1, count + 1)]
-    return users
\ No newline at end of file
+    return users
+
+def auth_headers(client, username, password="string"):
+    """Helper function to log in a user and build the Authorization header."""
+    access_token = login_user(client, username, password)["access_token"]
+    return {"Authorization": f"Bearer {access_token}"}
+
+def create_exam(client, faculty_headers, question_count, question_type="single"):
+    """Helper function to create a test with `question_count` four-option questions."""
+    question_ids = []
+    for i in range(question_count):
+        options = [{"option_text": f"Option {n}", "is_correct": n == 0} for n in range(4)]
+        if question_type == "multiple":
+            options[1]["is_correct"] = True
+        response = client.post(
+            "/questions/",
+            json={
+                "question_text": f"Exam question {i}?",
+                "question_type": question_type,
+                "is_public": True,
+                "options": options
+            },
+            headers=faculty_headers
+        )
+        assert response.status_code == 201
+        question_ids.append(response.json()["id"])
+
+    response = client.post(
+        "/tests/",
+        json={"title": f"Exam with {question_count} questions", "total_marks": question_count, "duration_minutes": 60},
+        headers=faculty_headers
+    )
+    assert response.status_code == 201
+    test_id = response.json()["id"]
+
+    for question_id in question_ids:
+        response = client.post(
+            f"/tests/{test_id}/questions/",
+            json={"question_id": question_id, "marks": 1.0},
+            headers=faculty_headers
+        )
+        assert response.status_code == 201
+
+    return test_id, question_ids
+
+def submit_answers(client, student_headers, test_id, answers):
+    """Helper function to take an exam made by `create_exam`; answers are True (correct), False (wrong) or None (skipped) in question order."""
+    session = client.post("/test-sessions/", json={"test_id": test_id}, headers=student_headers).json()
+    option_ids = {}
+    for order in session["option_orders"]:
+        option_ids.setdefault(order["question_id"], []).append(order["option_id"])
+    # Options are created correct-first, so the lowest option id is the right answer
+    responses = [
+        {"question_id": question_id, "selected_option_id": sorted(option_ids[question_id])[0 if is_correct else 1]}
+        for question_id, is_correct in zip(sorted(option_ids), answers)
+        if is_correct is not None
+    ]
+    response = client.post(f"/test-sessions/{session['id']}/submit", json={"responses": responses}, headers=student_headers)
+    assert response.status_code == 200
+
+class QueryCounter:
+    """Counts the SQL statements sent to any engine (sync or async) while active."""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+@pytest.fixture
+def count_queries():
+    """Fixture that returns a context manager recording the statements executed inside it."""
+    @contextmanager
+    def _count_queries():
+        counter = QueryCounter()
+        event.listen(Engine, "before_cursor_execute", counter._record)
+        try:
+            yield counter
+        finally:
+            event.remove(Engine, "before_cursor_execute", counter._record)
+    return _count_queries
+
+@pytest.fixture
+def query_budget(count_queries):
+    """Fixture that returns a context manager failing when more than `budget` statements run inside it."""
+    @contextmanager
+    def _query_budget(budget):
+        with count_queries() as counter:
+            yield counter
+        assert counter.count <= budget, (
+            f"{counter.count} statements, over the budget of {budget}:\n" + "\n".join(counter.statements)
+        )
+    return _query_budget
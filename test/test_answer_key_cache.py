@@ -0,0 +1,92 @@
+import time
+
+import pytest
+from app.database.database import SessionLocal
+from app.services.answer_keys import get_answer_key
+from app.utils.cache import LRUCache
+from test.conftest import auth_headers, create_exam
+
+def test_lru_cache_evicts_and_expires():
+    """Test the size bound, TTL and counters of the in-process cache."""
+    cache = LRUCache(maxsize=2, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # evicts "b", the least recently used entry
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+    time.sleep(0.06)
+    assert cache.get("a") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 2
+    assert stats["evictions"] == 1
+
+def test_answer_key_is_cached_and_invalidated_on_edits(client, setup_users, count_queries):
+    """Test that answer keys are served from cache and refreshed by question and option edits."""
+    users = setup_users
+    faculty_headers = auth_headers(client, users["faculty"][0]["username"])
+    admin_headers = auth_headers(client, users["admin"][0]["username"])
+
+    test_id, question_ids = create_exam(client, faculty_headers, 3)
+    db = SessionLocal()
+    try:
+        assert get_answer_key(db, test_id).question_count == 3
+        with count_queries() as counter:
+            get_answer_key(db, test_id)
+        assert counter.count == 0
+
+        # Removing a question from the test invalidates its key
+        response = client.delete(f"/tests/{test_id}/questions/{question_ids[0]}", headers=faculty_headers)
+        assert response.status_code == 204
+        assert get_answer_key(db, test_id).question_count == 2
+
+        # Changing which option is correct invalidates every test using the question
+        question = client.get(f"/questions/{question_ids[1]}", headers=faculty_headers).json()
+        wrong_option = next(option for option in question["options"] if not option["is_correct"])
+        response = client.put(
+            f"/questions/{question_ids[1]}/options/{wrong_option['id']}",
+            json={"is_correct": True},
+            headers=faculty_headers
+        )
+        assert response.status_code == 200
+        assert wrong_option["id"] in get_answer_key(db, test_id).questions[question_ids[1]].correct_option_ids
+    finally:
+        db.close()
+
+    response = client.get("/admin/cache-stats", headers=admin_headers)
+    assert response.status_code == 200
+    stats = response.json()["answer_keys"]
+    assert stats["hits"] >= 1
+    assert stats["misses"] >= 3
+
+def test_deleting_a_question_invalidates_the_tests_using_it(client, setup_users):
+    """Test that a submit after a question is deleted is graded on the remaining questions."""
+    users = setup_users
+    faculty_headers = auth_headers(client, users["faculty"][0]["username"])
+    student_headers = auth_headers(client, users["student"][0]["username"])
+
+    test_id, question_ids = create_exam(client, faculty_headers, 3)
+    # Starting the session caches the test's answer key
+    session = client.post("/test-sessions/", json={"test_id": test_id}, headers=student_headers).json()
+    response = client.delete(f"/questions/{question_ids[0]}", headers=faculty_headers)
+    assert response.status_code == 200
+
+    option_ids = {}
+    for order in session["option_orders"]:
+        option_ids.setdefault(order["question_id"], []).append(order["option_id"])
+    # Options are created correct-first, so the lowest option id is the right answer
+    responses = [
+        {"question_id": question_id, "selected_option_id": min(option_ids[question_id])}
+        for question_id in question_ids[1:]
+    ]
+    response = client.post(f"/test-sessions/{session['id']}/submit", json={"responses": responses}, headers=student_headers)
+    assert response.status_code == 200
+    results = response.json()
+    assert results["question_count"] == 2
+    assert results["correct_answers"] == 2
+    assert results["question_outcomes"] == [True, True]
+    assert results["total_marks"] == 2
+    assert results["percentage"] == 100
@@ -0,0 +1,60 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import async_database
+from app.database.async_database import DatabaseMode, ThreadedSession, get_async_db, to_async_url
+from test.conftest import auth_headers, create_exam
+
+def test_to_async_url_swaps_drivers():
+    """Test that synchronous database URLs map to their async drivers."""
+    assert to_async_url("sqlite:///./sql_app.db") == "sqlite+aiosqlite:///./sql_app.db"
+    assert to_async_url("postgresql://user:secret@db/api") == "postgresql+asyncpg://user:secret@db/api"
+    assert to_async_url("postgresql+asyncpg://user:secret@db/api") == "postgresql+asyncpg://user:secret@db/api"
+
+@pytest.mark.parametrize("mode, session_class", [
+    (DatabaseMode.SYNC, ThreadedSession),
+    (DatabaseMode.ASYNC, AsyncSession),
+])
+def test_test_flow_in_both_database_modes(client, setup_users, monkeypatch, mode, session_class):
+    """Test that a whole test can be taken and graded in either database mode."""
+    monkeypatch.setattr(async_database, "DATABASE_MODE", mode)
+    sessions = []
+
+    async def recording_get_async_db():
+        async for db in get_async_db():
+            sessions.append(db)
+            yield db
+
+    client.app.dependency_overrides[get_async_db] = recording_get_async_db
+    try:
+        users = setup_users
+        faculty_headers = auth_headers(client, users["faculty"][2]["username"])
+        student_headers = auth_headers(client, users["student"][2]["username"])
+
+        test_id, question_ids = create_exam(client, faculty_headers, 2)
+        response = client.post("/test-sessions/", json={"test_id": test_id}, headers=student_headers)
+        assert response.status_code == 201
+        session_id = response.json()["id"]
+
+        correct = {}
+        for question_id in question_ids:
+            question = client.get(f"/questions/{question_id}", headers=faculty_headers).json()
+            correct[question_id] = next(option["id"] for option in question["options"] if option["is_correct"])
+
+        response = client.post(
+            f"/test-sessions/{session_id}/save-response",
+            json={"question_id": question_ids[0], "selected_option_id": correct[question_ids[0]]},
+            headers=student_headers
+        )
+        assert response.status_code == 201
+
+        response = client.post(f"/test-sessions/{session_id}/submit", json={"responses": []}, headers=student_headers)
+        assert response.status_code == 200
+        assert response.json()["correct_answers"] == 1
+
+        response = client.get(f"/test-sessions/{session_id}/results", headers=student_headers)
+        assert response.status_code == 200
+        assert response.json()["score"] == 1.0
+    finally:
+        client.app.dependency_overrides.pop(get_async_db)
+
+    assert sessions and all(isinstance(db, session_class) for db in sessions)
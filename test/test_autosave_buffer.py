@@ -0,0 +1,205 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import select
+from app.database.database import SessionLocal
+from app.models.session import UserResponse
+from app.services import autosave
+from app.services.autosave import AutosaveBuffer, AutosaveMode
+from test.test_save_response import saved_selections, start_session
+
+@pytest.fixture
+def write_behind(monkeypatch, tmp_path):
+    """Switch autosave to write-behind with a fresh journal-backed buffer."""
+    buffer = AutosaveBuffer(str(tmp_path / "autosave.journal"))
+    monkeypatch.setattr(autosave, "AUTOSAVE_MODE", AutosaveMode.WRITE_BEHIND)
+    monkeypatch.setattr(autosave, "autosave_buffer", buffer)
+    yield buffer
+    buffer.close()
+
+def stored_selections(session_id):
+    db = SessionLocal()
+    try:
+        return dict(db.execute(
+            select(UserResponse.question_id, UserResponse.selected_option_id)
+            .where(UserResponse.test_session_id == session_id)
+        ).all())
+    finally:
+        db.close()
+
+def save(client, session_id, headers, question_id, option_id, sequence=None):
+    response = client.post(
+        f"/test-sessions/{session_id}/save-response",
+        json={"question_id": question_id, "selected_option_id": option_id, "client_sequence": sequence},
+        headers=headers
+    )
+    assert response.status_code == 201
+
+def test_write_behind_acknowledges_before_writing(client, setup_users, write_behind):
+    """Test that buffered saves are readable at once and written, coalesced, by the flush."""
+    session_id, options, headers = start_session(client, setup_users, 2, student=2)
+    first, second = options
+    for option_id in options[first][:3]:
+        save(client, session_id, headers, first, option_id)
+    save(client, session_id, headers, second, options[second][1])
+
+    assert stored_selections(session_id) == {}
+    expected = {first: options[first][2], second: options[second][1]}
+    assert saved_selections(client, session_id, headers) == expected
+
+    assert autosave.flush_autosave_buffer() == 2
+    assert stored_selections(session_id) == expected
+    assert write_behind.pending_count() == 0
+
+def test_submit_flushes_the_session_first(client, setup_users, write_behind):
+    """Test that answers still in the buffer are graded on submit."""
+    session_id, options, headers = start_session(client, setup_users, 2, student=2)
+    # Options are created correct-first, so the lowest option id is the right answer
+    for question_id, option_ids in options.items():
+        save(client, session_id, headers, question_id, option_ids[0])
+
+    response = client.post(f"/test-sessions/{session_id}/submit", json={"responses": []}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["correct_answers"] == 2
+    assert write_behind.pending(session_id) == []
+
+def test_failed_flush_keeps_the_answers(client, setup_users, write_behind, monkeypatch):
+    """Test that a flush that fails puts its rows back without losing newer saves."""
+    session_id, options, headers = start_session(client, setup_users, 1, student=2)
+    (question_id, option_ids), = options.items()
+    save(client, session_id, headers, question_id, option_ids[0], sequence=1)
+
+    def failing_upsert(db, test_session_id, rows):
+        # A newer save arrives while the flush is in flight
+        write_behind.record(test_session_id, [{
+            "question_id": question_id, "selected_option_id": option_ids[1],
+            "selected_option_ids": None, "client_sequence": 2
+        }])
+        raise RuntimeError("database went away")
+    upsert_responses = autosave.upsert_responses
+    monkeypatch.setattr(autosave, "upsert_responses", failing_upsert)
+    with pytest.raises(RuntimeError):
+        autosave.flush_autosave_buffer()
+    monkeypatch.setattr(autosave, "upsert_responses", upsert_responses)
+
+    assert [row["selected_option_id"] for row in write_behind.pending(session_id)] == [option_ids[1]]
+    assert autosave.flush_autosave_buffer() == 1
+    assert stored_selections(session_id) == {question_id: option_ids[1]}
+
+def test_journal_replays_after_a_crash(client, setup_users, tmp_path):
+    """Test that a new process replays acknowledged saves a crashed one never flushed."""
+    session_id, options, _ = start_session(client, setup_users, 2, student=3)
+    completed_id, completed_options, completed_headers = start_session(client, setup_users, 1, student=3)
+    first, second = options
+    journal_path = str(tmp_path / "crash.journal")
+
+    crashed = AutosaveBuffer(journal_path)
+    crashed.record(session_id, [
+        {"question_id": first, "selected_option_id": options[first][0], "selected_option_ids": None, "client_sequence": 1},
+        {"question_id": second, "selected_option_id": options[second][0], "selected_option_ids": None, "client_sequence": 1}
+    ])
+    crashed.record(session_id, [
+        {"question_id": first, "selected_option_id": options[first][3], "selected_option_ids": None, "client_sequence": 2}
+    ])
+    (completed_question, completed_option_ids), = completed_options.items()
+    crashed.record(completed_id, [
+        {"question_id": completed_question, "selected_option_id": completed_option_ids[2], "selected_option_ids": None, "client_sequence": 1}
+    ])
+    # The crash leaves a torn, never acknowledged line behind
+    crashed._journal.write('{"test_session_id": ')
+    crashed.close()
+
+    # The other session was submitted before the restart; its graded answers are final
+    response = client.post(
+        f"/test-sessions/{completed_id}/submit",
+        json={"responses": [{"question_id": completed_question, "selected_option_id": completed_option_ids[0]}]},
+        headers=completed_headers
+    )
+    assert response.status_code == 200
+
+    restarted = AutosaveBuffer(journal_path)
+    db = SessionLocal()
+    try:
+        assert restarted.recover(db) == 5
+    finally:
+        db.close()
+        restarted.close()
+
+    assert stored_selections(session_id) == {first: options[first][3], second: options[second][0]}
+    assert stored_selections(completed_id) == {completed_question: completed_option_ids[0]}
+    with open(journal_path) as journal:
+        assert journal.read() == ""
+
+def test_flusher_writes_on_its_interval(client, setup_users, write_behind):
+    """Test that the background flusher writes buffered saves without a request forcing it."""
+    session_id, options, headers = start_session(client, setup_users, 1, student=2)
+    (question_id, option_ids), = options.items()
+    save(client, session_id, headers, question_id, option_ids[1])
+
+    async def run_briefly():
+        flusher = asyncio.create_task(autosave.run_autosave_flusher(interval_ms=10))
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if not write_behind.pending_count():
+                break
+        flusher.cancel()
+
+    asyncio.run(run_briefly())
+    assert stored_selections(session_id) == {question_id: option_ids[1]}
+
+def test_batch_save_is_not_overwritten_by_buffered_saves(client, setup_users, write_behind):
+    """Test that a batch save wins over an earlier single save still in the buffer."""
+    session_id, options, headers = start_session(client, setup_users, 1, student=2)
+    (question_id, option_ids), = options.items()
+    save(client, session_id, headers, question_id, option_ids[1])
+
+    response = client.post(
+        f"/test-sessions/{session_id}/save-responses",
+        json={"responses": [{"question_id": question_id, "selected_option_id": option_ids[0]}]},
+        headers=headers
+    )
+    assert response.status_code == 200
+    assert [item["status"] for item in response.json()["results"]] == ["saved"]
+
+    autosave.flush_autosave_buffer()
+    assert stored_selections(session_id) == {question_id: option_ids[0]}
+    assert saved_selections(client, session_id, headers) == {question_id: option_ids[0]}
+    response = client.post(f"/test-sessions/{session_id}/submit", json={"responses": []}, headers=headers)
+    assert response.json()["correct_answers"] == 1
+
+def test_submit_waits_for_a_flush_in_flight(client, setup_users, write_behind, monkeypatch):
+    """Test that answers a background flush has taken but not committed are still graded on submit."""
+    session_id, options, headers = start_session(client, setup_users, 1, student=2)
+    (question_id, option_ids), = options.items()
+    save(client, session_id, headers, question_id, option_ids[0])
+
+    taken, proceed = threading.Event(), threading.Event()
+    upsert_responses = autosave.upsert_responses
+
+    def slow_upsert(db, test_session_id, rows):
+        taken.set()
+        proceed.wait(5)
+        return upsert_responses(db, test_session_id, rows)
+    monkeypatch.setattr(autosave, "upsert_responses", slow_upsert)
+
+    with ThreadPoolExecutor(2) as executor:
+        flush = executor.submit(autosave.flush_autosave_buffer)
+        assert taken.wait(5)
+        submit = executor.submit(
+            client.post, f"/test-sessions/{session_id}/submit", json={"responses": []}, headers=headers
+        )
+        time.sleep(0.2)
+        proceed.set()
+        assert flush.result() == 1
+        response = submit.result()
+
+    assert response.status_code == 200
+    assert response.json()["correct_answers"] == 1
+    # The submitted session takes no more saves, even ones already past the completed check
+    assert not write_behind.record(session_id, [{
+        "question_id": question_id, "selected_option_id": option_ids[1],
+        "selected_option_ids": None, "client_sequence": None
+    }])
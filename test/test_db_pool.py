@@ -0,0 +1,55 @@
+import pytest
+from sqlalchemy import create_engine, exc
+from app.database.pool import InstrumentedQueuePool, attach_telemetry, pool_options
+from test.conftest import auth_headers
+
+def test_pool_options_follow_environment(monkeypatch):
+    """Test that pool sizing comes from the environment with per-backend defaults."""
+    monkeypatch.setenv("DB_POOL_SIZE", "3")
+    options = pool_options("postgresql://user:secret@db/api", InstrumentedQueuePool)
+    assert options["pool_size"] == 3
+    assert options["pool_pre_ping"] is True
+    assert options["pool_recycle"] == 1800
+
+    assert pool_options("sqlite:///./app.db", InstrumentedQueuePool)["pool_pre_ping"] is False
+    assert pool_options("sqlite://", InstrumentedQueuePool) == {}
+
+def test_pool_telemetry_counts_overflow_and_timeouts(tmp_path):
+    """Test that checkouts beyond the pool size and checkouts that time out are counted."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05
+    )
+    telemetry = attach_telemetry("test-pool", engine)
+    first = engine.connect()
+    second = engine.connect()  # overflow connection
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+
+    stats = telemetry.snapshot()
+    assert stats["in_use"] == 2
+    assert stats["overflow_events"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["wait_max_ms"] >= 50
+
+    first.close()
+    second.close()
+    assert telemetry.snapshot()["in_use"] == 0
+    engine.dispose()
+
+def test_db_pool_endpoint_reports_counters(client, setup_users):
+    """Test that admins can read the pool counters."""
+    users = setup_users
+    admin_headers = auth_headers(client, users["admin"][0]["username"])
+    student_headers = auth_headers(client, users["student"][0]["username"])
+
+    assert client.get("/admin/db-pool", headers=student_headers).status_code == 403
+    response = client.get("/admin/db-pool", headers=admin_headers)
+    assert response.status_code == 200
+    stats = response.json()["sync"]
+    assert stats["checkouts"] > 0
+    assert stats["checkouts"] >= stats["checkins"]
+    assert "wait_histogram_ms" in stats
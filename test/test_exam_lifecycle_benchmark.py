@@ -0,0 +1,42 @@
+from benchmarks.exam_lifecycle import (
+    STATEMENT_SLACK, Scenario, compare_with_baseline, load_baselines, save_baseline
+)
+
+SCENARIO = Scenario(
+    faculty=1, students=2, questions=4, tests=1, test_questions=2, autosaves=1, concurrency=2, database_mode="sync"
+)
+
+def report(exams_per_second=10.0, p95_ms=50.0, statements=3.0):
+    return {
+        "scenario": {},
+        "exams_per_second": exams_per_second,
+        "requests_per_second": exams_per_second * 5,
+        "endpoints": {
+            "submit": {"requests": 2, "p50_ms": 20.0, "p95_ms": p95_ms, "p99_ms": p95_ms, "statements": statements}
+        }
+    }
+
+def test_run_within_tolerance_passes():
+    """Test that noise within the tolerance is not reported as a regression."""
+    baseline = report()
+    assert compare_with_baseline(report(exams_per_second=7.0, p95_ms=70.0), baseline, 0.5) == []
+    assert compare_with_baseline(report(statements=3.0 + STATEMENT_SLACK), baseline, 0.5) == []
+
+def test_regressions_are_reported():
+    """Test that extra statements, slower p95 and lower throughput fail the run."""
+    baseline = report()
+    assert len(compare_with_baseline(report(statements=4.0), baseline, 0.5)) == 1
+    assert len(compare_with_baseline(report(p95_ms=80.0), baseline, 0.5)) == 1
+    assert len(compare_with_baseline(report(exams_per_second=6.0), baseline, 0.5)) == 1
+
+def test_baselines_are_stored_per_scenario(tmp_path):
+    """Test that saving a baseline keeps the baselines of other scenarios."""
+    path = tmp_path / "baselines.json"
+    other = Scenario(**{**SCENARIO.__dict__, "database_mode": "async"})
+    save_baseline(report(), SCENARIO, path)
+    save_baseline(report(statements=5.0), other, path)
+
+    baselines = load_baselines(path)
+    assert baselines[SCENARIO.key]["endpoints"]["submit"]["statements"] == 3.0
+    assert baselines[other.key]["endpoints"]["submit"]["statements"] == 5.0
+    assert load_baselines(tmp_path / "missing.json") == {}
@@ -0,0 +1,102 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+from app.services import exports
+from test.conftest import auth_headers, create_exam, register_user, submit_answers
+from test.test_question_import import ndjson, question, upload
+
+@pytest.fixture(scope="module")
+def faculty_headers(client, setup_users):
+    faculty = register_user(client, "faculty", 93)
+    headers = auth_headers(client, faculty["username"])
+    response = upload(client, headers, ndjson(
+        question("Exportable first?", tags="exportbank, first", subject="Exports"),
+        question("Exportable multiple?", correct=(1, 3), question_type="multiple", option_count=5,
+                 tags="exportbank", subject="Exports", explanation='Has "quotes", commas\nand lines'),
+        question("Exportable third?", tags="exportbank", subject="Exports"),
+    ))
+    assert response.json()["imported"] == 3
+    return headers
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    """Fetch and encode two rows at a time, so records span cursor partitions"""
+    monkeypatch.setattr(exports, "EXPORT_BATCH_SIZE", 2)
+
+def export_questions(client, headers, **params):
+    response = client.get("/questions/export", params={"tags": "exportbank", **params}, headers=headers)
+    assert response.status_code == 200
+    return response
+
+def test_question_export_ndjson(client, faculty_headers, small_batches):
+    """Test that every question is exported once with all of its options."""
+    response = export_questions(client, faculty_headers)
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"] == 'attachment; filename="questions.ndjson"'
+
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [record["question_text"] for record in records] == [
+        "Exportable first?", "Exportable multiple?", "Exportable third?"
+    ]
+    multiple = records[1]
+    assert multiple["question_type"] == "multiple"
+    assert multiple["explanation"] == 'Has "quotes", commas\nand lines'
+    assert [option["is_correct"] for option in multiple["options"]] == [False, True, False, True, False]
+    assert all(len(record["options"]) == 4 for record in (records[0], records[2]))
+
+def test_question_export_csv_can_be_imported_again(client, faculty_headers, small_batches):
+    """Test that a gzipped CSV export round-trips through the bulk import."""
+    response = export_questions(client, faculty_headers, format="csv", gzip="true")
+    assert response.headers["content-type"] == "application/gzip"
+    assert response.headers["content-disposition"] == 'attachment; filename="questions.csv.gz"'
+    text = gzip.decompress(response.content).decode()
+
+    rows = list(csv.DictReader(io.StringIO(text)))
+    assert len(rows) == 3
+    assert [name for name in rows[0] if name.startswith("option_")] == [f"option_{n}" for n in range(1, 6)]
+    assert rows[1]["correct"] == "2,4"
+    assert rows[1]["explanation"] == 'Has "quotes", commas\nand lines'
+
+    other = auth_headers(client, register_user(client, "faculty", 94)["username"])
+    result = upload(client, other, text.replace("exportbank", "reimported"), content_type="text/csv").json()
+    assert (result["imported"], result["failed"]) == (3, 0)
+    reimported = [json.loads(line) for line in export_questions(client, other, tags="reimported").text.splitlines()]
+    original = [json.loads(line) for line in export_questions(client, faculty_headers).text.splitlines()]
+    assert [record["options"] for record in reimported] == [record["options"] for record in original]
+
+def test_question_export_respects_visibility(client, faculty_headers, setup_users):
+    """Test that faculty export only their own and public questions."""
+    other = auth_headers(client, setup_users["faculty"][0]["username"])
+    assert export_questions(client, other).text == ""
+    student = auth_headers(client, setup_users["student"][0]["username"])
+    assert client.get("/questions/export", headers=student).status_code == 403
+
+def test_results_export(client, setup_users, small_batches):
+    """Test the results export of a test in both formats."""
+    faculty = auth_headers(client, register_user(client, "faculty", 95)["username"])
+    test_id, question_ids = create_exam(client, faculty, 3)
+    students = [register_user(client, "student", 85 + n) for n in range(3)]
+    for student, answers in zip(students, ([True, True, True], [True, None, False], [None, None, None])):
+        submit_answers(client, auth_headers(client, student["username"]), test_id, answers)
+    # A session in progress is not a result
+    client.post("/test-sessions/", json={"test_id": test_id}, headers=auth_headers(client, setup_users["student"][3]["username"]))
+
+    response = client.get(f"/tests/{test_id}/results/export", headers=faculty)
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == f'attachment; filename="test-{test_id}-results.ndjson"'
+    sessions = [json.loads(line) for line in response.text.splitlines()]
+    assert [session["username"] for session in sessions] == [student["username"] for student in students]
+    assert [session["correct_answers"] for session in sessions] == [3, 1, 0]
+    assert [len(session["responses"]) for session in sessions] == [3, 2, 0]
+    assert [response["is_correct"] for response in sessions[1]["responses"]] == [True, False]
+
+    response = client.get(f"/tests/{test_id}/results/export", params={"format": "csv"}, headers=faculty)
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 3 + 2 + 1
+    assert rows[-1]["question_id"] == "" and rows[-1]["score"] == "0.0"
+
+    other = auth_headers(client, setup_users["faculty"][0]["username"])
+    assert client.get(f"/tests/{test_id}/results/export", headers=other).status_code == 403
@@ -0,0 +1,61 @@
+import pytest
+from app.models.question import QuestionType
+from app.services.answer_keys import AnswerKey, AnswerKeyEntry
+from app.services.grading import grade_selections
+from test.conftest import auth_headers, create_exam
+
+ANSWER_KEY = AnswerKey(
+    test_id=1,
+    questions={
+        1: AnswerKeyEntry(1, QuestionType.SINGLE, 2.0, frozenset({10, 11, 12, 13}), frozenset({10})),
+        2: AnswerKeyEntry(2, QuestionType.MULTIPLE, 3.0, frozenset({20, 21, 22, 23}), frozenset({20, 21})),
+    }
+)
+
+def test_grade_selections_scores_single_and_multiple_choice():
+    """Test that single and multiple choice questions are graded on the full selection."""
+    result = grade_selections(ANSWER_KEY, {1: frozenset({10}), 2: frozenset({20, 21})})
+    assert result.score == 5.0
+    assert result.correct_answers == 2
+    assert result.question_count == 2
+
+    # A partial or over-complete selection of a multiple choice question is wrong
+    assert grade_selections(ANSWER_KEY, {2: frozenset({20})}).correct_answers == 0
+    assert grade_selections(ANSWER_KEY, {2: frozenset({20, 21, 22})}).correct_answers == 0
+
+def test_grade_selections_ignores_foreign_questions_and_options():
+    """Test that questions outside the test and options outside the question are ignored."""
+    result = grade_selections(ANSWER_KEY, {1: frozenset({10, 99}), 3: frozenset({30})})
+    assert [response.question_id for response in result.responses] == [1]
+    assert result.score == 2.0
+
+def test_submit_grades_multiple_choice_questions(client, setup_users):
+    """Test that submitting several options for a multiple choice question grades the whole selection."""
+    users = setup_users
+    faculty_headers = auth_headers(client, users["faculty"][3]["username"])
+    student_headers = auth_headers(client, users["student"][0]["username"])
+
+    # Options 0 and 1 of every question are correct
+    test_id, question_ids = create_exam(client, faculty_headers, 2, question_type="multiple")
+    session = client.post("/test-sessions/", json={"test_id": test_id}, headers=student_headers).json()
+    options = {}
+    for question_id in question_ids:
+        response = client.get(f"/questions/{question_id}", headers=faculty_headers)
+        options[question_id] = [option["id"] for option in response.json()["options"]]
+
+    first, second = question_ids
+    responses = [
+        {"question_id": first, "selected_option_id": options[first][0]},
+        {"question_id": first, "selected_option_id": options[first][1]},
+        {"question_id": second, "selected_option_id": options[second][0]},
+    ]
+    response = client.post(f"/test-sessions/{session['id']}/submit", json={"responses": responses}, headers=student_headers)
+    assert response.status_code == 200
+    results = response.json()
+    assert results["correct_answers"] == 1
+    assert results["score"] == 1.0
+    assert results["question_count"] == 2
+
+    response = client.get(f"/test-sessions/{session['id']}/results", headers=student_headers)
+    assert response.status_code == 200
+    assert response.json()["correct_answers"] == 1
@@ -0,0 +1,69 @@
+import re
+
+import pytest
+from app.utils import instrumentation
+from app.utils.instrumentation import UNMATCHED_ROUTE, metrics_registry
+from test.conftest import auth_headers, create_exam, register_user
+
+SERVER_TIMING = re.compile(
+    r'^db;dur=\d+\.\d{2};desc="(\d+) statements", serialize;dur=\d+\.\d{2}, total;dur=\d+\.\d{2}$'
+)
+
+@pytest.fixture(scope="module")
+def faculty_headers(client, setup_users):
+    faculty = register_user(client, "faculty", 91)
+    headers = auth_headers(client, faculty["username"])
+    create_exam(client, headers, 3)
+    return headers
+
+def test_route_metrics_count_the_request_statements(client, faculty_headers, count_queries):
+    """Test that the statements of a request are recorded under its route template."""
+    metrics_registry.reset()
+    with count_queries() as counter:
+        response = client.get("/questions/?limit=10", headers=faculty_headers)
+    assert response.status_code == 200
+
+    route = metrics_registry.route("GET", "/questions/")
+    assert route is not None
+    assert route.statuses == {200: 1}
+    assert route.statements == counter.count
+    assert route.db_seconds > 0
+    assert route.latency_seconds >= route.db_seconds
+
+def test_path_parameters_share_one_series(client, faculty_headers):
+    """Test that requests are labelled by route template, not by concrete path."""
+    metrics_registry.reset()
+    question_ids = [question["id"] for question in client.get("/questions/?limit=2", headers=faculty_headers).json()]
+    for question_id in question_ids:
+        assert client.get(f"/questions/{question_id}", headers=faculty_headers).status_code == 200
+    assert client.get("/no-such-route").status_code == 404
+
+    assert metrics_registry.route("GET", "/questions/{question_id}").requests == len(question_ids)
+    assert metrics_registry.route("GET", UNMATCHED_ROUTE).statuses == {404: 1}
+
+def test_metrics_endpoint_renders_prometheus_text(client, faculty_headers):
+    """Test the Prometheus exposition of the per-route totals."""
+    metrics_registry.reset()
+    client.get("/questions/?limit=10", headers=faculty_headers)
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    body = response.text
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert 'http_requests_total{method="GET",route="/questions/",status="200"} 1' in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/questions/"} 1' in body
+    assert 'http_request_db_statements_bucket{method="GET",route="/questions/",le="+Inf"} 1' in body
+    assert 'http_request_serialization_seconds_total{method="GET",route="/questions/"}' in body
+
+def test_server_timing_header(client, faculty_headers, count_queries, monkeypatch):
+    """Test the Server-Timing header, only added when SERVER_TIMING is on."""
+    monkeypatch.setattr(instrumentation, "SERVER_TIMING", False)
+    assert "server-timing" not in client.get("/").headers
+
+    monkeypatch.setattr(instrumentation, "SERVER_TIMING", True)
+    with count_queries() as counter:
+        response = client.get("/questions/?limit=10", headers=faculty_headers)
+    match = SERVER_TIMING.match(response.headers["server-timing"])
+    assert match is not None
+    assert int(match.group(1)) == counter.count
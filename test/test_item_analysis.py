@@ -0,0 +1,105 @@
+import statistics
+
+import pytest
+from sqlalchemy import select
+from app.database.database import SessionLocal
+from app.jobs.item_analysis import analyse_test, run_item_analysis
+from app import models
+from test.conftest import auth_headers, create_exam, register_user, submit_answers
+
+# Answers of each student per question: True correct, False wrong, None unanswered (scores 0)
+ANSWERS = [
+    [True, True, True, True],
+    [True, True, False, None],
+    [True, False, True, False],
+    [False, None, False, None],
+    [True, True, False, True],
+]
+
+@pytest.fixture(scope="module")
+def taken_exam(client, setup_users):
+    """An exam taken by one student per row of ANSWERS"""
+    faculty_headers = auth_headers(client, setup_users["faculty"][3]["username"])
+    test_id, question_ids = create_exam(client, faculty_headers, 4)
+    for index, answers in enumerate(ANSWERS):
+        student = register_user(client, "student", 80 + index)
+        submit_answers(client, auth_headers(client, student["username"]), test_id, answers)
+    return test_id, question_ids
+
+def expected_statistics():
+    """Item statistics of ANSWERS computed on the dense score matrix"""
+    scores = [[1 if answer else 0 for answer in answers] for answers in ANSWERS]
+    totals = [sum(row) for row in scores]
+    questions = []
+    for index in range(len(scores[0])):
+        item = [row[index] for row in scores]
+        rest = [total - score for total, score in zip(totals, item)]
+        questions.append((statistics.mean(item), statistics.correlation(item, rest)))
+    item_variance = sum(p * (1 - p) for p, _ in questions)
+    k = len(questions)
+    kr20 = k / (k - 1) * (1 - item_variance / statistics.pvariance(totals))
+    return questions, statistics.mean(totals), kr20
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 100000])
+def test_item_statistics_match_the_score_matrix(taken_exam, chunk_size):
+    """Test p-values, point-biserials and KR-20 whatever the chunk size."""
+    test_id, question_ids = taken_exam
+    questions, mean_score, kr20 = expected_statistics()
+
+    db = SessionLocal()
+    try:
+        results = analyse_test(db, test_id, chunk_size)
+    finally:
+        db.close()
+
+    assert results["session_count"] == len(ANSWERS)
+    assert results["question_count"] == len(question_ids)
+    assert results["mean_score"] == pytest.approx(mean_score)
+    assert results["kr20"] == pytest.approx(kr20)
+    assert [question["question_id"] for question in results["questions"]] == question_ids
+    assert [question["answered_count"] for question in results["questions"]] == [5, 4, 5, 3]
+    for question, (p_value, point_biserial) in zip(results["questions"], questions):
+        assert question["p_value"] == pytest.approx(p_value)
+        assert question["point_biserial"] == pytest.approx(point_biserial)
+
+def test_item_analysis_job_stores_results(taken_exam):
+    """Test that the job writes one row per test question and replaces them on re-runs."""
+    test_id, question_ids = taken_exam
+    questions, _, kr20 = expected_statistics()
+
+    db = SessionLocal()
+    try:
+        assert run_item_analysis(db, [test_id]) == [test_id]
+        assert run_item_analysis(db, [test_id], chunk_size=2) == [test_id]
+        stored = db.execute(
+            select(models.QuestionItemStats.question_id, models.QuestionItemStats.p_value)
+            .where(models.QuestionItemStats.test_id == test_id)
+            .order_by(models.QuestionItemStats.question_id)
+        ).all()
+        test_stats = db.get(models.TestItemStats, test_id)
+        assert test_stats.kr20 == pytest.approx(kr20)
+    finally:
+        db.close()
+
+    assert [question_id for question_id, _ in stored] == question_ids
+    assert [p_value for _, p_value in stored] == pytest.approx([p_value for p_value, _ in questions])
+
+def test_item_analysis_of_a_test_without_completed_sessions(client, setup_users):
+    """Test that a test nobody has completed gets empty statistics instead of failing the job."""
+    faculty_headers = auth_headers(client, setup_users["faculty"][3]["username"])
+    test_id, question_ids = create_exam(client, faculty_headers, 3)
+
+    db = SessionLocal()
+    try:
+        assert run_item_analysis(db, [test_id]) == [test_id]
+        test_stats = db.get(models.TestItemStats, test_id)
+        assert (test_stats.session_count, test_stats.mean_score, test_stats.kr20) == (0, None, None)
+        stored = db.execute(
+            select(models.QuestionItemStats.question_id, models.QuestionItemStats.p_value)
+            .where(models.QuestionItemStats.test_id == test_id)
+            .order_by(models.QuestionItemStats.question_id)
+        ).all()
+    finally:
+        db.close()
+
+    assert stored == [(question_id, None) for question_id in question_ids]
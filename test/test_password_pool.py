@@ -0,0 +1,33 @@
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from app.auth import passwords
+from app.auth.passwords import hash_password, check_password
+from test.conftest import LOGIN_URL
+
+def test_password_hash_uses_configured_cost():
+    """Test that new hashes use BCRYPT_ROUNDS and still verify."""
+    hashed = hash_password("secret")
+    assert hashed.startswith("$2b$04$")
+    assert check_password("secret", hashed)
+    assert not check_password("wrong", hashed)
+
+def test_login_is_rejected_when_password_pool_is_full(client, setup_users, monkeypatch):
+    """Test that logins get a 503 instead of queueing once the pool's pending limit is reached."""
+    monkeypatch.setattr("app.auth.passwords.PASSWORD_HASH_MAX_PENDING", 0)
+    response = client.post(LOGIN_URL, data={"username": setup_users["admin"][0]["username"], "password": "string"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+def test_login_recovers_from_a_crashed_password_worker(client, setup_users):
+    """Test that a pool broken by a dead worker is replaced instead of failing every later login."""
+    executor = passwords._get_executor()
+    if executor is None:
+        pytest.skip("PASSWORD_HASH_WORKERS=0 hashes on the thread pool")
+    with pytest.raises(BrokenProcessPool):
+        executor.submit(os._exit, 1).result()
+
+    response = client.post(LOGIN_URL, data={"username": setup_users["admin"][0]["username"], "password": "string"})
+    assert response.status_code == 200
+    assert passwords._get_executor() is not executor
@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import InvalidRequestError
+from app.database.database import SessionLocal
+from app.models.question import Question
+from app.services.loaders import QUESTION_RESPONSE_LOADERS
+from test.conftest import auth_headers, create_exam, register_user
+
+# Statements per request, whatever the number of questions: user, [test,] questions, options
+QUERY_BUDGETS = {
+    "list_questions": 3,
+    "list_questions_cursor": 3,
+    "get_question": 3,
+    "get_test_questions": 4,
+}
+
+@pytest.fixture(scope="module")
+def exam(client, setup_users):
+    faculty = register_user(client, "faculty", 90)
+    faculty_headers = auth_headers(client, faculty["username"])
+    test_id, question_ids = create_exam(client, faculty_headers, 30)
+    return test_id, question_ids, faculty_headers
+
+def endpoint_url(endpoint, test_id, question_ids):
+    return {
+        "list_questions": "/questions/?limit=100",
+        "list_questions_cursor": "/questions/?limit=100&pagination=cursor",
+        "get_question": f"/questions/{question_ids[0]}",
+        "get_test_questions": f"/tests/{test_id}/questions/",
+    }[endpoint]
+
+@pytest.mark.parametrize("endpoint", QUERY_BUDGETS)
+def test_question_endpoints_stay_within_query_budget(client, exam, query_budget, endpoint):
+    """Test that serialising a page of questions does not issue a query per question."""
+    test_id, question_ids, faculty_headers = exam
+    with query_budget(QUERY_BUDGETS[endpoint]):
+        response = client.get(endpoint_url(endpoint, test_id, question_ids), headers=faculty_headers)
+    assert response.status_code == 200
+
+    body = response.json()
+    questions = body["items"] if isinstance(body, dict) and "items" in body else body
+    if isinstance(questions, dict):
+        questions = [questions]
+    questions = [question.get("question", question) for question in questions]
+    assert len(questions) >= 1
+    assert all(len(question["options"]) == 4 for question in questions)
+
+def test_other_relationships_raise_instead_of_lazy_loading(exam):
+    """Test that relationships QuestionResponse does not need fail loudly when touched."""
+    _, question_ids, _ = exam
+    db = SessionLocal()
+    try:
+        question = db.scalar(
+            select(Question).options(*QUESTION_RESPONSE_LOADERS).where(Question.id == question_ids[0])
+        )
+        assert len(question.options) == 4
+        with pytest.raises(InvalidRequestError):
+            question.tests
+        with pytest.raises(InvalidRequestError):
+            question.user_responses
+        with pytest.raises(InvalidRequestError):
+            question.options[0].user_responses
+    finally:
+        db.close()
@@ -0,0 +1,96 @@
+"""
+Query plan checks for the hot queries.
+
+Each statement below mirrors a query the routers or services issue on every
+request. The test asks the database for its plan and fails if any table is
+read with a full scan, so a dropped or mistyped index shows up here rather
+than as a slow endpoint in production. On PostgreSQL sequential scans are
+disabled for the check, since the planner always prefers them on tiny tables.
+"""
+import pytest
+from sqlalchemy import func, or_, select, text
+from app.database.database import engine
+from app.models import Option, OptionOrder, Question, Tag, UserResponse, question_tags, test_questions
+# Module access keeps pytest from collecting the Test* models as test classes
+from app import models
+
+HOT_QUERIES = {
+    # test_sessions.start_test_session, test_sessions.get_user_active_sessions
+    "active session of a test": select(models.TestSession).where(
+        models.TestSession.user_id == 1, models.TestSession.test_id == 1, models.TestSession.completed_at.is_(None)
+    ),
+    "active sessions of a user": select(models.TestSession).where(
+        models.TestSession.user_id == 1, models.TestSession.completed_at.is_(None)
+    ),
+    # student.start_test, student.get_test_results
+    "sessions of a test": select(models.TestSession).where(models.TestSession.test_id == 1, models.TestSession.user_id == 1),
+    "completed sessions of a user": select(models.TestSession).where(
+        models.TestSession.user_id == 1, models.TestSession.completed_at.isnot(None)
+    ),
+    # student.get_available_tests
+    "untaken active tests": select(models.Test).where(
+        models.Test.is_active == True, ~models.Test.test_sessions.any(models.TestSession.user_id == 1)
+    ),
+    # test_sessions.save_single_response, get_saved_responses, get_test_results, grading
+    "saved response": select(UserResponse).where(
+        UserResponse.test_session_id == 1, UserResponse.question_id == 1
+    ),
+    "responses of a session": select(UserResponse).where(UserResponse.test_session_id == 1),
+    "correct responses of a session": select(func.count(UserResponse.id)).where(
+        UserResponse.test_session_id == 1, UserResponse.is_correct == True
+    ),
+    # option_orders.get_option_orders (stored mode)
+    "option orders of a session": select(OptionOrder).where(OptionOrder.test_session_id == 1),
+    # selectinload(Question.options), save_single_response option check
+    "options of questions": select(Option).where(Option.question_id.in_([1, 2, 3])),
+    # answer_keys.load_answer_key
+    "answer key": (
+        select(test_questions.c.question_id, test_questions.c.marks, Question.question_type, Option.id, Option.is_correct)
+        .join(Question, Question.id == test_questions.c.question_id)
+        .outerjoin(Option, Option.question_id == test_questions.c.question_id)
+        .where(test_questions.c.test_id == 1)
+    ),
+    # answer_keys.invalidate_question
+    "tests of a question": select(test_questions.c.test_id).where(test_questions.c.question_id == 1),
+    # test_questions.get_test_questions, add_question_to_test
+    "questions of a test in order": (
+        select(test_questions).where(test_questions.c.test_id == 1).order_by(test_questions.c.question_order)
+    ),
+    # questions.get_questions with the bank filters
+    "filtered question bank": (
+        select(Question)
+        .where(
+            or_(Question.created_by == 1, Question.is_public == True),
+            Question.subject == "physics",
+            Question.difficulty_level == "hard"
+        )
+        .order_by(Question.id)
+        .limit(21)
+    ),
+    "own questions": select(Question).where(Question.created_by == 1, Question.is_public == False),
+    # tags.apply_tag_filter
+    "questions with a tag": (
+        select(question_tags.c.question_id)
+        .join(Tag, Tag.id == question_tags.c.tag_id)
+        .where(Tag.name.in_(["algebra"]))
+    ),
+}
+
+def full_scans(connection, statement):
+    """Plan lines of `statement` that read a whole table"""
+    sql = str(statement.compile(engine, compile_kwargs={"literal_binds": True}))
+    if engine.dialect.name == "sqlite":
+        plan = [row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+        # "SCAN t" reads every row; "SEARCH t USING ..." and "SCAN t USING COVERING INDEX" ranges do not
+        return [line for line in plan if line.startswith("SCAN ") and " USING " not in line]
+    if engine.dialect.name == "postgresql":
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = [row[0] for row in connection.execute(text(f"EXPLAIN {sql}"))]
+        return [line.strip() for line in plan if "Seq Scan" in line]
+    pytest.skip(f"No query plan check for {engine.dialect.name}")
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+def test_hot_query_uses_an_index(client, name):
+    """Test that a hot query is answered from an index instead of a table scan."""
+    with engine.connect() as connection:
+        assert full_scans(connection, HOT_QUERIES[name]) == []
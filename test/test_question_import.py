@@ -0,0 +1,107 @@
+import json
+
+import pytest
+from app.routers import questions as questions_router
+from test.conftest import auth_headers, register_user
+from test.test_question_tags import filter_by_tags, stored_tags
+
+@pytest.fixture(scope="module")
+def faculty_headers(client, setup_users):
+    faculty = register_user(client, "faculty", 92)
+    return auth_headers(client, faculty["username"])
+
+def question(text, correct=(0,), question_type="single", option_count=4, **fields):
+    return {
+        "question_text": text,
+        "question_type": question_type,
+        "options": [{"option_text": f"Option {n}", "is_correct": n in correct} for n in range(option_count)],
+        **fields
+    }
+
+def ndjson(*records):
+    return "\n".join(record if isinstance(record, str) else json.dumps(record) for record in records) + "\n"
+
+def upload(client, headers, body, content_type="application/x-ndjson", **params):
+    return client.post(
+        "/questions/bulk", content=body.encode(), params=params,
+        headers={**headers, "Content-Type": content_type}
+    )
+
+def imported_questions(client, headers, search):
+    response = client.get("/questions/", params={"search": search, "limit": 1000}, headers=headers)
+    assert response.status_code == 200
+    return {question["question_text"]: question for question in response.json()}
+
+def test_ndjson_import_reports_invalid_rows_and_keeps_the_rest(client, faculty_headers):
+    """Test that invalid records are reported by number without aborting the import."""
+    body = ndjson(
+        question("Bulkndjson first?", tags="bulkimport, Algebra"),
+        question("Bulkndjson too few options?", option_count=3),
+        question("Bulkndjson multiple?", correct=(0, 2), question_type="multiple", subject="Maths"),
+        "{not json",
+        "",
+        ["not", "an", "object"],
+        question("Bulkndjson two correct?", correct=(0, 1)),
+        question("Bulkndjson last?", explanation="Because."),
+    )
+    response = upload(client, faculty_headers, body)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["imported"] == 3
+    assert result["failed"] == 4
+    assert [error["row"] for error in result["errors"]] == [2, 4, 5, 6]
+    assert "At least 4 options are required" in result["errors"][0]["errors"][0]
+    assert result["errors"][1]["errors"][0].startswith("Invalid JSON")
+
+    imported = imported_questions(client, faculty_headers, "bulkndjson")
+    assert sorted(imported) == ["Bulkndjson first?", "Bulkndjson last?", "Bulkndjson multiple?"]
+    multiple = imported["Bulkndjson multiple?"]
+    assert multiple["subject"] == "Maths"
+    assert [option["is_correct"] for option in multiple["options"]] == [True, False, True, False]
+    first = imported["Bulkndjson first?"]
+    assert stored_tags(first["id"]) == ["algebra", "bulkimport"]
+    assert filter_by_tags(client, faculty_headers, ["bulkimport"]) == [first["id"]]
+
+def test_csv_import(client, faculty_headers):
+    """Test CSV records, including quoted fields spanning lines and several correct options."""
+    body = (
+        "question_text,question_type,tags,is_public,option_1,option_2,option_3,option_4,option_5,correct\r\n"
+        'Bulkcsv single?,single,"bulkcsv, csv",false,A,B,C,D,,2\r\n'
+        '"Bulkcsv ""quoted""\r\nover two lines?",multiple,,,A,B,C,D,E,"1,3"\r\n'
+        "Bulkcsv none correct?,,,,A,B,C,D,,\r\n"
+        "Bulkcsv too many columns?,single,,,A,B,C,D,,1,extra\r\n"
+    )
+    response = upload(client, faculty_headers, body, content_type="text/csv; charset=utf-8")
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["imported"], result["failed"]) == (2, 2)
+    assert [error["row"] for error in result["errors"]] == [3, 4]
+
+    imported = imported_questions(client, faculty_headers, "bulkcsv")
+    single = imported["Bulkcsv single?"]
+    assert [option["is_correct"] for option in single["options"]] == [False, True, False, False]
+    assert stored_tags(single["id"]) == ["bulkcsv", "csv"]
+    multiple = imported['Bulkcsv "quoted"\r\nover two lines?']
+    assert multiple["question_type"] == "multiple"
+    assert [option["option_text"] for option in multiple["options"]] == ["A", "B", "C", "D", "E"]
+    assert [option["is_correct"] for option in multiple["options"]] == [True, False, True, False, False]
+
+def test_import_inserts_in_chunks(client, faculty_headers, query_budget, monkeypatch):
+    """Test that statements grow with the number of chunks, not of questions."""
+    monkeypatch.setattr(questions_router, "IMPORT_CHUNK_SIZE", 20)
+    body = ndjson(*(question(f"Bulkchunk {n}?", tags=f"bulkchunk{n % 3}") for n in range(50)))
+    # User lookup, then per chunk: questions, options, tag lookup, new tags, tag ids, question tags
+    with query_budget(1 + 3 * 6):
+        response = upload(client, faculty_headers, body)
+    assert response.json() == {"imported": 50, "failed": 0, "errors": []}
+    assert len(imported_questions(client, faculty_headers, "bulkchunk")) == 50
+
+def test_format_comes_from_content_type_or_query(client, faculty_headers, setup_users):
+    """Test the format negotiation and that students cannot import."""
+    body = ndjson(question("Bulkformat?"))
+    assert upload(client, faculty_headers, body, content_type="text/plain").status_code == 415
+    response = upload(client, faculty_headers, body, content_type="text/plain", format="ndjson")
+    assert response.json()["imported"] == 1
+
+    student_headers = auth_headers(client, setup_users["student"][0]["username"])
+    assert upload(client, student_headers, body).status_code == 403
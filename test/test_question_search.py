@@ -0,0 +1,67 @@
+import pytest
+from app.services.question_search import SearchMode, search_terms
+from test.conftest import auth_headers
+
+def create_question(client, headers, text, tags=None):
+    response = client.post(
+        "/questions/",
+        json={
+            "question_text": text,
+            "tags": tags,
+            "is_public": True,
+            "options": [{"option_text": f"Option {n}", "is_correct": n == 0} for n in range(4)]
+        },
+        headers=headers
+    )
+    assert response.status_code == 201
+    return response.json()["id"]
+
+def search(client, headers, term):
+    response = client.get("/questions/", params={"search": term}, headers=headers)
+    assert response.status_code == 200
+    return [question["id"] for question in response.json()]
+
+def test_search_terms_drop_query_syntax():
+    """Test that operators and quotes in the search box are treated as word separators."""
+    assert search_terms('photo* "synthesis" OR -leaf') == ["photo", "synthesis", "or", "leaf"]
+
+def test_search_matches_prefixes_and_ranks_question_text_first(client, setup_users):
+    """Test that searches match word prefixes and rank question text above tags."""
+    users = setup_users
+    faculty_headers = auth_headers(client, users["faculty"][0]["username"])
+
+    tagged = create_question(client, faculty_headers, "Which organelle stores water?", tags="photosynthesis")
+    in_text = create_question(client, faculty_headers, "What drives photosynthesis in chloroplasts?")
+    unrelated = create_question(client, faculty_headers, "What is the capital of Peru?")
+
+    results = search(client, faculty_headers, "photosynth")
+    assert results[:2] == [in_text, tagged]
+    assert unrelated not in results
+
+    # Every word has to match
+    assert search(client, faculty_headers, "photosynthesis chloroplasts") == [in_text]
+
+def test_search_index_follows_updates_and_deletes(client, setup_users):
+    """Test that editing and deleting questions keeps the search index in sync."""
+    users = setup_users
+    faculty_headers = auth_headers(client, users["faculty"][0]["username"])
+    question_id = create_question(client, faculty_headers, "Name the largest glacier in Antarctica.")
+    assert search(client, faculty_headers, "glacier") == [question_id]
+
+    response = client.put(f"/questions/{question_id}", json={"question_text": "Name the deepest trench."}, headers=faculty_headers)
+    assert response.status_code == 200
+    assert search(client, faculty_headers, "glacier") == []
+    assert search(client, faculty_headers, "trench") == [question_id]
+
+    response = client.delete(f"/questions/{question_id}", headers=faculty_headers)
+    assert response.status_code == 200
+    assert search(client, faculty_headers, "trench") == []
+
+def test_ilike_search_mode_is_still_available(client, setup_users, monkeypatch):
+    """Test that QUESTION_SEARCH_MODE=ilike keeps the substring search."""
+    monkeypatch.setattr("app.services.question_search.QUESTION_SEARCH_MODE", SearchMode.ILIKE)
+    users = setup_users
+    faculty_headers = auth_headers(client, users["faculty"][0]["username"])
+    question_id = create_question(client, faculty_headers, "Balance the equation for combustion.")
+    # Substrings in the middle of a word only match in ilike mode
+    assert search(client, faculty_headers, "mbustio") == [question_id]
@@ -0,0 +1,123 @@
+import pytest
+from app.services import autosave
+from app.services.autosave import AutosaveMode
+from test.conftest import auth_headers, create_exam
+
+def start_session(client, setup_users, question_count, student=0):
+    """Create an exam and start a session on it; returns the session id and the option ids per question."""
+    users = setup_users
+    faculty_headers = auth_headers(client, users["faculty"][1]["username"])
+    student_headers = auth_headers(client, users["student"][student]["username"])
+    test_id, question_ids = create_exam(client, faculty_headers, question_count)
+    response = client.post("/test-sessions/", json={"test_id": test_id}, headers=student_headers)
+    assert response.status_code == 201
+    session = response.json()
+    options = {question_id: [] for question_id in question_ids}
+    for order in sorted(session["option_orders"], key=lambda o: o["option_id"]):
+        options[order["question_id"]].append(order["option_id"])
+    return session["id"], options, student_headers
+
+def saved_selections(client, session_id, headers):
+    response = client.get(f"/test-sessions/{session_id}/saved-responses", headers=headers)
+    assert response.status_code == 200
+    return {saved["question_id"]: saved["selected_option_id"] for saved in response.json()["responses"]}
+
+def test_save_response_replaces_the_earlier_answer(client, setup_users):
+    """Test that saving a question again overwrites its response instead of adding one."""
+    session_id, options, headers = start_session(client, setup_users, 2)
+    question_id = next(iter(options))
+    for option_id in options[question_id][:3]:
+        response = client.post(
+            f"/test-sessions/{session_id}/save-response",
+            json={"question_id": question_id, "selected_option_id": option_id},
+            headers=headers
+        )
+        assert response.status_code == 201
+    assert saved_selections(client, session_id, headers) == {question_id: options[question_id][2]}
+
+def test_save_response_rejects_foreign_questions_and_options(client, setup_users):
+    """Test that questions outside the test and options of other questions are rejected."""
+    session_id, options, headers = start_session(client, setup_users, 2)
+    first, second = options
+    url = f"/test-sessions/{session_id}/save-response"
+
+    response = client.post(url, json={"question_id": first, "selected_option_id": options[second][0]}, headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid option for the question"
+
+    response = client.post(url, json={"question_id": 10 ** 9, "selected_option_id": options[first][0]}, headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Question does not belong to this test"
+    assert saved_selections(client, session_id, headers) == {}
+
+def test_save_response_is_one_read_and_one_write(client, setup_users, count_queries, monkeypatch):
+    """Test that an autosave reads the session and upserts the response, nothing else."""
+    # The write-behind path buffers instead of upserting
+    monkeypatch.setattr(autosave, "AUTOSAVE_MODE", AutosaveMode.DIRECT)
+    session_id, options, headers = start_session(client, setup_users, 3)
+    question_id = next(iter(options))
+    url = f"/test-sessions/{session_id}/save-response"
+
+    for option_id in options[question_id][:2]:
+        with count_queries() as counter:
+            response = client.post(url, json={"question_id": question_id, "selected_option_id": option_id}, headers=headers)
+        assert response.status_code == 201
+        # The principal lookup belongs to authentication, not to the autosave
+        statements = [statement for statement in counter.statements if "FROM users" not in statement]
+        assert len(statements) == 2
+        assert statements[0].lstrip().startswith("SELECT")
+        assert "ON CONFLICT" in statements[1]
+
+def save_batch(client, session_id, headers, responses):
+    response = client.post(f"/test-sessions/{session_id}/save-responses", json={"responses": responses}, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+def test_batch_save_keeps_the_latest_answer_per_question(client, setup_users):
+    """Test that a batch is written in one go with per-item statuses and last-write-wins by sequence."""
+    session_id, options, headers = start_session(client, setup_users, 3, student=1)
+    first, second, third = options
+
+    result = save_batch(client, session_id, headers, [
+        {"question_id": first, "selected_option_id": options[first][1], "client_sequence": 2},
+        # Arrives later but was answered earlier
+        {"question_id": first, "selected_option_id": options[first][0], "client_sequence": 1},
+        {"question_id": second, "selected_option_id": options[second][0], "client_sequence": 3},
+        {"question_id": third, "selected_option_id": options[first][0], "client_sequence": 4}
+    ])
+    assert result["saved"] == 2
+    assert [item["status"] for item in result["results"]] == ["saved", "superseded", "saved", "invalid"]
+    assert result["results"][3]["detail"] == "Invalid option for the question"
+
+    # A retried older batch cannot bring back an old answer
+    result = save_batch(client, session_id, headers, [
+        {"question_id": first, "selected_option_id": options[first][2], "client_sequence": 1},
+        {"question_id": second, "selected_option_id": options[second][3], "client_sequence": 5}
+    ])
+    assert [item["status"] for item in result["results"]] == ["stale", "saved"]
+    assert saved_selections(client, session_id, headers) == {first: options[first][1], second: options[second][3]}
+
+    # Saves without a sequence always replace the saved answer
+    response = client.post(
+        f"/test-sessions/{session_id}/save-response",
+        json={"question_id": second, "selected_option_id": options[second][2]},
+        headers=headers
+    )
+    assert response.json()["status"] == "success"
+    assert saved_selections(client, session_id, headers)[second] == options[second][2]
+
+def test_batch_save_is_one_read_and_one_write(client, setup_users, count_queries):
+    """Test that a batch costs the same statements as a single autosave."""
+    session_id, options, headers = start_session(client, setup_users, 10, student=1)
+    responses = [
+        {"question_id": question_id, "selected_option_id": option_ids[0], "client_sequence": n}
+        for n, (question_id, option_ids) in enumerate(options.items())
+    ]
+    # Warm the answer key cache
+    save_batch(client, session_id, headers, [{**responses[0], "client_sequence": -1}])
+
+    with count_queries() as counter:
+        result = save_batch(client, session_id, headers, responses)
+    assert result["saved"] == 10
+    statements = [statement for statement in counter.statements if "FROM users" not in statement]
+    assert len(statements) == 2
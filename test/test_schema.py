@@ -0,0 +1,48 @@
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import create_engine, inspect
+from app.database.schema import ALEMBIC_INI, SchemaOutOfDateError, check_schema, head_revision, reset_schema
+from app.models import Base
+from app.models.question.search_index import include_in_autogenerate
+
+@pytest.fixture
+def empty_database(tmp_path):
+    url = f"sqlite:///{tmp_path / 'schema.db'}"
+    engine = create_engine(url)
+    yield url, engine
+    engine.dispose()
+
+def upgrade_to_head(url):
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "migrations"))
+    config.set_main_option("sqlalchemy.url", url)
+    command.upgrade(config, "head")
+
+def test_startup_check_requires_migrations(empty_database):
+    """Test that the startup check rejects an unmigrated database and accepts one at head."""
+    url, engine = empty_database
+    with pytest.raises(SchemaOutOfDateError):
+        check_schema(engine)
+
+    upgrade_to_head(url)
+    check_schema(engine)
+
+def test_migrations_match_models(empty_database):
+    """Test that upgrading to head produces the schema the models describe."""
+    url, engine = empty_database
+    upgrade_to_head(url)
+    with engine.connect() as connection:
+        context = MigrationContext.configure(connection, opts={"include_name": include_in_autogenerate})
+        assert compare_metadata(context, Base.metadata) == []
+
+def test_reset_schema_stamps_head(empty_database):
+    """Test that the development reset recreates the tables and passes the startup check."""
+    url, engine = empty_database
+    reset_schema(engine)
+    assert "users" in inspect(engine).get_table_names()
+    with engine.connect() as connection:
+        assert MigrationContext.configure(connection).get_current_revision() == head_revision()
+    check_schema(engine)
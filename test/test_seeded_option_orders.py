@@ -0,0 +1,83 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from app.database.database import SessionLocal
+from app.models import session as session_models
+from app.models.session import OptionOrder, OptionOrderMode
+from app.services.option_orders import shuffle_option_layout
+from test.conftest import auth_headers, create_exam
+
+LAYOUT = ((11, (1, 2, 3, 4)), (12, (5, 6, 7, 8, 9)), (13, (10, 11, 12, 13)))
+
+def test_seeded_order_is_stable_across_processes():
+    """Test that the derived option order does not depend on the process or its hash seed."""
+    expected = shuffle_option_layout(LAYOUT, 424242)
+
+    script = (
+        "import json; from app.services.option_orders import shuffle_option_layout; "
+        f"print(json.dumps(shuffle_option_layout({LAYOUT!r}, 424242)))"
+    )
+    for hash_seed in ("0", "1", "random"):
+        output = subprocess.run(
+            [sys.executable, "-c", script],
+            env={**os.environ, "PYTHONHASHSEED": hash_seed},
+            capture_output=True, text=True, check=True
+        ).stdout
+        assert json.loads(output) == expected
+
+def test_seeded_order_of_a_question_ignores_other_questions():
+    """Test that adding a question to the test does not reshuffle the existing ones."""
+    before = shuffle_option_layout(LAYOUT[:2], 7)
+    after = shuffle_option_layout(LAYOUT, 7)
+    assert after[:len(before)] == before
+
+def test_seeded_session_writes_no_option_orders(client, setup_users, monkeypatch):
+    """Test that seeded sessions store no option_orders rows and re-derive the same order."""
+    monkeypatch.setattr("app.routers.test_sessions.OPTION_ORDER_MODE", OptionOrderMode.SEEDED)
+    users = setup_users
+    faculty_headers = auth_headers(client, users["faculty"][2]["username"])
+    student_headers = auth_headers(client, users["student"][2]["username"])
+
+    test_id, _ = create_exam(client, faculty_headers, 5)
+    response = client.post("/test-sessions/", json={"test_id": test_id}, headers=student_headers)
+    assert response.status_code == 201
+    session = response.json()
+    assert len(session["option_orders"]) == 5 * 4
+
+    db = SessionLocal()
+    try:
+        assert db.query(OptionOrder).filter(OptionOrder.test_session_id == session["id"]).count() == 0
+    finally:
+        db.close()
+
+    response = client.get(f"/test-sessions/{session['id']}", headers=student_headers)
+    assert response.status_code == 200
+    assert response.json()["option_orders"] == session["option_orders"]
+
+def test_legacy_session_reads_stored_option_orders(client, setup_users, monkeypatch):
+    """Test that sessions created before option order modes still use their stored rows."""
+    # Legacy sessions had their option order rows written, as stored sessions do
+    monkeypatch.setattr("app.routers.test_sessions.OPTION_ORDER_MODE", OptionOrderMode.STORED)
+    users = setup_users
+    faculty_headers = auth_headers(client, users["faculty"][2]["username"])
+    student_headers = auth_headers(client, users["student"][3]["username"])
+
+    test_id, _ = create_exam(client, faculty_headers, 2)
+    response = client.post("/test-sessions/", json={"test_id": test_id}, headers=student_headers)
+    assert response.status_code == 201
+    session = response.json()
+
+    db = SessionLocal()
+    try:
+        db.query(session_models.TestSession).filter(session_models.TestSession.id == session["id"]).update({"option_order_mode": None})
+        db.commit()
+    finally:
+        db.close()
+
+    response = client.get(f"/test-sessions/{session['id']}", headers=student_headers)
+    assert response.status_code == 200
+    key = lambda o: (o["question_id"], o["display_order"])
+    assert sorted(response.json()["option_orders"], key=key) == sorted(session["option_orders"], key=key)
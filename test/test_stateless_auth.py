@@ -0,0 +1,39 @@
+import pytest
+from app.auth.utils import AuthMode
+from test.conftest import auth_headers, register_user
+
+@pytest.fixture
+def stateless_auth(monkeypatch):
+    monkeypatch.setattr("app.auth.utils.AUTH_MODE", AuthMode.STATELESS)
+
+def test_stateless_auth_skips_user_lookup(client, setup_users, stateless_auth, count_queries):
+    """Test that role-checked read endpoints do no user queries once the principal is cached."""
+    users = setup_users
+    student_headers = auth_headers(client, users["student"][0]["username"])
+
+    # The first request loads the principal
+    assert client.get("/test-sessions/active", headers=student_headers).status_code == 200
+
+    with count_queries() as counter:
+        response = client.get("/test-sessions/active", headers=student_headers)
+    assert response.status_code == 200
+    assert not any("FROM users" in statement for statement in counter.statements)
+
+def test_stateless_auth_revokes_tokens_on_admin_changes(client, setup_users, stateless_auth):
+    """Test that changing a user's role or active status rejects tokens issued before."""
+    users = setup_users
+    admin_headers = auth_headers(client, users["admin"][0]["username"])
+    user = register_user(client, "student", 90)
+    student_headers = auth_headers(client, user["username"])
+    assert client.get("/test-sessions/active", headers=student_headers).status_code == 200
+
+    response = client.put(f"/admin/users/{user['id']}/set-role", params={"role": "faculty"}, headers=admin_headers)
+    assert response.status_code == 200
+    assert client.get("/test-sessions/active", headers=student_headers).status_code == 401
+
+    faculty_headers = auth_headers(client, user["username"])
+    assert client.get("/questions/", headers=faculty_headers).status_code == 200
+
+    response = client.put(f"/admin/users/{user['id']}/toggle-active", headers=admin_headers)
+    assert response.status_code == 200
+    assert client.get("/questions/", headers=faculty_headers).status_code == 401
@@ -0,0 +1,103 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from app.services import autosave
+from app.services.autosave import AutosaveBuffer, AutosaveMode
+from app.services.results import decode_outcomes, encode_outcomes
+from test.conftest import auth_headers, create_exam, register_user
+
+def take_exam(client, faculty_headers, student_headers, question_count, correct):
+    """Start and submit an exam answering the first `correct` questions right and the rest wrong."""
+    test_id, question_ids = create_exam(client, faculty_headers, question_count)
+    session = client.post("/test-sessions/", json={"test_id": test_id}, headers=student_headers).json()
+    option_ids = {}
+    for order in session["option_orders"]:
+        option_ids.setdefault(order["question_id"], []).append(order["option_id"])
+    # Options are created correct-first, so the lowest option id is the right answer
+    responses = [
+        {"question_id": question_id, "selected_option_id": sorted(option_ids[question_id])[0 if n < correct else 1]}
+        for n, question_id in enumerate(question_ids)
+    ]
+    response = client.post(f"/test-sessions/{session['id']}/submit", json={"responses": responses}, headers=student_headers)
+    assert response.status_code == 200
+    return session["id"], response.json()
+
+def test_outcome_bitmap_round_trip():
+    """Test that per-question outcomes survive packing into a bitmap."""
+    outcomes = [True, False, False, True, True, False, True, False, True, True]
+    bitmap = encode_outcomes(outcomes)
+    assert len(bitmap) == 2
+    assert decode_outcomes(bitmap, len(outcomes)) == outcomes
+    assert decode_outcomes(None, 3) is None
+
+def test_results_are_stored_at_submit(client, setup_users, count_queries):
+    """Test that the results page reads the stored results with one query."""
+    users = setup_users
+    faculty_headers = auth_headers(client, users["faculty"][2]["username"])
+    student = register_user(client, "student", 60)
+    student_headers = auth_headers(client, student["username"])
+
+    session_id, submitted = take_exam(client, faculty_headers, student_headers, 3, correct=2)
+    assert submitted["correct_answers"] == 2
+    assert submitted["question_count"] == 3
+    assert submitted["question_outcomes"] == [True, True, False]
+
+    with count_queries() as counter:
+        response = client.get(f"/test-sessions/{session_id}/results", headers=student_headers)
+    assert response.status_code == 200
+    assert response.json() == submitted
+    assert len([statement for statement in counter.statements if "FROM users" not in statement]) == 1
+
+def test_student_history_is_one_query(client, setup_users, count_queries):
+    """Test that the student history costs one query however many tests were taken."""
+    users = setup_users
+    faculty_headers = auth_headers(client, users["faculty"][2]["username"])
+    student = register_user(client, "student", 61)
+    student_headers = auth_headers(client, student["username"])
+
+    statement_counts = []
+    for correct in (1, 0, 2):
+        take_exam(client, faculty_headers, student_headers, 2, correct=correct)
+        with count_queries() as counter:
+            response = client.get("/student/test-results", headers=student_headers)
+        assert response.status_code == 200
+        statement_counts.append(len([statement for statement in counter.statements if "FROM users" not in statement]))
+
+    assert statement_counts == [1, 1, 1]
+    assert [result["correct_answers"] for result in response.json()] == [1, 0, 2]
+    assert [result["percentage"] for result in response.json()] == [50.0, 0.0, 100.0]
+
+def test_concurrent_submits_count_one_attempt(client, setup_users, monkeypatch, tmp_path):
+    """Test that of two submits racing past the completed check only one grades the session."""
+    buffer = AutosaveBuffer(str(tmp_path / "autosave.journal"))
+    monkeypatch.setattr(autosave, "AUTOSAVE_MODE", AutosaveMode.WRITE_BEHIND)
+    monkeypatch.setattr(autosave, "autosave_buffer", buffer)
+    users = setup_users
+    faculty_headers = auth_headers(client, users["faculty"][2]["username"])
+    student_headers = auth_headers(client, register_user(client, "student", 62)["username"])
+    test_id, question_ids = create_exam(client, faculty_headers, 2)
+    session = client.post("/test-sessions/", json={"test_id": test_id}, headers=student_headers).json()
+
+    # Both submits have seen the session open before either completes it
+    both_checked = threading.Barrier(2, timeout=5)
+    take_session = buffer.take_session
+
+    def take_session_together(*args):
+        both_checked.wait()
+        return take_session(*args)
+    monkeypatch.setattr(buffer, "take_session", take_session_together)
+
+    url = f"/test-sessions/{session['id']}/submit"
+    with ThreadPoolExecutor(2) as executor:
+        submits = [executor.submit(client.post, url, json={"responses": []}, headers=student_headers) for _ in range(2)]
+        statuses = sorted(submit.result().status_code for submit in submits)
+
+    assert statuses == [200, 400]
+    # The losing submit leaves the session closed to saves
+    assert not buffer.record(session["id"], [{
+        "question_id": question_ids[0], "selected_option_id": None, "selected_option_ids": None, "client_sequence": None
+    }])
+    buffer.close()
+    analytics = client.get(f"/tests/{test_id}/analytics", headers=faculty_headers).json()
+    assert analytics["attempt_count"] == 1
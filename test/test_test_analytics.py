@@ -0,0 +1,102 @@
+import statistics
+
+import pytest
+from sqlalchemy import update
+from app.database.database import SessionLocal
+from app.jobs.recompute_test_analytics import check_test_analytics, recompute_test_analytics
+from app import models
+from test.conftest import auth_headers, create_exam, register_user, submit_answers
+
+# Answers of each student per question: True correct, False wrong, None unanswered
+ANSWERS = [
+    [True, True, True, True],
+    [True, True, False, None],
+    [True, False, False, False],
+    [False, None, None, None],
+]
+
+@pytest.fixture(scope="module")
+def taken_exam(client, setup_users):
+    """An exam taken by one student per row of ANSWERS"""
+    faculty_headers = auth_headers(client, setup_users["faculty"][3]["username"])
+    test_id, question_ids = create_exam(client, faculty_headers, 4)
+    for index, answers in enumerate(ANSWERS):
+        student = register_user(client, "student", 70 + index)
+        submit_answers(client, auth_headers(client, student["username"]), test_id, answers)
+    return test_id, question_ids, faculty_headers
+
+def test_score_statistics(client, taken_exam, count_queries):
+    """Test that the test analytics summarise every graded attempt without reading responses."""
+    test_id, _, faculty_headers = taken_exam
+    with count_queries() as counter:
+        response = client.get(f"/tests/{test_id}/analytics", headers=faculty_headers)
+    assert response.status_code == 200
+    assert not [statement for statement in counter.statements if "user_responses" in statement]
+
+    analytics = response.json()
+    percentages = [100.0, 50.0, 25.0, 0.0]
+    assert analytics["attempt_count"] == 4
+    assert analytics["mean_score"] == pytest.approx(1.75)
+    assert analytics["mean_percentage"] == pytest.approx(statistics.mean(percentages))
+    assert analytics["std_dev_percentage"] == pytest.approx(statistics.pstdev(percentages))
+    # Halfway through the second attempt counted in the 20-30% bucket
+    assert analytics["median_percentage"] == pytest.approx(30.0)
+    assert [bucket["attempt_count"] for bucket in analytics["distribution"]] == [1, 0, 1, 0, 0, 1, 0, 0, 0, 1]
+
+def test_question_statistics(client, taken_exam, count_queries):
+    """Test the difficulty, discrimination and option pick rates of each question."""
+    test_id, question_ids, faculty_headers = taken_exam
+    with count_queries() as counter:
+        response = client.get(f"/tests/{test_id}/analytics/questions", headers=faculty_headers)
+    assert response.status_code == 200
+    assert not [statement for statement in counter.statements if "user_responses" in statement]
+
+    questions = response.json()
+    assert [question["question_id"] for question in questions] == question_ids
+    percentages = [100.0, 50.0, 25.0, 0.0]
+    for index, question in enumerate(questions):
+        outcomes = [answers[index] is True for answers in ANSWERS]
+        assert question["attempt_count"] == 4
+        assert question["answered_count"] == sum(answers[index] is not None for answers in ANSWERS)
+        assert question["correct_count"] == sum(outcomes)
+        assert question["difficulty_index"] == pytest.approx(sum(outcomes) / 4)
+        # The point-biserial index is the correlation between outcome and percentage
+        assert question["discrimination_index"] == pytest.approx(statistics.correlation(
+            [float(outcome) for outcome in outcomes], percentages
+        ))
+
+    first_options = questions[0]["options"]
+    assert [option["pick_count"] for option in first_options] == [3, 1, 0, 0]
+    assert [option["pick_rate"] for option in first_options] == [0.75, 0.25, 0.0, 0.0]
+
+def test_analytics_are_for_the_test_owner(client, setup_users, taken_exam):
+    """Test that other faculty cannot read a test's analytics."""
+    test_id, _, _ = taken_exam
+    other_headers = auth_headers(client, setup_users["faculty"][1]["username"])
+    assert client.get(f"/tests/{test_id}/analytics", headers=other_headers).status_code == 403
+    student_headers = auth_headers(client, setup_users["student"][0]["username"])
+    assert client.get(f"/tests/{test_id}/analytics/questions", headers=student_headers).status_code == 403
+
+def test_recompute_matches_running_aggregates(client, taken_exam):
+    """Test that the recompute job agrees with the aggregates kept by submits and repairs drift."""
+    test_id, _, faculty_headers = taken_exam
+    before = client.get(f"/tests/{test_id}/analytics/questions", headers=faculty_headers).json()
+
+    db = SessionLocal()
+    try:
+        assert check_test_analytics(db, [test_id]) == {}
+
+        stats = models.TestStats
+        db.execute(update(stats).where(stats.test_id == test_id).values(attempt_count=stats.attempt_count + 1))
+        db.commit()
+        differences = check_test_analytics(db, [test_id])
+        assert len(differences[test_id]) == 1
+        assert "attempt_count" in differences[test_id][0]
+
+        assert recompute_test_analytics(db, [test_id]) == 1
+        assert check_test_analytics(db, [test_id]) == {}
+    finally:
+        db.close()
+
+    assert client.get(f"/tests/{test_id}/analytics", headers=faculty_headers).json()["attempt_count"] == 4
+    assert client.get(f"/tests/{test_id}/analytics/questions", headers=faculty_headers).json() == before
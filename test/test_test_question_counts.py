@@ -0,0 +1,38 @@
+from test.conftest import auth_headers, create_exam
+
+def test_test_listing_counts_questions_in_constant_queries(client, setup_users, count_queries):
+    """Test that listing tests counts their questions without a query per test."""
+    users = setup_users
+    faculty_headers = auth_headers(client, users["faculty"][1]["username"])
+
+    create_exam(client, faculty_headers, 2)
+    with count_queries() as before:
+        response = client.get("/tests/", headers=faculty_headers)
+    assert response.status_code == 200
+
+    for question_count in (1, 3, 4):
+        create_exam(client, faculty_headers, question_count)
+    with count_queries() as after:
+        response = client.get("/tests/", headers=faculty_headers)
+    assert response.status_code == 200
+
+    assert after.count == before.count
+    assert not any("FROM questions" in statement for statement in after.statements)
+
+    counts = {test["title"]: test["question_count"] for test in response.json()}
+    assert counts["Exam with 3 questions"] == 3
+    assert counts["Exam with 4 questions"] == 4
+
+def test_single_test_reports_question_count(client, setup_users):
+    """Test that reading and updating a test report its question count."""
+    users = setup_users
+    faculty_headers = auth_headers(client, users["faculty"][1]["username"])
+    test_id, _ = create_exam(client, faculty_headers, 3)
+
+    response = client.get(f"/tests/{test_id}", headers=faculty_headers)
+    assert response.json()["question_count"] == 3
+
+    response = client.put(f"/tests/{test_id}", json={"title": "Renamed exam"}, headers=faculty_headers)
+    assert response.status_code == 200
+    assert response.json()["question_count"] == 3
+    assert response.json()["title"] == "Renamed exam"
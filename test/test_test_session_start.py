@@ -0,0 +1,85 @@
+import pytest
+from test.conftest import auth_headers, create_exam
+
+def test_start_session_shuffles_every_option(client, setup_users):
+    """Test that a new session gets one option order row per option of every question."""
+    users = setup_users
+    faculty_headers = auth_headers(client, users["faculty"][0]["username"])
+    student_headers = auth_headers(client, users["student"][0]["username"])
+
+    test_id, question_ids = create_exam(client, faculty_headers, 3)
+
+    response = client.post("/test-sessions/", json={"test_id": test_id}, headers=student_headers)
+    assert response.status_code == 201
+    session = response.json()
+
+    option_orders = session["option_orders"]
+    assert len(option_orders) == 3 * 4
+    for question_id in question_ids:
+        display_orders = sorted(o["display_order"] for o in option_orders if o["question_id"] == question_id)
+        assert display_orders == [0, 1, 2, 3]
+
+    # Reading the session back returns the same stored order
+    response = client.get(f"/test-sessions/{session['id']}", headers=student_headers)
+    assert response.status_code == 200
+    stored = {(o["question_id"], o["option_id"]): o["display_order"] for o in response.json()["option_orders"]}
+    assert stored == {(o["question_id"], o["option_id"]): o["display_order"] for o in option_orders}
+
+def test_start_session_query_count_is_constant(client, setup_users, count_queries):
+    """Benchmark that starting a session issues the same number of statements regardless of question count."""
+    users = setup_users
+    faculty_headers = auth_headers(client, users["faculty"][1]["username"])
+    student_headers = auth_headers(client, users["student"][1]["username"])
+
+    statement_counts = {}
+    for question_count in (2, 20):
+        test_id, _ = create_exam(client, faculty_headers, question_count)
+        with count_queries() as counter:
+            response = client.post("/test-sessions/", json={"test_id": test_id}, headers=student_headers)
+        assert response.status_code == 201
+        assert len(response.json()["option_orders"]) == question_count * 4
+        statement_counts[question_count] = counter.count
+
+    assert statement_counts[2] == statement_counts[20]
+
+def test_concurrent_start_returns_the_existing_session(client, setup_users, monkeypatch):
+    """Test that a start losing the race on the one-active-session index returns the winner's session."""
+    from app.routers import test_sessions
+
+    users = setup_users
+    faculty_headers = auth_headers(client, users["faculty"][0]["username"])
+    student_headers = auth_headers(client, users["student"][0]["username"])
+    test_id, _ = create_exam(client, faculty_headers, 2)
+    response = client.post("/test-sessions/", json={"test_id": test_id}, headers=student_headers)
+    assert response.status_code == 201
+    first = response.json()
+
+    # The second request does not see the first session until its insert fails
+    active_session = test_sessions._active_session
+    lookups = []
+    async def racing_lookup(db, user_id, test_id):
+        lookups.append(test_id)
+        return None if len(lookups) == 1 else await active_session(db, user_id, test_id)
+    monkeypatch.setattr(test_sessions, "_active_session", racing_lookup)
+
+    response = client.post("/test-sessions/", json={"test_id": test_id}, headers=student_headers)
+    assert response.status_code == 201
+    assert response.json()["id"] == first["id"]
+    assert len(lookups) == 2
+
+def test_student_start_test_numbers_options_from_one(client, setup_users):
+    """Test that sessions started from the student endpoint keep their 1-based display orders."""
+    users = setup_users
+    faculty_headers = auth_headers(client, users["faculty"][0]["username"])
+    student_headers = auth_headers(client, users["student"][1]["username"])
+
+    test_id, question_ids = create_exam(client, faculty_headers, 2)
+    response = client.post(f"/student/start-test/{test_id}", headers=student_headers)
+    assert response.status_code == 200
+
+    response = client.get(f"/test-sessions/{response.json()['id']}", headers=student_headers)
+    assert response.status_code == 200
+    option_orders = response.json()["option_orders"]
+    for question_id in question_ids:
+        display_orders = sorted(o["display_order"] for o in option_orders if o["question_id"] == question_id)
+        assert display_orders == [1, 2, 3, 4]